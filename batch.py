@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Batch Runner
+Streams a JSONL file of {request, answer, mcp} records through the MCPs
+without user interaction, for bulk research and scrape jobs.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Deque, Dict, Any, Iterable, Iterator, Optional, Set, TextIO, Tuple
+
+from mcp_registry import default_registry
+from metrics import METRICS
+from routing import determine_mcp_type
+from session_store import SessionStore
+
+logger = logging.getLogger("BatchRunner")
+
+
+class Checkpoint:
+    """
+    Progress of a batch run, saved atomically next to the output
+
+    Every input line below `next_line` has been written, as have the lines in
+    `done_after` (completion order can finish later lines first). A crash
+    between writing results and saving the checkpoint replays at most the
+    results written since the last save.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.next_line = 0
+        self.done_after: Set[int] = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.next_line = state["next_line"]
+            self.done_after = set(state["done_after"])
+
+    def is_done(self, line: int) -> bool:
+        return line < self.next_line or line in self.done_after
+
+    def mark(self, line: int) -> None:
+        self.done_after.add(line)
+        while self.next_line in self.done_after:
+            self.done_after.discard(self.next_line)
+            self.next_line += 1
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"next_line": self.next_line, "done_after": sorted(self.done_after)}, f)
+        os.replace(tmp_path, self.path)
+
+
+def read_records(lines: Iterable[str]) -> Iterator[Tuple[int, Any]]:
+    """
+    Decode JSONL lazily
+
+    Yields:
+        (line number, record) for each line; the record is None for blank
+        lines and the decoding error message if the line is not valid JSON
+    """
+    for line_number, line in enumerate(lines):
+        if not line.strip():
+            yield line_number, None
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {str(e)}"
+
+
+class BatchRunner:
+    """
+    Runs records through the MCPs on a thread pool
+
+    Records are read as they are needed: at most `max_pending` are submitted
+    or waiting to be written at any time, so memory stays flat however large
+    the input is.
+    """
+
+    def __init__(self, mcps: Optional[Dict[str, Any]] = None, workers: int = 8,
+                 max_pending: Optional[int] = None, sessions: Optional[SessionStore] = None):
+        """
+        Initialize the runner
+
+        Args:
+            mcps: MCP instances by name (defaults to a registry that loads research and
+                webscraping, on one shared HTTP client, on first use)
+            workers: Records processed at the same time
+            max_pending: Records submitted or buffered before reading pauses (defaults to 4 per worker)
+            sessions: Context store for records that carry a session_id; other
+                records each start from a fresh context
+        """
+        self.mcps = mcps if mcps is not None else default_registry(prefetch_workers=workers)
+        self.workers = workers
+        self.max_pending = max_pending or workers * 4
+        self.sessions = sessions or SessionStore()
+
+    def process(self, line: int, record: Any) -> Dict[str, Any]:
+        """
+        Run one record through routing, the clarifying question and the response
+
+        Args:
+            line: The record's line number in the input
+            record: The decoded record
+
+        Returns:
+            The result row; failures are reported in an "error" field
+        """
+        result: Dict[str, Any] = {"line": line}
+        if not isinstance(record, dict) or not isinstance(record.get("request"), str):
+            result["error"] = record if isinstance(record, str) else "Record needs a 'request' string"
+            return result
+        if "id" in record:
+            result["id"] = record["id"]
+
+        request = record["request"]
+        answer = record.get("answer") or ""
+        mcp_name = record.get("mcp") or determine_mcp_type(request)
+        result["mcp"] = mcp_name
+        try:
+            mcp = self.mcps[mcp_name]
+        except KeyError:
+            result["error"] = f"Unknown MCP '{mcp_name}'"
+            return result
+
+        session_id = record.get("session_id")
+        context = (self.sessions.context(str(session_id), mcp_name, mcp.new_context)
+                   if session_id is not None else mcp.new_context())
+        try:
+            # The answer is already known, so there is no think-time to prefetch in
+            with METRICS.time("question"):
+                result["question"] = mcp.generate_question(request, context, prefetch=False)
+            result["response"] = METRICS.call("response", mcp.generate_response, request, answer, context)
+        except Exception as e:
+            logger.error(f"Error processing line {line}: {str(e)}")
+            result["error"] = str(e)
+        return result
+
+    def run(self, lines: Iterable[str], output: TextIO, ordered: bool = True,
+            checkpoint: Optional[Checkpoint] = None, checkpoint_every: int = 100) -> Dict[str, int]:
+        """
+        Process every record and write one JSON result line per record
+
+        Args:
+            lines: Input JSONL lines (e.g. an open file)
+            output: Where result lines are written
+            ordered: Write results in input order (otherwise as they complete)
+            checkpoint: Progress to resume from and update
+            checkpoint_every: Results written between checkpoint saves
+
+        Returns:
+            Counts of processed, failed and skipped records
+        """
+        checkpoint = checkpoint or Checkpoint(None)
+        counts = {"processed": 0, "failed": 0, "skipped": 0}
+        pending: Deque[Tuple[int, Future]] = deque()
+        since_save = 0
+
+        def write(line: int, result: Dict[str, Any]) -> None:
+            nonlocal since_save
+            output.write(json.dumps(result) + "\n")
+            counts["failed" if "error" in result else "processed"] += 1
+            checkpoint.mark(line)
+            since_save += 1
+            if since_save >= checkpoint_every:
+                output.flush()
+                checkpoint.save()
+                since_save = 0
+
+        def drain(block_until: int) -> None:
+            """Write finished results until at most `block_until` remain pending"""
+            nonlocal pending
+            if ordered:
+                while pending and (len(pending) > block_until or pending[0][1].done()):
+                    line, future = pending.popleft()
+                    write(line, future.result())
+                return
+            while True:
+                if len(pending) > block_until:
+                    wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                still_running = deque()
+                for line, future in pending:
+                    if future.done():
+                        write(line, future.result())
+                    else:
+                        still_running.append((line, future))
+                pending = still_running
+                if len(pending) <= block_until:
+                    return
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            for line, record in read_records(lines):
+                if checkpoint.is_done(line):
+                    counts["skipped"] += 1
+                    continue
+                if record is None:
+                    checkpoint.mark(line)
+                    continue
+                pending.append((line, pool.submit(self.process, line, record)))
+                drain(self.max_pending - 1)
+            drain(0)
+
+        output.flush()
+        checkpoint.save()
+        return counts
+
+
+def main():
+    """Main entry point for batch mode"""
+    parser = argparse.ArgumentParser(description="Praneeth's MCP Server (batch mode)")
+    parser.add_argument('input', type=str, help="JSONL file of {request, answer, mcp} records ('-' for stdin)")
+    parser.add_argument('-o', '--output', type=str, default='-', help="Where to write JSONL results ('-' for stdout)")
+    parser.add_argument('--workers', type=int, default=8, help='Records processed at the same time')
+    parser.add_argument('--order', choices=['input', 'completion'], default='input',
+                        help='Write results in input order or as they complete')
+    parser.add_argument('--checkpoint', type=str, help='Progress file; an existing one resumes the run')
+    parser.add_argument('--checkpoint-every', type=int, default=100, help='Results between checkpoint saves')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='Processes that parse scraped pages (0 parses on the worker threads)')
+    args = parser.parse_args()
+
+    # stdout may carry the results, so logs always go to stderr
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+    checkpoint = Checkpoint(args.checkpoint)
+    resuming = checkpoint.next_line > 0 or bool(checkpoint.done_after)
+    source = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'a' if resuming else 'w', encoding='utf-8')
+    try:
+        mcps = default_registry(parse_workers=args.parse_workers, prefetch_workers=args.workers)
+        runner = BatchRunner(mcps=mcps, workers=args.workers)
+        counts = runner.run(source, output, ordered=args.order == 'input', checkpoint=checkpoint,
+                            checkpoint_every=args.checkpoint_every)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    logger.info(f"Batch finished: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the single-pass extraction plan
+Compares one soup.select() per requested element against the compiled
+single-walk plan on the synthetic corpus.
+"""
+
+import argparse
+import time
+
+from extraction import compile_plan
+from html_corpus import CORPUS_VERSION, default_corpus
+from html_parsers import parse_html
+
+ELEMENT_SETS = [
+    (),
+    ("prices", "product titles", "images", "description"),
+    ("prices", "product titles", "images", "description", "ai", "rating", "product", "item")
+]
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Extraction plan benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Extractions per page and element set")
+    args = parser.parse_args()
+
+    soups = {name: parse_html(html) for name, html in default_corpus().items()}
+    print(f"=== Extraction benchmark (corpus v{CORPUS_VERSION}) ===")
+    for elements in ELEMENT_SETS:
+        plan = compile_plan(elements)
+        timings = {}
+        for label, run in (("select per element", plan.run_with_select), ("single pass", plan.run)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for soup in soups.values():
+                    run(soup)
+            timings[label] = (time.perf_counter() - start) * 1000 / args.repeat
+        print(f"{len(elements)} elements: " + "  ".join(f"{label}={ms:8.1f} ms" for label, ms in timings.items())
+              + f"  speedup={timings['select per element'] / timings['single pass']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the pooled HTTP client
+Compares per-request latency of a fresh `requests.get` per call against the
+shared keep-alive HTTPClient, both hitting a local fixture server.
+"""
+
+import argparse
+import statistics
+import time
+
+import requests
+
+from fixture_server import FixtureServer
+from http_client import HTTPClient
+
+PAGE = "<html><head><title>Bench</title></head><body>" + "<p>content</p>" * 50 + "</body></html>"
+
+
+def measure(fetch, url: str, iterations: int) -> list:
+    """Time `iterations` calls of fetch(url) and return latencies in milliseconds"""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = fetch(url)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<28} mean={statistics.mean(latencies):7.3f} ms  "
+          f"p50={statistics.median(latencies):7.3f} ms  p95={p95:7.3f} ms")
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Pooled HTTP client benchmark")
+    parser.add_argument("--iterations", type=int, default=500, help="Requests per variant")
+    args = parser.parse_args()
+
+    with FixtureServer({"/page": PAGE}) as server:
+        url = server.url("/page")
+        client = HTTPClient()
+        client.get(url)  # warm the pool
+
+        fresh = measure(lambda u: requests.get(u, timeout=10), url, args.iterations)
+        pooled = measure(client.get, url, args.iterations)
+        client.close()
+
+    print(f"=== HTTP client benchmark ({args.iterations} requests each) ===")
+    report("requests.get (new conn)", fresh)
+    report("HTTPClient (keep-alive)", pooled)
+    print(f"Mean latency reduction: {(1 - statistics.mean(pooled) / statistics.mean(fresh)) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the compiled keyword matcher
+Compares the per-keyword `keyword in text.lower()` scans that routing and the
+context updates used to do against one MATCHER pass per text, on short and
+long pasted inputs.
+"""
+
+import argparse
+import random
+import time
+
+from keyword_matcher import KEYWORD_TABLES, MATCHER
+
+FILLER = ("the quarterly report lists revenue by region and compares it with last year while the appendix "
+          "covers methodology assumptions and https://example.com/reports/2024?page=3 for reference").split()
+
+
+def pasted_text(words: int, seed: int) -> str:
+    """Deterministic long input, like a document pasted into the request"""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(FILLER).capitalize() if rng.random() < 0.1 else rng.choice(FILLER)
+                    for _ in range(words))
+
+
+def first_label(table, text):
+    for label, keywords in table.items():
+        if any(keyword in text for keyword in keywords):
+            return label
+    return None
+
+
+def legacy_turn(request: str, answer: str):
+    """The keyword checks of one turn as written before the matcher (routing + question + context update)"""
+    route = any(keyword in request.lower() for keyword in KEYWORD_TABLES["route"]["webscraping"])
+    question = ("url" in request.lower(), "extract" in request.lower(), "scrape" in request.lower(),
+                "format" in request.lower() or "output" in request.lower(),
+                "topic" in request.lower(), "sources" in request.lower() or "reference" in request.lower(),
+                "depth" in request.lower() or "detail" in request.lower())
+    combined = (request + " " + answer).lower()
+    scraping = (first_label(KEYWORD_TABLES["format"], combined),
+                any(keyword in combined for keyword in KEYWORD_TABLES["pagination"]["pagination"]),
+                first_label(KEYWORD_TABLES["frequency"], combined),
+                "login" in answer.lower() or "authenticate" in answer.lower())
+    research = tuple(first_label(KEYWORD_TABLES[group], answer.lower()) for group in ("depth", "sources", "focus"))
+    return route, question, scraping, research
+
+
+def matcher_turn(request: str, answer: str):
+    """The same decisions from MATCHER hits, scanned where routing and the MCPs scan them"""
+    route = MATCHER.scan(request).has("route", "webscraping")
+    request_hits = MATCHER.scan(request)
+    answer_hits = MATCHER.scan(answer)
+    combined_hits = MATCHER.scan(request + " " + answer)
+    question = tuple(request_hits.has("scrape_question", label) for label in ("url", "extract", "scrape", "format")) + \
+        tuple(request_hits.has("research_question", label) for label in ("topic", "sources", "depth"))
+    scraping = (combined_hits.first("format"), combined_hits.any("pagination"),
+                combined_hits.first("frequency"), answer_hits.has("auth", "login"))
+    research = tuple(answer_hits.first(group) for group in ("depth", "sources", "focus"))
+    return route, question, scraping, research
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Keyword matcher benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="Turns per input size")
+    args = parser.parse_args()
+
+    print("=== Keyword matcher benchmark (CPU per turn) ===")
+    for words in (20, 2000, 20000):
+        request = pasted_text(words, seed=words) + " scrape it daily"
+        answer = pasted_text(max(words // 10, 5), seed=words + 1) + " as csv with sources"
+        assert legacy_turn(request, answer) == matcher_turn(request, answer)
+
+        timings = {}
+        for label, turn in (("per-keyword scans", legacy_turn), ("compiled matcher", matcher_turn)):
+            start = time.process_time()
+            for _ in range(args.repeat):
+                turn(request, answer)
+            timings[label] = (time.process_time() - start) * 1000 / args.repeat
+        print(f"{len(request) + len(answer):>8} chars: "
+              + "  ".join(f"{label}={ms:8.3f} ms" for label, ms in timings.items())
+              + f"  speedup={timings['per-keyword scans'] / timings['compiled matcher']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
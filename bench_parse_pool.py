@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark for process-pool parsing
+Measures parse-plus-extract throughput (pages/sec) on the synthetic corpus
+with a thread pool, which the GIL holds to about one core, and with the
+parse pool at 1, 2, 4, ... workers up to the core count.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+from html_corpus import CORPUS_VERSION, news_page, retail_page
+from html_parsers import select_backend
+from parse_pool import ParsePool, parse_and_extract
+
+ELEMENTS = ("prices", "product titles", "images", "description")
+
+
+def build_pages(count: int) -> List[Tuple[bytes, str]]:
+    """Mid-sized pages as (body, encoding), alternating retail and news"""
+    pages = [retail_page(200).encode("utf-8"), news_page(60).encode("utf-8")]
+    return [(pages[i % len(pages)], "utf-8") for i in range(count)]
+
+
+def worker_counts(cores: int) -> List[int]:
+    counts, n = [], 1
+    while n < cores:
+        counts.append(n)
+        n *= 2
+    return counts + [cores]
+
+
+def bench_threads(pages: List[Tuple[bytes, str]], workers: int, backend: str) -> Tuple[float, List[Dict[str, Any]]]:
+    """Pages/sec parsing on a thread pool in this process"""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda page: parse_and_extract(page[0], page[1], ELEMENTS, backend=backend), pages))
+        elapsed = time.perf_counter() - start
+    return len(pages) / elapsed, results
+
+
+def bench_pool(pages: List[Tuple[bytes, str]], workers: int, backend: str) -> Tuple[float, List[Dict[str, Any]]]:
+    """Pages/sec parsing in a warm parse pool (worker start-up is not timed)"""
+    pool = ParsePool(workers, backend=backend)
+    try:
+        start = time.perf_counter()
+        futures = [pool.submit(content, encoding, ELEMENTS) for content, encoding in pages]
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.close()
+    return len(pages) / elapsed, results
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Process-pool parsing benchmark")
+    parser.add_argument("--pages", type=int, default=200, help="Pages parsed per measurement")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="Largest pool measured")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    backend = select_backend()
+    pages = build_pages(args.pages)
+    results: Dict[str, Any] = {"corpus_version": CORPUS_VERSION, "backend": backend, "pages": args.pages,
+                               "cores": os.cpu_count(), "threads": {}, "processes": {}}
+    thread_rate, reference = bench_threads(pages, args.max_workers, backend)
+    results["threads"][args.max_workers] = thread_rate
+    for workers in worker_counts(args.max_workers):
+        rate, extracted = bench_pool(pages, workers, backend)
+        if extracted != reference:
+            raise SystemExit(f"Parse pool with {workers} workers extracted different data")
+        results["processes"][workers] = rate
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"=== Parse pool benchmark (corpus v{CORPUS_VERSION}, {args.pages} pages, backend={backend}, "
+          f"{results['cores']} cores) ===")
+    print(f"threads   x{args.max_workers:<3} {thread_rate:8.1f} pages/sec")
+    for workers, rate in results["processes"].items():
+        print(f"processes x{workers:<3} {rate:8.1f} pages/sec  ({rate / thread_rate:.2f}x threads)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the HTML parser backends
+Measures parse and extract time per MB for every installed backend on the
+fixed synthetic corpus, and checks that all backends extract the same data.
+"""
+
+import argparse
+import time
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from html_corpus import CORPUS_VERSION, default_corpus
+from html_parsers import available_backends, parse_html
+
+# Element lists exercising every extraction strategy, plus the general fallback
+ELEMENT_SETS = [
+    [],
+    ["prices", "product titles", "images", "description"],
+    ["ai", "rating"]
+]
+
+
+def bench_backend(backend: str, corpus: dict, repeat: int) -> tuple:
+    """Return (parse seconds, extract seconds, extracted data) for one backend over the corpus"""
+    mcp = WebscrapingMCP(parser_backend=backend)
+    parse_time = extract_time = 0.0
+    extracted = {}
+    for _ in range(repeat):
+        for name, html in corpus.items():
+            start = time.perf_counter()
+            soup = parse_html(html, backend)
+            parse_time += time.perf_counter() - start
+
+            for elements in ELEMENT_SETS:
+                mcp.context["elements_to_extract"] = elements
+                start = time.perf_counter()
+                extracted[(name, tuple(elements))] = mcp._extract(soup)
+                extract_time += time.perf_counter() - start
+    return parse_time, extract_time, extracted
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="HTML parser backend benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per backend")
+    args = parser.parse_args()
+
+    corpus = default_corpus()
+    megabytes = sum(len(html.encode("utf-8")) for html in corpus.values()) * args.repeat / (1024 * 1024)
+    print(f"=== Parser backend benchmark (corpus v{CORPUS_VERSION}, {megabytes:.1f} MB per backend) ===")
+
+    reference = None
+    for backend in available_backends():
+        parse_time, extract_time, extracted = bench_backend(backend, corpus, args.repeat)
+        same = "reference" if reference is None else ("same results" if extracted == reference else "RESULTS DIFFER")
+        reference = reference or extracted
+        print(f"{backend:<12} parse={parse_time * 1000 / megabytes:8.1f} ms/MB  "
+              f"extract={extract_time * 1000 / megabytes:8.1f} ms/MB  ({same})")
+
+
+if __name__ == "__main__":
+    main()
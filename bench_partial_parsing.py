@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark for streaming fetch with targeted partial parsing
+Scrapes multi-MB pages from a local fixture server with partial parsing off
+and on, reporting bytes downloaded, peak traced memory and wall time.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from html_corpus import CORPUS_VERSION, sized_page
+
+ELEMENT_SETS = [[], ["product titles", "description"]]
+
+
+def scrape(partial: bool, url: str, elements: list) -> tuple:
+    """Scrape url once and return (bytes downloaded, peak memory, seconds)"""
+    mcp = WebscrapingMCP(partial_parsing=partial, max_page_bytes=None)
+    mcp.context["elements_to_extract"] = elements
+    downloaded = []
+    fetch = mcp.http.fetch
+
+    def counting_fetch(*args, **kwargs):
+        page = fetch(*args, **kwargs)
+        downloaded.append(len(page.content))
+        return page
+
+    mcp.http.fetch = counting_fetch
+    tracemalloc.start()
+    start = time.perf_counter()
+    mcp._scrape_data(url)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return downloaded[0], peak, elapsed
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Partial parsing benchmark")
+    parser.add_argument("--sizes", type=str, default="1,10", help="Comma-separated page sizes in MB")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    routes = {f"/{size}mb": sized_page(size * 1024 * 1024).encode("utf-8") for size in sizes}
+    print(f"=== Partial parsing benchmark (corpus v{CORPUS_VERSION}) ===")
+    with FixtureServer(routes) as server:
+        for size in sizes:
+            for elements in ELEMENT_SETS:
+                for partial in (False, True):
+                    downloaded, peak, elapsed = scrape(partial, server.url(f"/{size}mb"), elements)
+                    print(f"{size:>3} MB  elements={str(elements):<34} {'partial' if partial else 'full':<8} "
+                          f"downloaded={downloaded / 1024:9.0f} KB  peak={peak / (1024 * 1024):7.1f} MB  "
+                          f"time={elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
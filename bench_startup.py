@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark for cold-start latency
+Spawns a fresh interpreter per run and times importing each entry point,
+plus the deferred cost of loading each MCP on first use, with a
+`-X importtime` breakdown of where the import time goes.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+ENTRY_POINTS = ["server", "mcp_server", "rpc_server", "batch"]
+
+# First use of an MCP after startup: what a session pays when it needs one
+FIRST_USE = {
+    "research MCP": "from mcp_registry import default_registry; default_registry()['research']",
+    "webscraping MCP": "from mcp_registry import default_registry; default_registry()['webscraping']"
+}
+
+
+def run_python(code: str, *flags: str) -> Tuple[float, str]:
+    """Run code in a fresh interpreter; returns (wall milliseconds, stderr)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *flags, "-c", code], cwd=HERE,
+                            capture_output=True, text=True, check=True)
+    return (time.perf_counter() - start) * 1000, result.stderr
+
+
+def cold_start(code: str, runs: int) -> float:
+    """Median wall time of running code in a fresh interpreter"""
+    return statistics.median(run_python(code)[0] for _ in range(runs))
+
+
+def import_breakdown(module: str, top: int) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Parse `-X importtime` for one import
+
+    Returns:
+        The module's cumulative import time and the `top` heaviest top-level
+        packages it pulled in, by self time summed over their submodules (ms)
+    """
+    _, stderr = run_python(f"import {module}", "-X", "importtime")
+    total = 0.0
+    by_package: Dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name == module:
+            total = int(cumulative_us) / 1000
+        by_package[name.strip().split(".")[0]] += int(self_us) / 1000
+    heaviest = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return total, heaviest
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports shown per entry point")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    baseline = cold_start("pass", args.runs)
+    results = {"python_startup_ms": baseline, "entry_points": {}, "first_use": {}}
+    for module in ENTRY_POINTS:
+        import_ms, heaviest = import_breakdown(module, args.top)
+        results["entry_points"][module] = {
+            "cold_start_ms": cold_start(f"import {module}", args.runs) - baseline,
+            "import_ms": import_ms,
+            "heaviest": dict(heaviest)
+        }
+    registry_ms = cold_start("import mcp_registry", args.runs)
+    for label, code in FIRST_USE.items():
+        results["first_use"][label] = cold_start(code, args.runs) - registry_ms
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"=== Startup benchmark (median of {args.runs} fresh interpreters, "
+          f"interpreter startup {baseline:.1f} ms subtracted) ===")
+    for module, result in results["entry_points"].items():
+        heaviest = ", ".join(f"{name} {ms:.1f}" for name, ms in result["heaviest"].items())
+        print(f"{module:<12} cold start={result['cold_start_ms']:7.1f} ms  "
+              f"importtime={result['import_ms']:7.1f} ms  heaviest: {heaviest}")
+    for label, ms in results["first_use"].items():
+        print(f"first use of {label:<16} +{ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Offline Benchmark Suite
+Serves the versioned benchmark corpus (small, 1 MB, 10 MB and deeply nested
+pages) and a fake Wikipedia search API from a local fixture server, then
+measures latency and throughput of scraping, research lookups, context
+updates and end-to-end request processing. Results are written as JSON and
+can be compared against a previous run to catch regressions.
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer, fake_wikipedia_search
+from html_corpus import CORPUS_VERSION, bench_corpus
+from http_client import HTTPClient
+from mcp_research import ResearchMCP
+from metrics import Histogram
+from politeness import PolitenessScheduler
+import mcp_server
+import server
+
+# Bump when benchmarks are added, removed or change what they measure
+SUITE_VERSION = 1
+
+ELEMENTS = ["titles", "description", "prices", "links"]
+
+SHORT_REQUEST = "I want to scrape product prices from https://shop.example.com/products every day"
+SHORT_ANSWER = "titles and prices as csv"
+LONG_ANSWER = " ".join([SHORT_ANSWER, "The listing is long and I mostly care about the discounted items."] * 200)
+RESEARCH_REQUEST = "I need information about quantum computing"
+RESEARCH_ANSWER = "an advanced overview with academic sources"
+
+
+def measure(fn: Callable[[int], Any], repeat: int, size: int = 0) -> Dict[str, Any]:
+    """
+    Time repeat calls of fn(i) after one untimed warm-up call
+
+    Args:
+        fn: The operation; it gets the iteration number
+        repeat: Timed calls
+        size: Bytes processed per call, for MB/s (0 to leave it out)
+
+    Returns:
+        Latency percentiles (ms) and throughput
+    """
+    fn(-1)
+    histogram = Histogram()
+    start = time.perf_counter()
+    for i in range(repeat):
+        call_start = time.perf_counter()
+        fn(i)
+        histogram.record(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    result = histogram.summary()
+    result["ops_per_sec"] = repeat / elapsed
+    if size:
+        result["mb_per_sec"] = size * repeat / elapsed / (1024 * 1024)
+    return result
+
+
+def fixture_routes() -> Dict[str, Any]:
+    """The corpus pages at /<name> and the fake search API at /w/api.php"""
+    routes: Dict[str, Any] = {f"/{name}": html for name, html in bench_corpus().items()}
+    routes["/w/api.php"] = fake_wikipedia_search
+    return routes
+
+
+def local_mcps(http: HTTPClient, api_url: str) -> Dict[str, Any]:
+    """
+    Research and webscraping MCPs for a local stand-in backend
+
+    The per-host rate limit is lifted, since every page lives on the one
+    fixture host; everything else keeps its production settings.
+    """
+    return {"webscraping": WebscrapingMCP(http_client=http, politeness=PolitenessScheduler(http, rate=1e9, burst=1e9)),
+            "research": ResearchMCP(http_client=http, api_url=api_url)}
+
+
+@contextlib.contextmanager
+def scripted_input(answer: str) -> Iterator[None]:
+    """Answer every input() prompt with the same answer and swallow the REPL's prints"""
+    original = builtins.input
+    builtins.input = lambda prompt="": answer
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = original
+
+
+class BenchmarkSuite:
+    """
+    The benchmarks, run against MCPs pointed at a fixture server
+
+    Pages are scraped with the MCP's production settings (download budget and
+    partial parsing included); only the per-host rate limit is lifted, and
+    the disk response cache is off, so every iteration really fetches.
+    """
+
+    def __init__(self, fixtures: FixtureServer, repeat: int = 5, pages: Optional[List[str]] = None):
+        self.fixtures = fixtures
+        self.repeat = repeat
+        self.corpus = bench_corpus()
+        self.pages = pages or list(self.corpus)
+        self.http = HTTPClient(cache=None)
+        self.api_url = fixtures.url("/w/api.php")
+        mcps = self._mcps()
+        self.webscraping = mcps["webscraping"]
+        self.research = mcps["research"]
+
+    def _mcps(self) -> Dict[str, Any]:
+        return local_mcps(self.http, self.api_url)
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Run every benchmark; returns results by benchmark name"""
+        results: Dict[str, Dict[str, Any]] = {}
+        for name in self.pages:
+            results[f"scrape_website.{name}"] = self.bench_scrape(name)
+        results["research.cold"] = self.bench_research(cached=False)
+        results["research.cached"] = self.bench_research(cached=True)
+        results["update_context.webscraping.short"] = self.bench_update_context(self.webscraping, SHORT_ANSWER)
+        results["update_context.webscraping.long"] = self.bench_update_context(self.webscraping, LONG_ANSWER)
+        results["update_context.research.short"] = self.bench_update_context(self.research, RESEARCH_ANSWER)
+        results["process_request.webscraping"] = self.bench_process_request(
+            f"Scrape {self.fixtures.url('/small')} for product prices", SHORT_ANSWER)
+        results["process_request.research"] = self.bench_process_request(RESEARCH_REQUEST, RESEARCH_ANSWER)
+        results["server.process_request.webscraping"] = self.bench_server_process_request(
+            f"Scrape {self.fixtures.url('/small')} for product prices", SHORT_ANSWER)
+        return results
+
+    def bench_scrape(self, name: str) -> Dict[str, Any]:
+        """_scrape_website on one corpus page"""
+        url = self.fixtures.url(f"/{name}")
+        context = self.webscraping.new_context()
+        context["elements_to_extract"] = list(ELEMENTS)
+        size = len(self.corpus[name].encode("utf-8"))
+        return measure(lambda i: self.webscraping._scrape_website(url, context), self.repeat, size)
+
+    def bench_research(self, cached: bool) -> Dict[str, Any]:
+        """_get_research_information, on fresh queries or on one query the search cache already holds"""
+        context = self.research.new_context()
+        context["depth"] = "advanced"
+        if cached:
+            return measure(lambda i: self.research._get_research_information("quantum computing", context),
+                           self.repeat)
+        return measure(lambda i: self.research._get_research_information(f"quantum computing {i}", context),
+                       self.repeat)
+
+    def bench_update_context(self, mcp: Any, answer: str) -> Dict[str, Any]:
+        """_update_context on one turn (CPU only, so it is repeated 100x as often)"""
+        # Each iteration's answer differs so the per-turn analysis cache cannot serve it
+        context = mcp.new_context()
+        return measure(lambda i: mcp._update_context(SHORT_REQUEST, f"{answer} #{i}", context), self.repeat * 100)
+
+    def bench_process_request(self, request: str, answer: str) -> Dict[str, Any]:
+        """mcp_server.MCPServer.process_request end to end, with a scripted answer"""
+        core = mcp_server.MCPServer(mcps=self._mcps())
+        with scripted_input(answer):
+            return measure(lambda i: core.process_request(f"{request} (part {i})", session_id=f"bench-{i}"),
+                           self.repeat)
+
+    def bench_server_process_request(self, request: str, answer: str) -> Dict[str, Any]:
+        """server.MCPServer.process_request end to end, with a scripted answer"""
+        repl = server.MCPServer(mcps=self._mcps())
+        repl.set_current_mcp("webscraping")
+        with scripted_input(answer):
+            return measure(lambda i: repl.process_request(f"{request} (part {i})", session_id=f"bench-{i}"),
+                           self.repeat)
+
+    def close(self) -> None:
+        self.http.close()
+
+
+def run_suite(repeat: int = 5, pages: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Start the fixture server and run the suite
+
+    Args:
+        repeat: Timed iterations per benchmark
+        pages: Corpus pages to scrape (defaults to all of them)
+
+    Returns:
+        Run metadata and the results by benchmark name
+    """
+    with FixtureServer(fixture_routes()) as fixtures:
+        suite = BenchmarkSuite(fixtures, repeat=repeat, pages=pages)
+        try:
+            results = suite.run()
+        finally:
+            suite.close()
+    return {
+        "suite_version": SUITE_VERSION,
+        "corpus_version": CORPUS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cores": os.cpu_count(),
+        "repeat": repeat,
+        "results": results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25) -> List[str]:
+    """
+    Benchmarks whose median latency regressed against a baseline run
+
+    Runs of different suite or corpus versions measure different things and
+    are not compared.
+
+    Args:
+        current: This run's results
+        baseline: A previous run's results
+        tolerance: Allowed slowdown as a fraction of the baseline median
+
+    Returns:
+        One line per regression
+    """
+    for key in ("suite_version", "corpus_version"):
+        if current.get(key) != baseline.get(key):
+            raise ValueError(f"Cannot compare runs with different {key}: "
+                             f"{baseline.get(key)} (baseline) vs {current.get(key)}")
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before and result["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {before['p50_ms']:.2f} ms -> {result['p50_ms']:.2f} ms "
+                               f"(+{(result['p50_ms'] / before['p50_ms'] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    """Run the benchmark suite"""
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed iterations per benchmark")
+    parser.add_argument("--pages", nargs="+", choices=sorted(bench_corpus()), help="Corpus pages to scrape")
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file")
+    parser.add_argument("--baseline", help="Previous results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown before failing")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    # The server modules configure INFO logging when imported
+    logging.getLogger().setLevel(logging.WARNING)
+    run = run_suite(args.repeat, args.pages)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+
+    if args.json:
+        print(json.dumps(run, indent=2))
+    else:
+        print(f"=== Benchmark suite v{SUITE_VERSION} (corpus v{CORPUS_VERSION}, {args.repeat} iterations) ===")
+        print(f"{'benchmark':<38}{'p50':>10}{'p95':>10}{'p99':>10}{'ops/s':>10}{'MB/s':>8}  (ms)")
+        for name, result in run["results"].items():
+            mb = f"{result['mb_per_sec']:8.1f}" if "mb_per_sec" in result else f"{'':8}"
+            print(f"{name:<38}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                  f"{result['ops_per_sec']:>10.1f}{mb}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(run, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Concurrency Helpers
+Bounded, host-aware fan-out used when the MCPs fetch several URLs at once,
+and single-flight coalescing of identical requests made at the same time.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Hashable, Iterator, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+from metrics import METRICS
+
+logger = logging.getLogger("Concurrency")
+
+T = TypeVar("T")
+
+
+class HostLimiter:
+    """
+    Per-host concurrency cap
+    Hands out one semaphore per host so no single site gets more than
+    `per_host` simultaneous requests, however large the global pool is.
+    """
+
+    def __init__(self, per_host: int = 2):
+        self.per_host = per_host
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return semaphore
+
+    @contextmanager
+    def limit(self, url: str) -> Iterator[None]:
+        """Hold one of the URL host's slots for the duration of the block"""
+        semaphore = self._semaphore(urlparse(url).netloc.lower())
+        with semaphore:
+            yield
+
+
+def interleave_by_host(urls: List[str]) -> List[int]:
+    """
+    Indexes of the URLs ordered round-robin across their hosts
+
+    Submitting work in this order keeps every host's first requests ahead of
+    any host's later ones, so workers spread over all hosts instead of
+    queueing behind one host's rate limit while the others sit idle.
+    """
+    by_host: Dict[str, List[int]] = {}
+    for index, url in enumerate(urls):
+        by_host.setdefault(urlparse(url).netloc.lower(), []).append(index)
+    order = []
+    for turn in range(max((len(indexes) for indexes in by_host.values()), default=0)):
+        for indexes in by_host.values():
+            if turn < len(indexes):
+                order.append(indexes[turn])
+    return order
+
+
+def bounded_map(fn: Callable[[str], Any], urls: List[str],
+                max_workers: int = 8,
+                host_limiter: Optional[HostLimiter] = None) -> List[Tuple[str, Any, Optional[str]]]:
+    """
+    Run fn over every URL with a global and a per-host concurrency cap
+
+    Args:
+        fn: Callable applied to each URL
+        urls: The URLs to process
+        max_workers: Global cap on simultaneous calls
+        host_limiter: Per-host cap (defaults to 2 per host)
+
+    Returns:
+        One (url, result, error) tuple per URL, in input order. Exactly one of
+        result or error is set for each entry. Work is started round-robin
+        across hosts (see interleave_by_host).
+    """
+    host_limiter = host_limiter or HostLimiter()
+
+    def run(url: str) -> Tuple[str, Any, Optional[str]]:
+        try:
+            with host_limiter.limit(url):
+                return url, fn(url), None
+        except Exception as e:
+            logger.error(f"Error processing {url}: {str(e)}")
+            return url, None, str(e)
+
+    if not urls:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as pool:
+        futures = {index: pool.submit(run, urls[index]) for index in interleave_by_host(urls)}
+        return [futures[index].result() for index in range(len(urls))]
+
+
+class SingleFlight:
+    """
+    In-flight request coalescing
+
+    The first caller for a key runs the work; callers arriving with the same
+    key while it runs wait for it and get the same result (or exception)
+    instead of repeating it. Nothing is kept once the flight lands, so this
+    sits in front of caches rather than replacing them.
+
+    The leader's work should bound itself (timeouts, deadlines); a follower
+    with a budget of its own passes it as do()'s timeout.
+    """
+
+    def __init__(self, group: str):
+        """
+        Initialize the coalescer
+
+        Args:
+            group: Name the fan-in is reported under in METRICS
+        """
+        self.group = group
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "flights": 0, "shared": 0}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """The key's flight, and whether this caller has to run it"""
+        with self._lock:
+            self.counters["calls"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self.counters["flights"] += 1
+            else:
+                self.counters["shared"] += 1
+        METRICS.coalesced(self.group, shared=not leader)
+        return flight, leader
+
+    def _fly(self, key: Hashable, flight: Future, fn: Callable[[], T]) -> None:
+        """Run the work and land the flight; callers arriving afterwards start a new one"""
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._flights[key]
+            flight.set_exception(e)
+        else:
+            with self._lock:
+                del self._flights[key]
+            flight.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """
+        Run fn(), or wait for the identical call already running
+
+        Args:
+            key: What makes two calls identical (a normalized URL or query, say)
+            fn: The work, run in the calling thread when this caller leads
+            timeout: Maximum seconds a follower waits for the leader's result
+
+        Returns:
+            The result of the one fn() run for the key
+
+        Raises:
+            concurrent.futures.TimeoutError: If a follower's wait timed out (the flight runs on)
+        """
+        flight, leader = self._join(key)
+        if leader:
+            self._fly(key, flight, fn)
+        return flight.result(timeout=timeout)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Like do(), for asyncio code; blocking work runs on the loop's default executor
+
+        Tasks and threads asking for the same key share one flight, and waiting
+        for it never blocks the event loop.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(None, self._fly, key, flight, fn)
+        return await asyncio.wrap_future(flight)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls, flights = self.counters["calls"], self.counters["flights"]
+            return dict(self.counters, in_flight=len(self._flights), fan_in=calls / flights if flights else 0.0)
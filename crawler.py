@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Pagination Crawler Module
+Follows next-page links from the URLs a user asked about, extracting each
+page as it arrives, within page, depth and byte budgets.
+"""
+
+import hashlib
+import logging
+import math
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlsplit, urlunsplit
+
+import soupsieve
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger("Crawler")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Links inside the usual pagination widgets of blogs, shops and forums
+PAGINATION_LINKS = soupsieve.compile(
+    ".pagination a[href], .pager a[href], .page-numbers a[href], .paging a[href], "
+    "nav[aria-label*=pagination i] a[href], li.next a[href], a.next[href], a.next_page[href]"
+)
+
+# Anchor texts (lowercased, stripped) that mean "the next page" ("more" is left
+# out: it usually means "read more" of an article)
+NEXT_TEXTS = frozenset(["next", "next page", "next »", "next ›", "next >", "»", "›", ">", "older posts"])
+
+# Page numbers in query strings (?page=3) and paths (/page/3)
+PAGE_NUMBER = re.compile(r"(?:[?&](?:page|pg|pagenum|page_num)=|/page/)(\d+)", re.IGNORECASE)
+
+# ?p=3 is also how WordPress links to post 3, so it only counts as a page
+# number on links already known to paginate (rel="next", pagination widgets)
+SHORT_PAGE_NUMBER = re.compile(r"[?&]p=(\d+)", re.IGNORECASE)
+
+
+def normalize_url(url: str) -> str:
+    """
+    The form of a URL used to recognize pages already seen
+
+    Lowercases the scheme and host, drops default ports, fragments and user
+    info, gives an empty path "/" and sorts the query parameters.
+
+    Args:
+        url: An absolute URL
+
+    Returns:
+        The normalized URL
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def page_number(url: str, paginating: bool = False) -> Optional[int]:
+    """The page number a URL names, if any (`paginating` also accepts ?p=N, for links known to paginate)"""
+    match = PAGE_NUMBER.search(url) or (SHORT_PAGE_NUMBER.search(url) if paginating else None)
+    return int(match.group(1)) if match else None
+
+
+def find_pagination_links(soup: BeautifulSoup, base_url: str) -> List[str]:
+    """
+    Find the links that continue a paginated listing
+
+    Looks, in priority order, for rel="next" links, anchors inside common
+    pagination widgets or labeled "next", and numbered-page links. Only
+    links on the same host that point past the current page are returned.
+
+    Args:
+        soup: The parsed page
+        base_url: The page's URL, for resolving relative links
+
+    Returns:
+        Absolute URLs without fragments, deduplicated, best candidates first
+    """
+    host = urlsplit(base_url).netloc.lower()
+    current = normalize_url(base_url)
+    current_number = page_number(base_url, paginating=True) or 1
+    # (tag, labeled as the next page, known to paginate)
+    candidates: List[Tuple[Any, bool, bool]] = []
+
+    for tag in soup.find_all(["link", "a"], rel="next", href=True):
+        candidates.append((tag, True, True))
+    for tag in soup.find_all("a", href=True):
+        label = (tag.get("aria-label") or "").lower()
+        explicit = "next" in label or tag.get_text(" ", strip=True).lower() in NEXT_TEXTS
+        paginating = explicit or PAGINATION_LINKS.match(tag)
+        if paginating or page_number(tag["href"]) is not None:
+            candidates.append((tag, explicit, paginating))
+
+    links: Dict[str, str] = {}
+    for tag, explicit, paginating in candidates:
+        url = urldefrag(urljoin(base_url, tag["href"].strip()))[0]
+        if urlsplit(url).scheme not in DEFAULT_PORTS or urlsplit(url).netloc.lower() != host:
+            continue
+        number = page_number(url, paginating)
+        if not explicit and number is not None and number <= current_number:
+            continue  # "previous" and "first page" links
+        key = normalize_url(url)
+        if key != current:
+            links.setdefault(key, url)
+    return list(links.values())
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set of strings
+
+    Uses a few bits per URL however long the URLs are. A false positive
+    means a page is taken for seen and skipped; there are no false negatives,
+    so no page is ever fetched twice.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Size the filter
+
+        Args:
+            capacity: Number of items the error rate is guaranteed for
+            error_rate: False positive probability at capacity
+        """
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> bool:
+        """Add an item; returns False if it was (probably) already present"""
+        added = False
+        for position in self._positions(item):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & mask:
+                self._bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class CrawlLimits(NamedTuple):
+    """Budgets for one crawl"""
+    max_pages: int = 10
+    max_depth: int = 10
+    max_bytes: int = 20 * 1024 * 1024
+    max_frontier: int = 1000
+
+
+class CrawledPage(NamedTuple):
+    """One crawled page; exactly one of data or error is set"""
+    url: str
+    depth: int
+    order: int
+    data: Optional[Dict[str, Any]]
+    error: Optional[str]
+    size: int
+
+
+class Crawler:
+    """
+    Bounded-concurrency pagination crawler
+
+    Pages discovered from finished pages go into a FIFO frontier (bounded by
+    `max_frontier`); up to `max_workers` of them are loaded at once, and
+    each page's extracted data is yielded as soon as it completes. URLs are
+    normalized and remembered in a Bloom filter so no page is loaded twice.
+    """
+
+    def __init__(self, load: Callable[[str], Tuple[BeautifulSoup, str, int]],
+                 extract: Callable[[BeautifulSoup], Dict[str, Any]],
+                 limits: Optional[CrawlLimits] = None, max_workers: int = 4):
+        """
+        Initialize the crawler
+
+        Args:
+            load: Fetches and parses a URL; returns (soup, final URL, bytes downloaded)
+            extract: Extracts the data of a parsed page
+            limits: Page, depth, byte and frontier budgets
+            max_workers: Pages loaded at the same time
+        """
+        self.load = load
+        self.extract = extract
+        self.limits = limits or CrawlLimits()
+        self.max_workers = max_workers
+        self.counters = {"pages": 0, "failed": 0, "bytes": 0, "duplicates": 0, "dropped": 0}
+
+    def _visit(self, url: str) -> Tuple[Dict[str, Any], List[str], int, str]:
+        soup, final_url, size = self.load(url)
+        return self.extract(soup), find_pagination_links(soup, final_url), size, final_url
+
+    def crawl(self, start_urls: Iterable[str]) -> Iterator[CrawledPage]:
+        """
+        Crawl from the start URLs, following pagination
+
+        Args:
+            start_urls: The first pages (depth 0)
+
+        Yields:
+            Each page as it completes, in completion order; `order` gives
+            the order pages were discovered in
+        """
+        limits = self.limits
+        seen = BloomFilter(max(1024, limits.max_frontier + limits.max_pages * 8))
+        frontier: Deque[Tuple[str, int, int]] = deque()
+        discovered = 0
+
+        def enqueue(url: str, depth: int) -> None:
+            nonlocal discovered
+            if not seen.add(normalize_url(url)):
+                self.counters["duplicates"] += 1
+            elif len(frontier) >= limits.max_frontier:
+                self.counters["dropped"] += 1
+            else:
+                frontier.append((url, depth, discovered))
+                discovered += 1
+
+        for url in start_urls:
+            enqueue(url, 0)
+
+        started = 0
+        running: Dict[Future, Tuple[str, int, int]] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawl") as pool:
+            try:
+                while True:
+                    while (frontier and len(running) < self.max_workers and started < limits.max_pages
+                           and self.counters["bytes"] < limits.max_bytes):
+                        url, depth, order = frontier.popleft()
+                        running[pool.submit(self._visit, url)] = (url, depth, order)
+                        started += 1
+                    if not running:
+                        break
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url, depth, order = running.pop(future)
+                        try:
+                            data, links, size, final_url = future.result()
+                        except Exception as e:
+                            logger.error(f"Error crawling {url}: {str(e)}")
+                            self.counters["failed"] += 1
+                            yield CrawledPage(url, depth, order, None, str(e), 0)
+                            continue
+
+                        self.counters["pages"] += 1
+                        self.counters["bytes"] += size
+                        seen.add(normalize_url(final_url))
+                        if depth < limits.max_depth:
+                            for link in links:
+                                enqueue(link, depth + 1)
+                        yield CrawledPage(url, depth, order, data, None, size)
+            finally:
+                # The consumer may stop early; pages not started yet are abandoned
+                for future in running:
+                    future.cancel()
+
+        logger.info(f"Crawl finished: {self.counters}")
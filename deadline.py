@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Deadline Module
+One time budget per turn, handed from generate_response through fetch,
+parse, extract and format so each stage can stop early and return what it
+has instead of running past the budget.
+"""
+
+import math
+import time
+from typing import Any, Callable, Optional
+
+import requests
+
+# When the budget is gone by the time a page is parsed, only this much of it
+# is parsed: enough for the title and the first headings
+PARTIAL_PARSE_BYTES = 64 * 1024
+
+# Nodes an extraction walk always covers, even past the deadline, so the
+# title and first headings of a page are never lost to it
+PARTIAL_EXTRACT_NODES = 2048
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a turn's time budget ran out before a stage could start"""
+
+
+class Deadline:
+    """
+    A turn's time budget
+
+    Stages check `remaining()` (or `expired()`) and cap their own waits with
+    it. A stage that stops early calls `cut_short(stage)`, so the response
+    can say its results are partial and where the budget ran out.
+    """
+
+    __slots__ = ("budget", "expires_at", "clock", "cut_short_in")
+
+    def __init__(self, budget: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Start the clock
+
+        Args:
+            budget: Seconds the turn may take (None for no limit)
+            clock: Monotonic time source
+        """
+        self.budget = budget
+        self.clock = clock
+        self.expires_at = math.inf if budget is None else clock() + budget
+        self.cut_short_in: Optional[str] = None
+
+    def remaining(self) -> float:
+        """Seconds left (math.inf without a budget, never negative)"""
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self) -> bool:
+        return self.clock() >= self.expires_at
+
+    def wait_timeout(self) -> Optional[float]:
+        """The remaining budget as a Future/Event wait timeout (None without a budget)"""
+        return None if self.expires_at == math.inf else self.remaining()
+
+    def cap(self, timeout: Any) -> Any:
+        """Shorten a requests timeout (seconds or a (connect, read) pair) to the remaining budget"""
+        if self.expires_at == math.inf:
+            return timeout
+        remaining = max(self.remaining(), 0.001)
+        if isinstance(timeout, tuple):
+            return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def check(self, stage: str) -> None:
+        """
+        Make sure a stage can still start
+
+        Raises:
+            DeadlineExceeded: If the budget has run out
+        """
+        if self.expired():
+            self.cut_short(stage)
+            budget = "Time budget" if self.budget is None else f"Time budget of {self.budget:g}s"
+            raise DeadlineExceeded(f"{budget} ran out before {stage}")
+
+    def tighten(self, expires_at: float) -> None:
+        """Move the expiry up to `expires_at` if that is sooner (e.g. to a turn's, for work started before it)"""
+        self.expires_at = min(self.expires_at, expires_at)
+
+    def derive(self) -> "Deadline":
+        """
+        A deadline expiring with this one that records its own cut-short stage
+
+        Work shared with other turns runs under one, so each turn can tell
+        whether that work (and not something else it did) was cut short.
+        """
+        derived = Deadline(self.budget, self.clock)
+        derived.expires_at = self.expires_at
+        return derived
+
+    def cut_short(self, stage: str) -> None:
+        """Record that a stage stopped early because of the budget (the first such stage is kept)"""
+        if self.cut_short_in is None:
+            self.cut_short_in = stage
+
+    @property
+    def partial(self) -> bool:
+        """Whether any stage was cut short"""
+        return self.cut_short_in is not None
+
+    def __repr__(self) -> str:
+        return f"Deadline(budget={self.budget}, remaining={self.remaining():.3f})"
+
+
+def cap_timeout(deadline: Optional[Deadline], timeout: Any) -> Any:
+    """A requests timeout shortened to the deadline, if there is one"""
+    return timeout if deadline is None else deadline.cap(timeout)
+
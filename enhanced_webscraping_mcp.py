@@ -5,52 +5,139 @@ Handles webscraping-related context and interactions with actual web scraping fu
 """
 
 import logging
-import re
 import json
+import time
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeout
 import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 
+from concurrency import HostLimiter, SingleFlight, bounded_map
+from crawler import CrawledPage, Crawler, CrawlLimits, normalize_url
+from deadline import PARTIAL_PARSE_BYTES, Deadline, DeadlineExceeded
+from extraction import ExtractionPlan, compile_plan
+from html_parsers import parse_html, select_backend
+from http_client import FetchedPage, HTTPClient, get_default_client
+from metrics import METRICS
+from parse_pool import ParsePool
+from politeness import PolitenessScheduler
+from prefetch import Prefetcher
+from request_analysis import analyze, analyze_turn
+from resilience import Resilience
+from scrape_scheduler import INTERVALS, JobStore, ScrapeJob, job_id_for, next_run_time
+
 logger = logging.getLogger("WebscrapingMCP")
 
+
 class WebscrapingMCP:
     """
     Webscraping Model Context Protocol
     Manages context for webscraping-related queries and responses.
     """
     
-    def __init__(self):
-        self.context = {
+    def __init__(self, http_client: Optional[HTTPClient] = None,
+                 max_concurrency: int = 8, per_host_concurrency: int = 2,
+                 parser_backend: Optional[str] = None,
+                 max_page_bytes: Optional[int] = 5 * 1024 * 1024,
+                 partial_parsing: bool = True,
+                 prefetcher: Optional[Prefetcher] = None,
+                 politeness: Optional[PolitenessScheduler] = None,
+                 crawl_limits: Optional[CrawlLimits] = None,
+                 job_store: Optional[JobStore] = None,
+                 parse_pool: Optional[ParsePool] = None,
+                 resilience: Optional[Resilience] = None,
+                 turn_budget: Optional[float] = 30.0,
+                 single_flight: Optional[SingleFlight] = None):
+        """
+        Initialize the Webscraping MCP
+
+        Args:
+            http_client: Shared pooled HTTP client (defaults to the process-wide client)
+            max_concurrency: Maximum number of URLs scraped at the same time
+            per_host_concurrency: Maximum simultaneous requests to any one host
+            parser_backend: HTML parser to use (defaults to the fastest installed one)
+            max_page_bytes: Download budget per page (None for no limit)
+            partial_parsing: Stream pages, stop once the extraction plan is satisfied and
+                parse only the tags the plan can use
+            prefetcher: Background runner used to fetch pages while the user answers
+            politeness: Per-host rate limits, robots.txt and Retry-After handling for page
+                fetches (defaults to a scheduler with default limits on the same client)
+            crawl_limits: Page, depth and byte budgets for following pagination
+            job_store: Where recurring scrapes are recorded for the scrape scheduler
+                (without one, a requested frequency is only reported)
+            parse_pool: Worker processes that parse and extract fetched pages (without
+                one, pages are parsed on the fetching thread)
+            resilience: Retries, hedging and per-host circuit breakers for page fetches
+                (defaults to the default ResiliencePolicy)
+            turn_budget: Seconds generate_response may spend fetching, parsing and
+                extracting before it answers with what it has (None for no limit)
+            single_flight: Coalesces identical scrapes (same page, same elements) running
+                at the same time into one fetch
+        """
+        self.http = http_client or get_default_client()
+        self.parser_backend = select_backend(parser_backend)
+        self.max_page_bytes = max_page_bytes
+        self.partial_parsing = partial_parsing
+        self.prefetcher = prefetcher or Prefetcher()
+        self.politeness = politeness or PolitenessScheduler(self.http)
+        self.crawl_limits = crawl_limits or CrawlLimits()
+        self.job_store = job_store
+        self.parse_pool = parse_pool
+        self.resilience = resilience or Resilience()
+        self.turn_budget = turn_budget
+        self.single_flight = single_flight or SingleFlight("page")
+        self.max_concurrency = max_concurrency
+        self.host_limiter = HostLimiter(per_host_concurrency)
+        self.context = self.new_context()
+        logger.info("Webscraping MCP initialized")
+    
+    def new_context(self) -> Dict[str, Any]:
+        """Return the starting context for a new conversation"""
+        return {
             "target_urls": [],
             "data_format": "json",
             "elements_to_extract": [],
             "pagination": False,
-            "frequency": "once"
+            "frequency": "once",
+            "conversation_id": uuid.uuid4().hex,
+            "prefetch_keys": []
         }
-        logger.info("Webscraping MCP initialized")
     
-    def generate_question(self, user_input: str) -> str:
+    def generate_question(self, user_input: str, context: Optional[Dict[str, Any]] = None,
+                          prefetch: bool = True) -> str:
         """
         Generate a clarifying question based on the user's webscraping request
         
         Args:
             user_input: The initial user request
+            context: Session context to use (defaults to this MCP's own context)
+            prefetch: Start work speculatively while the user answers (off when the
+                answer is already known, as in batch runs)
             
         Returns:
             A question to ask the user for more context
         """
+        context = self.context if context is None else context
+
+        # Start fetching any URLs we already know about while the user answers
+        if prefetch:
+            self.start_prefetch(user_input, context)
+        
+        analysis = analyze(user_input)
+        hits = analysis.hits
+        
         # Check if URL is provided
-        url_pattern = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')
-        if not url_pattern.search(user_input) and "url" not in user_input.lower():
+        if not analysis.urls and not hits.has("scrape_question", "url"):
             return "What specific website or URL would you like to scrape data from?"
         
         # Check for data elements
-        if "extract" not in user_input.lower() and "scrape" in user_input.lower():
+        if not hits.has("scrape_question", "extract") and hits.has("scrape_question", "scrape"):
             return "What specific elements or data would you like to extract from the website? (e.g., product prices, article titles, images)"
         
         # Check for data format preference
-        if "format" not in user_input.lower() and "output" not in user_input.lower():
+        if not hits.has("scrape_question", "format"):
             return "In what format would you like the scraped data? (e.g., JSON, CSV, plain text)"
         
         # Default questions based on common webscraping needs
@@ -66,235 +153,501 @@ class WebscrapingMCP:
         question_index = len(user_input) % len(questions)
         return questions[question_index]
     
-    def generate_response(self, original_request: str, user_answer: str) -> str:
+    def generate_response(self, original_request: str, user_answer: str, context: Optional[Dict[str, Any]] = None,
+                          deadline: Optional[Deadline] = None) -> str:
         """
         Generate a webscraping response based on the original request and the user's answer
         
         Args:
             original_request: The initial user request
             user_answer: The user's answer to the clarifying question
+            context: Session context to use (defaults to this MCP's own context)
+            deadline: Time budget for the whole response (defaults to turn_budget from now)
             
         Returns:
             A webscraping response with actual scraped data
         """
+        context = self.context if context is None else context
+        deadline = deadline or Deadline(self.turn_budget)
+
         # Update context based on user's answer
-        self._update_context(original_request, user_answer)
+        self._update_context(original_request, user_answer, context)
         
-        # Extract URL if present in either the original request or the answer
-        url_pattern = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')        
-        url_match = url_pattern.search(original_request) or url_pattern.search(user_answer)
+        # Every URL found in the original request or the answer, in order of appearance
+        turn = analyze_turn(original_request, user_answer)
+        urls = list(turn.urls)
+        
+        # Prefetched pages the answer made irrelevant are cancelled; the rest are picked up by _scrape_data
+        for key in context["prefetch_keys"]:
+            if key[-1] not in urls:
+                self.prefetcher.cancel(key)
+        context["prefetch_keys"] = []
         
         # If no URL is found, provide a generic response
-        if not url_match:
+        if not urls:
             return "I couldn't find a valid URL to scrape. Please provide a specific website URL."
         
-        url = url_match.group(0)
-        logger.info(f"Attempting to scrape data from URL: {url}")
-        
-        # Attempt to scrape the actual website
-        scraped_data = self._scrape_website(url)
-        
-        # Generate a response with the actual scraped data
-        response = f"Based on your request to scrape data from {url}, I've retrieved the following information:\n\n"
-        
-        # Add the scraped data to the response
-        response += "**Scraped Data**:\n"
-        response += scraped_data + "\n\n"
+        if context["pagination"]:
+            logger.info(f"Crawling pagination from {len(urls)} URL(s)")
+            
+            # Pages stream in as they complete; the response lists them in the order they were found
+            pages = sorted(self.crawl(urls, context, deadline), key=lambda page: page.order)
+            response = (f"Based on your request to scrape data from {', '.join(urls)}, I followed the pagination "
+                        f"and retrieved the following information from {len(pages)} pages:\n\n")
+            for page in pages:
+                response += f"**Scraped Data** ({page.url}):\n"
+                response += (f"Error: {page.error}" if page.error else self._format_data(page.data, context)) + "\n\n"
+        elif len(urls) == 1:
+            url = urls[0]
+            logger.info(f"Attempting to scrape data from URL: {url}")
+            
+            # Attempt to scrape the actual website
+            scraped_data = self._scrape_website(url, context, deadline)
+            
+            # Generate a response with the actual scraped data
+            response = f"Based on your request to scrape data from {url}, I've retrieved the following information:\n\n"
+            
+            # Add the scraped data to the response
+            response += "**Scraped Data**:\n"
+            response += scraped_data + "\n\n"
+        else:
+            logger.info(f"Attempting to scrape data from {len(urls)} URLs concurrently")
+            
+            # Scrape all target URLs in parallel; results come back in request order
+            response = f"Based on your request to scrape data from {len(urls)} URLs, I've retrieved the following information:\n\n"
+            for url, scraped_data in self._scrape_many(urls, context, deadline):
+                response += f"**Scraped Data** ({url}):\n"
+                response += scraped_data + "\n\n"
         
         # Provide information about the approach used
         response += "**Web Scraping Approach Used**:\n"
         
         # Determine the appropriate library based on the complexity
-        if self.context["pagination"] or "login" in user_answer.lower() or "authenticate" in user_answer.lower():
-            response += "- Used Selenium with a headless browser"
-            if "login" in user_answer.lower() or "authenticate" in user_answer.lower():
-                response += " with authentication handling"
-            if self.context["pagination"]:
-                response += " and pagination support"
-            response += "\n"
+        needs_login = turn.answer.hits.has("auth", "login")
+        if needs_login:
+            response += "- Used Selenium with a headless browser with authentication handling\n"
         else:
             response += "- Used Requests library with BeautifulSoup for HTML parsing\n"
+        if context["pagination"]:
+            response += ("- Followed next-page links (rel=\"next\", pagination links and numbered pages), "
+                         f"up to {self.crawl_limits.max_pages} pages\n")
         
         # Data extraction strategy
-        if self.context["elements_to_extract"]:
-            elements = ", ".join(self.context["elements_to_extract"])
+        if context["elements_to_extract"]:
+            elements = ", ".join(context["elements_to_extract"])
             response += f"- Targeted elements for extraction: {elements}\n"
         else:
             response += "- Extracted general content based on common HTML patterns\n"
         
         # Data format
-        response += f"- Data format: {self.context['data_format'].upper()}\n"
+        response += f"- Data format: {context['data_format'].upper()}\n"
+        
+        if deadline.partial:
+            response += (f"- The {deadline.budget:g}s time budget ran out during {deadline.cut_short_in}; "
+                         "the results above are what was found until then\n")
         
         # Scheduling if applicable
-        if self.context["frequency"] != "once":
-            response += f"- Scraping frequency: {self.context['frequency']}\n"
+        if context["frequency"] != "once":
+            response += f"- Scraping frequency: {context['frequency']}\n"
+            jobs = self.schedule(urls, context)
+            if jobs:
+                response += (f"- Scheduled {len(jobs)} recurring scrape(s) ({', '.join(job.job_id for job in jobs)}); "
+                             "runs whose extracted data has not changed are not reported again\n")
         
         # Legal and ethical considerations
         response += "\n**Important Considerations**:\n"
-        response += "- Always check the website's robots.txt file and terms of service before scraping.\n"
-        response += "- Implement rate limiting to avoid overloading the server.\n"
+        response += "- Pages were fetched only where the website's robots.txt allows it, honoring its Crawl-delay.\n"
+        response += "- Requests were rate limited per host and paused whenever the server asked us to back off.\n"
+        response += "- Check the website's terms of service before scraping it regularly.\n"
         response += "- Consider using an API if one is available instead of scraping.\n"
         
         return response
     
-    def _update_context(self, original_request: str, user_answer: str) -> None:
+    def start_prefetch(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Speculatively download the URLs in a request before the user answers
+        
+        Args:
+            user_input: The initial user request
+            context: Session context to use (defaults to this MCP's own context)
+        """
+        context = self.context if context is None else context
+
+        keys = []
+        for url in analyze(user_input).urls[:self.max_concurrency]:
+            key = ("page", context["conversation_id"], url)
+            deadline = Deadline()  # Tightened to the turn's once generate_response claims the page
+            self.prefetcher.submit(key, lambda cancelled, url=url, deadline=deadline:
+                                   self._prefetch_page(url, cancelled, deadline), deadline)
+            keys.append(key)
+        context["prefetch_keys"] = keys
+
+    def _prefetch_page(self, url: str, cancelled: Any, deadline: Deadline) -> Optional[FetchedPage]:
+        """
+        Download a page in the background
+        
+        The extraction plan is not known until the user answers, so the page
+        (up to the byte budget) is only downloaded here; it is parsed with the
+        plan's strainer once the answer is in.
+        
+        Args:
+            url: The URL to prefetch
+            cancelled: Event set when the prefetch no longer applies
+            deadline: Unlimited until the turn claiming the page tightens it to its own,
+                which then cuts a slow download off with what has arrived
+            
+        Returns:
+            The downloaded page, or None if the prefetch was cancelled
+        """
+        page = self.fetch_page(url, deadline, until=lambda chunk: cancelled.is_set())
+        page.raise_for_status()
+        if cancelled.is_set():
+            return None
+        return page
+
+    def fetch_page(self, url: str, deadline: Optional[Deadline] = None, **kwargs) -> FetchedPage:
+        """
+        Fetch a page politely, with this MCP's retries, hedging and circuit breaker
+
+        Args:
+            url: The URL to fetch
+            deadline: The turn's time budget
+            **kwargs: Passed on to HTTPClient.fetch (a stateless `until`, for example)
+
+        Returns:
+            The fetched page
+
+        Raises:
+            requests.exceptions.RequestException: If every attempt failed, robots.txt
+                disallows the URL or the host's circuit is open
+        """
+        kwargs.setdefault("max_bytes", self.max_page_bytes)
+        return self.resilience.call(
+            url, lambda: self.politeness.fetch(url, deadline=deadline, timeout=self.resilience.policy.timeout, **kwargs),
+            deadline)
+
+    def _update_context(self, original_request: str, user_answer: str, context: Optional[Dict[str, Any]] = None) -> None:
         """
         Update the internal context based on user interactions
         
         Args:
             original_request: The initial user request
             user_answer: The user's answer to the clarifying question
+            context: Session context to use (defaults to this MCP's own context)
         """
-        # Extract URLs
-        url_pattern = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')
-        urls = url_pattern.findall(original_request) + url_pattern.findall(user_answer)
-        if urls:
-            self.context["target_urls"] = list(set(urls))
+        context = self.context if context is None else context
+
+        # The turn is analyzed once; routing and the question stage already did the request's half
+        turn = analyze_turn(original_request, user_answer)
+        hits = turn.hits
         
-        # Update data format preference
-        format_keywords = {
-            "json": ["json", "javascript", "object", "notation"],
-            "csv": ["csv", "comma", "excel", "spreadsheet"],
-            "xml": ["xml", "extensible", "markup"],
-            "text": ["text", "plain", "txt"],
-            "html": ["html", "webpage", "page"]
-        }
+        # Extract URLs (deduplicated, keeping the order they were mentioned in)
+        if turn.urls:
+            context["target_urls"] = list(turn.urls)
         
-        combined_text = (original_request + " " + user_answer).lower()
-        for fmt, keywords in format_keywords.items():
-            if any(keyword in combined_text for keyword in keywords):
-                self.context["data_format"] = fmt
-                break
+        # Update data format preference
+        fmt = hits.first("format")
+        if fmt:
+            context["data_format"] = fmt
         
         # Extract elements to scrape
-        element_patterns = [
-            r"extract\s+([a-zA-Z\s,]+)",
-            r"scrape\s+([a-zA-Z\s,]+)",
-            r"get\s+([a-zA-Z\s,]+)",
-            r"collect\s+([a-zA-Z\s,]+)"
-        ]
-        
-        for pattern in element_patterns:
-            matches = re.search(pattern, combined_text)
-            if matches:
-                elements = matches.group(1).split(',')
-                elements = [e.strip() for e in elements if e.strip()]
-                if elements:
-                    self.context["elements_to_extract"] = elements
-                break
+        if turn.elements:
+            context["elements_to_extract"] = list(turn.elements)
         
         # Check for pagination
-        pagination_keywords = ["pagination", "multiple pages", "next page", "all pages"]
-        if any(keyword in combined_text for keyword in pagination_keywords):
-            self.context["pagination"] = True
+        if hits.any("pagination"):
+            context["pagination"] = True
         
         # Update frequency
-        frequency_mapping = {
-            "once": ["once", "one time", "single", "just once"],
-            "hourly": ["hourly", "every hour", "each hour"],
-            "daily": ["daily", "every day", "each day"],
-            "weekly": ["weekly", "every week", "each week"],
-            "monthly": ["monthly", "every month", "each month"]
-        }
-        
-        for freq, keywords in frequency_mapping.items():
-            if any(keyword in combined_text for keyword in keywords):
-                self.context["frequency"] = freq
-                break
+        frequency = hits.first("frequency")
+        if frequency:
+            context["frequency"] = frequency
                 
-        logger.debug(f"Updated webscraping context: {self.context}")
+        logger.debug(f"Updated webscraping context: {context}")
         
-    def _scrape_website(self, url: str) -> str:
+    def _scrape_website(self, url: str, context: Optional[Dict[str, Any]] = None,
+                        deadline: Optional[Deadline] = None) -> str:
         """
         Attempt to scrape data from the specified URL
         
         Args:
             url: The URL to scrape
+            context: Session context to use (defaults to this MCP's own context)
+            deadline: The turn's time budget
             
         Returns:
             A string containing the scraped data formatted according to the context
         """
+        context = self.context if context is None else context
+
         try:
-            # Set a user agent to avoid being blocked
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
+            return self._format_data(self._scrape_data(url, context, deadline), context)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error scraping website: {str(e)}")
+            return f"Error: {str(e)}"
+        except Exception as e:
+            logger.error(f"Unexpected error during scraping: {str(e)}")
+            return f"Unexpected error: {str(e)}"
+
+    def _scrape_many(self, urls: List[str], context: Optional[Dict[str, Any]] = None,
+                     deadline: Optional[Deadline] = None) -> List[Tuple[str, str]]:
+        """
+        Scrape several URLs concurrently
+        
+        Args:
+            urls: The URLs to scrape
+            context: Session context to use (defaults to this MCP's own context)
+            deadline: The turn's time budget; URLs not started before it passes report an error
+            
+        Returns:
+            (url, formatted data or error message) pairs in the same order as urls
+        """
+        context = self.context if context is None else context
+
+        results = bounded_map(lambda url: self._scrape_data(url, context, deadline), urls,
+                              max_workers=self.max_concurrency,
+                              host_limiter=self.host_limiter)
+        scraped = []
+        for url, data, error in results:
+            scraped.append((url, f"Error: {error}" if error else self._format_data(data, context)))
+        return scraped
+
+    def crawl(self, urls: List[str], context: Optional[Dict[str, Any]] = None,
+              deadline: Optional[Deadline] = None) -> Iterator[CrawledPage]:
+        """
+        Follow the pagination of each URL, extracting every page as it completes
+        
+        Args:
+            urls: The first pages to crawl
+            context: Session context to use (defaults to this MCP's own context)
+            deadline: The turn's time budget; pages not fetched before it passes report an error
             
-            # Make the request
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()  # Raise an exception for 4XX/5XX responses
+        Returns:
+            An iterator of crawled pages, in completion order, within this MCP's crawl limits
+        """
+        context = self.context if context is None else context
+
+        plan = compile_plan(tuple(context["elements_to_extract"]))
+
+        def extract(soup: BeautifulSoup) -> Dict[str, Any]:
+            with METRICS.time("extract"):
+                return plan.run(soup, deadline)
+
+        crawler = Crawler(lambda url: self._load_page(url, context, deadline), extract,
+                          limits=self.crawl_limits, max_workers=self.max_concurrency)
+        return crawler.crawl(urls)
+
+    def _load_page(self, url: str, context: Dict[str, Any],
+                   deadline: Optional[Deadline] = None) -> Tuple[BeautifulSoup, str, int]:
+        """
+        Fetch and fully parse one page of a crawl
+        
+        The whole page (up to the byte budget) is parsed, since the links to
+        the next page are usually at the bottom.
+        
+        Returns:
+            The parsed page, its final URL and the bytes downloaded
+        """
+        page = self.prefetcher.take(("page", context["conversation_id"], url), deadline=deadline)
+        if page is not None:
+            logger.info(f"Using prefetched page for {url}")
+        else:
+            with METRICS.time("fetch"):
+                page = self.fetch_page(url, deadline)
+            page.raise_for_status()
+        with METRICS.time("parse"):
+            soup = parse_html(self._parse_budget(page.content, deadline), self.parser_backend, encoding=page.encoding)
+        return soup, page.url, len(page.content)
+
+    def schedule(self, urls: List[str], context: Optional[Dict[str, Any]] = None) -> List[ScrapeJob]:
+        """
+        Record recurring scrapes of the URLs at the context's frequency
+        
+        Args:
+            urls: The URLs to re-scrape
+            context: Session context to use (defaults to this MCP's own context)
             
-            # Parse the HTML content
-            soup = BeautifulSoup(response.text, 'html.parser')
+        Returns:
+            The jobs (new or already scheduled), or an empty list without a job store
+        """
+        context = self.context if context is None else context
+
+        frequency = context["frequency"]
+        if self.job_store is None or frequency not in INTERVALS:
+            return []
+        elements = tuple(context["elements_to_extract"])
+        jobs = []
+        for url in urls:
+            job = ScrapeJob(job_id_for(url, elements, frequency), url, elements, frequency,
+                            next_run=next_run_time(frequency, time.time()))
+            if self.job_store.add(job):
+                logger.info(f"Scheduled {frequency} scrape of {url} as job {job.job_id}")
+            jobs.append(job)
+        return jobs
+
+    def extract_page(self, page: Any, elements: Tuple[str, ...]) -> Dict[str, Any]:
+        """
+        Extract elements from an already fetched page (used by the scrape scheduler)
+        
+        Args:
+            page: A FetchedPage
+            elements: The elements to extract
             
-            # Determine what to extract based on the context
-            extracted_data = {}
+        Returns:
+            The extracted data keyed by element name
+        """
+        if self.parse_pool is not None:
+            return self.parse_pool.extract(page.content, page.encoding, tuple(elements))
+        plan = compile_plan(tuple(elements))
+        strainer = plan.strainer() if self.partial_parsing else None
+        return plan.run(parse_html(page.content, self.parser_backend, encoding=page.encoding, parse_only=strainer))
+
+    def _scrape_data(self, url: str, context: Optional[Dict[str, Any]] = None,
+                     deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Fetch the URL and extract the requested elements
+        
+        With a deadline, every stage stops early once it passes: the download
+        is cut off, only the start of the page is parsed and the extraction
+        walk ends, so what was found so far is returned instead of nothing.
+        
+        Args:
+            url: The URL to scrape
+            context: Session context to use (defaults to this MCP's own context)
+            deadline: The turn's time budget
             
-            # If specific elements are requested, try to extract them
-            if self.context["elements_to_extract"]:
-                for element in self.context["elements_to_extract"]:
-                    # Try different strategies to find the elements
-                    if "price" in element.lower():
-                        # Look for common price patterns
-                        price_elements = soup.select('.price, .product-price, [itemprop="price"], .offer-price, span:contains("$")')
-                        if price_elements:
-                            extracted_data[element] = [elem.text.strip() for elem in price_elements[:5]]
-                    
-                    elif "title" in element.lower() or "name" in element.lower() or "article" in element.lower():
-                        # Look for titles or names
-                        title_elements = soup.select('h1, h2, .title, .product-title, [itemprop="name"], .article-title')
-                        if title_elements:
-                            extracted_data[element] = [elem.text.strip() for elem in title_elements[:5]]
-                    
-                    elif "image" in element.lower() or "photo" in element.lower():
-                        # Look for images
-                        img_elements = soup.select('img[src], [itemprop="image"]')
-                        if img_elements:
-                            extracted_data[element] = [elem.get('src', '') for elem in img_elements[:5]]
-                    
-                    elif "description" in element.lower():
-                        # Look for descriptions
-                        desc_elements = soup.select('p, .description, [itemprop="description"]')
-                        if desc_elements:
-                            extracted_data[element] = [elem.text.strip() for elem in desc_elements[:3]]
-                    
-                    elif "ai" in element.lower() or "artificial intelligence" in element.lower():
-                        # Look for AI-related content
-                        ai_elements = soup.select('p:contains("AI"), p:contains("artificial intelligence"), h1:contains("AI"), h2:contains("AI"), h3:contains("AI")')
-                        if ai_elements:
-                            extracted_data[element] = [elem.text.strip() for elem in ai_elements[:5]]
-                    
-                    else:
-                        # Generic approach for other elements
-                        generic_elements = soup.select(f'.{element}, #{element}, [itemprop="{element}"], [class*="{element}"]')
-                        if generic_elements:
-                            extracted_data[element] = [elem.text.strip() for elem in generic_elements[:5]]
+        Returns:
+            The extracted data keyed by element name
             
-            # If no specific elements or nothing found, extract general information
-            if not extracted_data:
-                # Get page title
-                title = soup.title.text.strip() if soup.title else "No title found"
-                extracted_data["Page Title"] = title
-                
-                # Get main headings
-                headings = [h.text.strip() for h in soup.select('h1, h2')[:5]]
-                if headings:
-                    extracted_data["Main Headings"] = headings
-                
-                # Get meta description
-                meta_desc = soup.find('meta', attrs={'name': 'description'})
-                if meta_desc and meta_desc.get('content'):
-                    extracted_data["Meta Description"] = meta_desc['content']
-                
-                # Get paragraphs
-                paragraphs = [p.text.strip() for p in soup.select('p')[:3]]
-                if paragraphs:
-                    extracted_data["Main Content"] = paragraphs
+        Raises:
+            requests.exceptions.RequestException: If the page cannot be fetched or
+                robots.txt disallows it
+        """
+        context = self.context if context is None else context
+
+        plan = compile_plan(tuple(context["elements_to_extract"]))
+        
+        # Reuse the page if it was downloaded while the user was answering
+        page = self.prefetcher.take(("page", context["conversation_id"], url), deadline=deadline)
+        if page is not None:
+            logger.info(f"Using prefetched page for {url}")
+            return self._parse_and_extract(page, plan, deadline)
+        
+        # Users asking for the same page and elements at once share one fetch and extraction.
+        # It runs under a deadline of its own, so the turns sharing it learn whether it was
+        # cut short; one cut short by a tighter budget than this turn's is run again (once)
+        # with the time this turn has left, and a turn with less time left stops waiting in time.
+        def flight() -> Tuple[Dict[str, Any], Optional[str]]:
+            flight_deadline = deadline.derive() if deadline else None
+            data = self._fetch_and_extract(url, plan, flight_deadline)
+            return data, flight_deadline.cut_short_in if flight_deadline else None
+
+        key = ("page", normalize_url(url), plan.elements)
+        for attempt in range(2):
+            try:
+                data, cut_short_in = self.single_flight.do(key, flight,
+                                                           timeout=deadline.wait_timeout() if deadline else None)
+            except FutureTimeout:
+                deadline.cut_short("fetch")
+                raise DeadlineExceeded(f"Time budget ran out waiting for the scrape of {url} already running")
+            except DeadlineExceeded:
+                if deadline is None or deadline.expired() or attempt:
+                    if deadline is not None:
+                        deadline.cut_short("fetch")
+                    raise
+                logger.info(f"Shared scrape of {url} ran out of another turn's time; scraping it again")
+                continue
+            if cut_short_in is None or deadline is None or deadline.expired() or attempt:
+                break
+            logger.info(f"Shared scrape of {url} was cut short by another turn's deadline; scraping it again")
+        if cut_short_in is not None and deadline is not None:
+            deadline.cut_short(cut_short_in)
+        return data
+
+    def _fetch_and_extract(self, url: str, plan: ExtractionPlan, deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """Fetch, parse and extract one page for _scrape_data"""
+        # Stream the page over the pooled client once the host's rate limit, robots.txt
+        # and any Retry-After allow it, stopping at the byte budget or once every
+        # field the plan needs has arrived
+        def attempt() -> FetchedPage:
+            # Each attempt (retry or hedge) scans its own download
+            scanner = plan.scanner() if self.partial_parsing else None
+            return self.politeness.fetch(url, deadline=deadline, max_bytes=self.max_page_bytes,
+                                         timeout=self.resilience.policy.timeout,
+                                         until=scanner.feed_bytes if scanner else None)
+
+        with METRICS.time("fetch"):
+            page = self.resilience.call(url, attempt, deadline)
+        page.raise_for_status()  # Raise an exception for 4XX/5XX responses
+        if page.truncated:
+            logger.info(f"Stopped downloading {url} after {len(page.content)} bytes")
+        return self._parse_and_extract(page, plan, deadline)
+
+    def _parse_and_extract(self, page: FetchedPage, plan: ExtractionPlan, deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """Parse a downloaded (or prefetched) page for the plan and extract from it"""
+        # Only the raw bytes go to the parse pool and only the extracted dict comes back
+        if self.parse_pool is not None and not (deadline and deadline.expired()):
+            with METRICS.time("parse_extract_pool"):
+                future = self.parse_pool.submit(page.content, page.encoding, plan.elements)
+                try:
+                    return future.result(timeout=deadline.wait_timeout() if deadline else None)
+                except FutureTimeout:
+                    # The worker cannot be interrupted; the start of the page is parsed here instead
+                    future.cancel()
+        
+        # Parse the raw bytes with the page's declared encoding, keeping only
+        # the subtrees the plan can extract from
+        strainer = plan.strainer() if self.partial_parsing else None
+        with METRICS.time("parse"):
+            soup = parse_html(self._parse_budget(page.content, deadline), self.parser_backend,
+                              encoding=page.encoding, parse_only=strainer)
+        with METRICS.time("extract"):
+            return plan.run(soup, deadline)
+
+    @staticmethod
+    def _parse_budget(content: bytes, deadline: Optional[Deadline]) -> bytes:
+        """The part of a page worth parsing: all of it, or just its start once the deadline has passed"""
+        if deadline is None or not deadline.expired() or len(content) <= PARTIAL_PARSE_BYTES:
+            return content
+        deadline.cut_short("parse")
+        logger.info(f"Time budget ran out before parsing; parsing the first {PARTIAL_PARSE_BYTES} bytes only")
+        return content[:PARTIAL_PARSE_BYTES]
+
+    def _extract(self, soup: BeautifulSoup, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Extract the requested elements from a parsed page
+        
+        Args:
+            soup: The parsed page
+            context: Session context to use (defaults to this MCP's own context)
             
-            # Format the data according to the preferred format
-            if self.context["data_format"] == "json":
+        Returns:
+            The extracted data keyed by element name
+        """
+        context = self.context if context is None else context
+
+        # Every requested element is collected in a single walk over the document
+        plan = compile_plan(tuple(context["elements_to_extract"]))
+        return plan.run(soup)
+
+    def _format_data(self, extracted_data: Dict[str, Any], context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Format extracted data according to the preferred format
+        
+        Args:
+            extracted_data: The extracted data keyed by element name
+            context: Session context to use (defaults to this MCP's own context)
+            
+        Returns:
+            The formatted data
+        """
+        context = self.context if context is None else context
+
+        # Format the data according to the preferred format
+        with METRICS.time("format"):
+            if context["data_format"] == "json":
                 return json.dumps(extracted_data, indent=2)
-            elif self.context["data_format"] == "csv":
+            elif context["data_format"] == "csv":
                 csv_data = []
                 for key, values in extracted_data.items():
                     if isinstance(values, list):
@@ -313,10 +666,3 @@ class WebscrapingMCP:
                     else:
                         text_data.append(f"{key}: {values}")
                 return "\n".join(text_data)
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error scraping website: {str(e)}")
-            return f"Error: {str(e)}"
-        except Exception as e:
-            logger.error(f"Unexpected error during scraping: {str(e)}")
-            return f"Unexpected error: {str(e)}"
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Extraction Plan Module
+Compiles the elements a user asked for into a single-pass extraction plan.
+"""
+
+import logging
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+from deadline import PARTIAL_EXTRACT_NODES, Deadline
+
+logger = logging.getLogger("Extraction")
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][\w-]*$')
+
+# Nodes walked between deadline checks during extraction
+DEADLINE_CHECK_INTERVAL = 256
+
+# Elements that never have content or an end tag
+VOID_ELEMENTS = frozenset(["area", "base", "br", "col", "embed", "hr", "img", "input",
+                           "link", "meta", "param", "source", "track", "wbr"])
+
+
+class Category:
+    """
+    One field to collect from a page
+    Candidate tags are pre-filtered on name, class, id and itemprop before
+    the full CSS selector is evaluated, so most tags cost a few set lookups.
+    """
+
+    __slots__ = ("key", "selector", "limit", "value", "names", "classes", "ids",
+                 "itemprops", "class_substrings", "required_attrs", "contains", "any_tag", "_matcher")
+
+    def __init__(self, key: str, selector: str, limit: int, value: str = "text",
+                 names: Iterable[str] = (), classes: Iterable[str] = (), ids: Iterable[str] = (),
+                 itemprops: Iterable[str] = (), class_substrings: Iterable[str] = (),
+                 required_attrs: Optional[Dict[str, Optional[str]]] = None,
+                 contains: Optional[Dict[str, Tuple[str, ...]]] = None,
+                 any_tag: bool = False):
+        """
+        Args:
+            key: Key the values are stored under in extracted_data
+            selector: CSS selector the tags must match
+            limit: Maximum number of values to keep
+            value: What to keep from each tag: "text", "src" or "content"
+            names/classes/ids/itemprops/class_substrings: Pre-filter covering every tag the selector can match
+            required_attrs: Attributes (and values, if not None) a tag matched by name must carry
+            contains: Per tag name, strings one of which the tag's text must contain
+            any_tag: Disable the pre-filter (for selectors it cannot describe)
+        """
+        self.key = key
+        self.selector = selector
+        self.limit = limit
+        self.value = value
+        self.names: FrozenSet[str] = frozenset(names)
+        self.classes: FrozenSet[str] = frozenset(classes)
+        self.ids: FrozenSet[str] = frozenset(ids)
+        self.itemprops: FrozenSet[str] = frozenset(itemprops)
+        self.class_substrings: Tuple[str, ...] = tuple(class_substrings)
+        self.required_attrs = required_attrs or {}
+        self.contains = contains or {}
+        self.any_tag = any_tag
+        self._matcher = soupsieve.compile(selector)
+
+    def is_candidate(self, name: str, attrs: Dict[str, Any]) -> bool:
+        """Cheap test that never rejects a tag the selector would match"""
+        return self.any_tag or self.matches_name(name, attrs) or self.matches_attrs(attrs)
+
+    def matches_name(self, name: str, attrs: Dict[str, Any]) -> bool:
+        """True if the tag is selected by its name (ignoring any text condition)"""
+        if name not in self.names:
+            return False
+        for attr, value in self.required_attrs.items():
+            if attr not in attrs or (value is not None and attrs[attr] != value):
+                return False
+        return True
+
+    def matches_attrs(self, attrs: Dict[str, Any]) -> bool:
+        """True if the tag is selected by its itemprop, id or class"""
+        if self.itemprops and attrs.get("itemprop") in self.itemprops:
+            return True
+        if self.ids and attrs.get("id") in self.ids:
+            return True
+        classes = attrs.get("class")
+        if classes and (self.classes or self.class_substrings):
+            if isinstance(classes, str):
+                classes = classes.split()
+            if self.classes.intersection(classes):
+                return True
+            joined = " ".join(classes)
+            return any(part in joined for part in self.class_substrings)
+        return False
+
+    def matches(self, tag: Tag) -> bool:
+        return self.is_candidate(tag.name, tag.attrs) and self._matcher.match(tag)
+
+    def extract(self, tag: Tag) -> Any:
+        if self.value == "src":
+            return tag.get("src", "")
+        if self.value == "content":
+            return tag.get("content")
+        return tag.text.strip()
+
+
+def category_for(element: str) -> Category:
+    """
+    Build the category for one requested element, choosing the strategy from its name
+
+    Args:
+        element: The element name as the user phrased it (e.g. "product prices")
+
+    Returns:
+        The compiled category
+    """
+    lowered = element.lower()
+    if "price" in lowered:
+        # Look for common price patterns
+        return Category(element, '.price, .product-price, [itemprop="price"], .offer-price, span:-soup-contains("$")', 5,
+                        names=["span"], classes=["price", "product-price", "offer-price"], itemprops=["price"],
+                        contains={"span": ("$",)})
+    if "title" in lowered or "name" in lowered or "article" in lowered:
+        # Look for titles or names
+        return Category(element, 'h1, h2, .title, .product-title, [itemprop="name"], .article-title', 5,
+                        names=["h1", "h2"], classes=["title", "product-title", "article-title"], itemprops=["name"])
+    if "image" in lowered or "photo" in lowered:
+        # Look for images
+        return Category(element, 'img[src], [itemprop="image"]', 5, value="src",
+                        names=["img"], itemprops=["image"], required_attrs={"src": None})
+    if "description" in lowered:
+        # Look for descriptions
+        return Category(element, 'p, .description, [itemprop="description"]', 3,
+                        names=["p"], classes=["description"], itemprops=["description"])
+    if "ai" in lowered or "artificial intelligence" in lowered:
+        # Look for AI-related content
+        return Category(element, 'p:-soup-contains("AI"), p:-soup-contains("artificial intelligence"), '
+                                 'h1:-soup-contains("AI"), h2:-soup-contains("AI"), h3:-soup-contains("AI")', 5,
+                        names=["p", "h1", "h2", "h3"],
+                        contains={"p": ("AI", "artificial intelligence"), "h1": ("AI",), "h2": ("AI",), "h3": ("AI",)})
+    # Generic approach for other elements
+    selector = f'.{element}, #{element}, [itemprop="{element}"], [class*="{element}"]'
+    if _IDENTIFIER.match(element):
+        return Category(element, selector, 5, classes=[element], ids=[element],
+                        itemprops=[element], class_substrings=[element])
+    return Category(element, selector, 5, any_tag=True)
+
+
+def general_categories() -> List[Category]:
+    """Categories used when no requested element matched anything"""
+    return [
+        Category("Page Title", "title", 1, names=["title"]),
+        Category("Main Headings", "h1, h2", 5, names=["h1", "h2"]),
+        Category("Meta Description", 'meta[name="description"]', 1, value="content", names=["meta"],
+                 required_attrs={"name": "description"}),
+        Category("Main Content", "p", 3, names=["p"])
+    ]
+
+
+class ExtractionPlan:
+    """
+    Every requested category, collected in one walk over the document
+    The walk stops as soon as no category can gain anything more.
+    """
+
+    def __init__(self, elements: Tuple[str, ...]):
+        self.elements = elements
+        self.requested = [category_for(element) for element in elements]
+        self.general = general_categories()
+
+    def run(self, soup: BeautifulSoup, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """
+        Extract the plan's categories from a parsed page
+
+        Args:
+            soup: The parsed page
+            deadline: The turn's time budget; once it passes the walk stops (though
+                not within the first PARTIAL_EXTRACT_NODES nodes) and whatever was
+                found up to that point is returned
+
+        Returns:
+            The extracted data keyed by element name, or the general page
+            summary if none of the requested elements were found
+        """
+        requested = [[] for _ in self.requested]
+        general = [[] for _ in self.general]
+        found_requested = False
+
+        for count, node in enumerate(soup.descendants):
+            if (deadline is not None and count >= PARTIAL_EXTRACT_NODES and count % DEADLINE_CHECK_INTERVAL == 0
+                    and deadline.expired()):
+                deadline.cut_short("extract")
+                break
+            if not isinstance(node, Tag):
+                continue
+            for category, values in zip(self.requested, requested):
+                if len(values) < category.limit and category.matches(node):
+                    values.append(category.extract(node))
+                    found_requested = True
+            if not found_requested:
+                for category, values in zip(self.general, general):
+                    if len(values) < category.limit and category.matches(node):
+                        values.append(category.extract(node))
+            if self._complete(requested, general, found_requested):
+                break
+
+        extracted_data = {}
+        for category, values in zip(self.requested, requested):
+            if values:
+                extracted_data[category.key] = values
+        if extracted_data:
+            return extracted_data
+        return self._summarize(general)
+
+    @property
+    def categories(self) -> List[Category]:
+        return self.requested + self.general
+
+    def strainer(self) -> Optional[SoupStrainer]:
+        """
+        A SoupStrainer that keeps only the subtrees the plan can extract from
+
+        Returns:
+            The strainer, or None when a category cannot be pre-filtered and
+            the whole document has to be parsed
+        """
+        if any(category.any_tag for category in self.categories):
+            return None
+        return PlanStrainer(self.categories)
+
+    def scanner(self) -> "PlanScanner":
+        """A fresh incremental scanner that reports when a partial download is enough"""
+        return PlanScanner(self)
+
+    def run_with_select(self, soup: BeautifulSoup) -> Dict[str, Any]:
+        """
+        Reference implementation: one full-document soup.select() per category
+
+        Kept for benchmarks and equivalence checks against run().
+        """
+        extracted_data = {}
+        for category in self.requested:
+            values = [category.extract(tag) for tag in soup.select(category.selector)[:category.limit]]
+            if values:
+                extracted_data[category.key] = values
+        if extracted_data:
+            return extracted_data
+        return self._summarize([[category.extract(tag) for tag in soup.select(category.selector)[:category.limit]]
+                                for category in self.general])
+
+    def _complete(self, requested: List[list], general: List[list], found_requested: bool) -> bool:
+        """True once further tags cannot change the result"""
+        if not all(len(values) >= category.limit for category, values in zip(self.requested, requested)):
+            return False
+        if found_requested:
+            return True
+        return all(len(values) >= category.limit for category, values in zip(self.general, general))
+
+    @staticmethod
+    def _summarize(general: List[list]) -> Dict[str, Any]:
+        """Shape the general categories the way the page summary has always looked"""
+        title, headings, meta, paragraphs = general
+        extracted_data = {"Page Title": title[0] if title else "No title found"}
+        if headings:
+            extracted_data["Main Headings"] = headings
+        if meta and meta[0]:
+            extracted_data["Meta Description"] = meta[0]
+        if paragraphs:
+            extracted_data["Main Content"] = paragraphs
+        return extracted_data
+
+
+class PlanStrainer(SoupStrainer):
+    """
+    Parse-time filter built from a plan's categories
+    Top-level tags are only created when some category could select them;
+    once a tag is kept its whole subtree is parsed with it.
+    """
+
+    def __init__(self, categories: List[Category]):
+        super().__init__()
+        self.plan_categories = categories
+
+    def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict[str, Any]]) -> bool:
+        attrs = attrs or {}
+        return any(category.is_candidate(name, attrs) for category in self.plan_categories)
+
+    def search_tag(self, markup_name: Any = None, markup_attrs: Any = None) -> bool:
+        # Entry point used by Beautiful Soup releases before 4.13
+        return self.allow_tag_creation(None, markup_name, dict(markup_attrs or {}))
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+
+class _OpenElement:
+    """An element the scanner has seen open but not yet closed"""
+
+    __slots__ = ("name", "counts", "pending", "text")
+
+    def __init__(self, name: str, counts: List[int], pending: List[int]):
+        self.name = name
+        self.counts = counts
+        self.pending = pending
+        self.text = [] if pending else None
+
+
+class PlanScanner(HTMLParser):
+    """
+    Incremental tag scanner used while a page is still downloading
+    Counts, per category, the elements that have been fully received and
+    reports when every category the plan needs has reached its limit, so the
+    rest of the body does not have to be downloaded.
+    """
+
+    def __init__(self, plan: ExtractionPlan):
+        super().__init__(convert_charrefs=True)
+        self.plan = plan
+        self.categories = plan.categories
+        self.requested_count = len(plan.requested)
+        self.counts = [0] * len(self.categories)
+        self.stack: List[_OpenElement] = []
+        self.complete = False
+
+    def feed_bytes(self, chunk: bytes) -> bool:
+        """
+        Feed one downloaded chunk
+
+        Chunks are decoded as Latin-1: it never fails mid-character and leaves
+        the ASCII markup and the ASCII strings the categories look for intact.
+
+        Returns:
+            True once the received prefix of the page is enough for the plan
+        """
+        if not self.complete:
+            self.feed(chunk.decode("latin-1"))
+        return self.complete
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attributes = {name: (value or "") for name, value in attrs}
+        counts, pending = [], []
+        for index, category in enumerate(self.categories):
+            if category.matches_attrs(attributes):
+                counts.append(index)
+            elif category.matches_name(tag, attributes):
+                (pending if tag in category.contains else counts).append(index)
+        if tag in VOID_ELEMENTS:
+            self._count(counts)
+        elif counts or pending or self.stack:
+            self.stack.append(_OpenElement(tag, counts, pending))
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack and self.stack[-1].name == tag:
+            self._close(self.stack.pop())
+
+    def handle_endtag(self, tag: str) -> None:
+        for position in range(len(self.stack) - 1, -1, -1):
+            if self.stack[position].name == tag:
+                # Anything still open above the matching element is implicitly closed with it
+                while len(self.stack) > position:
+                    self._close(self.stack.pop())
+                break
+
+    def handle_data(self, data: str) -> None:
+        for element in self.stack:
+            if element.text is not None:
+                element.text.append(data)
+
+    def _close(self, element: _OpenElement) -> None:
+        counted = list(element.counts)
+        if element.pending:
+            text = "".join(element.text)
+            for index in element.pending:
+                if any(needle in text for needle in self.categories[index].contains[element.name]):
+                    counted.append(index)
+        self._count(counted)
+
+    def _count(self, indexes: List[int]) -> None:
+        for index in indexes:
+            self.counts[index] += 1
+        if indexes:
+            self.complete = self._is_complete()
+
+    def _is_complete(self) -> bool:
+        """Mirror of ExtractionPlan._complete over the received element counts"""
+        requested = list(zip(self.plan.requested, self.counts[:self.requested_count]))
+        if not all(count >= category.limit for category, count in requested):
+            return False
+        if any(count for _, count in requested):
+            return True
+        return all(count >= category.limit
+                   for category, count in zip(self.plan.general, self.counts[self.requested_count:]))
+
+
+@lru_cache(maxsize=256)
+def compile_plan(elements: Tuple[str, ...]) -> ExtractionPlan:
+    """Return the (cached) extraction plan for a tuple of element names"""
+    logger.debug(f"Compiling extraction plan for {elements}")
+    return ExtractionPlan(elements)
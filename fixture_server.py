@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Local Fixture Server
+A small in-process HTTP/1.1 server used by the tests and benchmarks so they
+never depend on live websites.
+"""
+
+import json
+import logging
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger("FixtureServer")
+
+# A route is either static content or a callable(handler) -> (status, headers, body)
+Route = Union[bytes, str, Callable[["_FixtureHandler"], Tuple[int, Dict[str, str], bytes]]]
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """Request handler that serves the routes registered on the owning server"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.request_count += 1
+        path = self.path.split("?", 1)[0]
+        route = self.server.routes.get(path)
+        if route is None:
+            status, headers, body = 404, {"Content-Type": "text/plain"}, b"not found"
+        elif callable(route):
+            status, headers, body = route(self)
+        else:
+            body = route.encode("utf-8") if isinstance(route, str) else route
+            status, headers = 200, {"Content-Type": "text/html; charset=utf-8"}
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class _FixtureHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that stop reading early (streaming scrapers, load tests) just hang up
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            logger.debug(f"Connection from {client_address} closed early")
+        else:
+            super().handle_error(request, client_address)
+
+
+class FixtureServer:
+    """
+    Threaded local HTTP server with keep-alive support
+    Use as a context manager; `url(path)` builds absolute URLs for the routes.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Route]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.httpd = _FixtureHTTPServer((host, port), _FixtureHandler)
+        self.httpd.routes = dict(routes or {})
+        self.httpd.request_count = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def routes(self) -> Dict[str, Route]:
+        return self.httpd.routes
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str = "/") -> str:
+        """Build an absolute URL for a path on this server"""
+        return self.base_url + path
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Fixture server listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def fake_wikipedia_search(handler: BaseHTTPRequestHandler) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Route answering MediaWiki `list=search` queries with deterministic results
+
+    Mount it at /w/api.php and point ResearchMCP's api_url there. Titles and
+    snippets are derived from `srsearch`, and `srlimit` results are returned.
+    """
+    params = parse_qs(urlsplit(handler.path).query)
+    query = params.get("srsearch", [""])[0]
+    limit = int(params.get("srlimit", ["10"])[0])
+    results = [
+        {"ns": 0, "title": f"{query.title()} ({i})" if i else query.title(), "pageid": 1000 + i,
+         "snippet": f'<span class="searchmatch">{query}</span> is covered in article {i} of the fixture index',
+         "wordcount": 500 * (i + 1)}
+        for i in range(limit)
+    ]
+    body = {"batchcomplete": "", "query": {"searchinfo": {"totalhits": limit}, "search": results}}
+    return 200, {"Content-Type": "application/json"}, json.dumps(body).encode("utf-8")
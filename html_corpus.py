@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+HTML Corpus
+Deterministic synthetic pages used by the benchmarks and tests.
+"""
+
+import random
+from typing import Dict
+
+# Bump when the generators change so benchmark results are only compared like for like
+CORPUS_VERSION = 1
+
+_WORDS = ("market price product review quantum computing AI artificial intelligence "
+          "research news update analysis report data science python web scraping "
+          "shipping sale discount rating customer").split()
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def retail_page(products: int = 50, seed: int = 1) -> str:
+    """A product listing page with prices, titles, images and descriptions"""
+    rng = random.Random(seed)
+    parts = ["<!DOCTYPE html><html><head><title>Shop - Products</title>",
+             '<meta name="description" content="Synthetic product listing"></head><body>',
+             "<h1>All products</h1><nav class=\"pagination\"><a href=\"?page=2\" rel=\"next\">Next</a></nav>"]
+    for i in range(products):
+        parts.append(
+            f'<div class="product" itemscope><h2 class="product-title" itemprop="name">Product {i}</h2>'
+            f'<img src="/img/{i}.jpg" alt="Product {i}">'
+            f'<span class="price" itemprop="price">${rng.randint(5, 500)}.{rng.randint(0, 99):02d}</span>'
+            f'<p class="description" itemprop="description">{_sentence(rng)}</p>'
+            f'<div class="rating">{rng.randint(1, 5)} stars</div></div>'
+        )
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def news_page(articles: int = 50, seed: int = 2) -> str:
+    """A news front page with headings and long paragraphs"""
+    rng = random.Random(seed)
+    parts = ["<!DOCTYPE html><html><head><title>Daily News</title>",
+             '<meta name="description" content="Synthetic news front page"></head><body>',
+             "<header><h1>Daily News</h1></header><main>"]
+    for i in range(articles):
+        parts.append(f'<article><h2 class="article-title">Story {i}: {_sentence(rng, 6)}</h2>')
+        for _ in range(4):
+            parts.append(f"<p>{_sentence(rng, 40)}</p>")
+        parts.append("</article>")
+    parts.append("</main></body></html>")
+    return "".join(parts)
+
+
+def nested_page(depth: int = 200) -> str:
+    """A deeply nested page that stresses tree building and traversal"""
+    return ("<html><head><title>Nested</title></head><body>" + "<div class=\"level\">" * depth
+            + "<h1>Deep heading</h1><p>Deep paragraph about AI.</p>" + "</div>" * depth + "</body></html>")
+
+
+def sized_page(target_bytes: int, seed: int = 3) -> str:
+    """A news-style page padded out to roughly target_bytes"""
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Large page</title>",
+             '<meta name="description" content="Large synthetic page"></head><body><h1>Large page</h1>']
+    size = sum(len(p) for p in parts)
+    while size < target_bytes:
+        chunk = f"<div class=\"item\"><h2>{_sentence(rng, 5)}</h2><p>{_sentence(rng, 60)}</p></div>"
+        parts.append(chunk)
+        size += len(chunk)
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def default_corpus() -> Dict[str, str]:
+    """The fixed corpus used by the parser benchmarks"""
+    return {
+        "retail": retail_page(200),
+        "news": news_page(100),
+        "nested": nested_page(),
+        "large": sized_page(1024 * 1024)
+    }
+
+
+def bench_corpus() -> Dict[str, str]:
+    """Pages served by the benchmark suite, by name: small, 1 MB, 10 MB and deeply nested"""
+    return {
+        "small": retail_page(10),
+        "1mb": sized_page(1024 * 1024),
+        "10mb": sized_page(10 * 1024 * 1024),
+        "nested": nested_page(1000)
+    }
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+HTML Parser Backends
+Picks the fastest installed BeautifulSoup tree builder for scraping.
+"""
+
+import importlib.util
+import logging
+from typing import Any, List, Optional
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger("HTMLParsers")
+
+# Tree builders in order of preference, with the module each one needs.
+# lxml's C parser is several times faster than the pure-Python html.parser
+# and yields the same results for the selectors the MCP extracts with.
+PARSER_BACKENDS = [
+    ("lxml", "lxml"),
+    ("html.parser", None)
+]
+
+
+def available_backends() -> List[str]:
+    """Return the names of the parser backends that can be used in this environment"""
+    return [name for name, module in PARSER_BACKENDS
+            if module is None or importlib.util.find_spec(module) is not None]
+
+
+def select_backend(preferred: Optional[str] = None) -> str:
+    """
+    Choose a parser backend
+
+    Args:
+        preferred: Backend to use if it is installed (e.g. "lxml", "html.parser")
+
+    Returns:
+        The preferred backend if available, otherwise the fastest installed one
+    """
+    available = available_backends()
+    if preferred:
+        if preferred in available:
+            return preferred
+        logger.warning(f"Parser backend '{preferred}' is not installed, falling back to '{available[0]}'")
+    return available[0]
+
+
+def parse_html(markup: Any, backend: Optional[str] = None, encoding: Optional[str] = None, **kwargs) -> BeautifulSoup:
+    """
+    Parse markup with the chosen backend
+
+    Args:
+        markup: HTML as str or bytes
+        backend: Parser backend name (defaults to the fastest installed one)
+        encoding: Known encoding of bytes markup. The bytes are decoded exactly
+            once with it, so Beautiful Soup never runs its own encoding sniffing.
+
+    Returns:
+        The parsed document
+    """
+    if encoding and isinstance(markup, bytes):
+        markup = markup.decode(encoding, errors="replace")
+    return BeautifulSoup(markup, backend or select_backend(), **kwargs)
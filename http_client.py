@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+HTTP Client Module
+Shared, pooled HTTP client used by the MCPs for all outbound requests.
+"""
+
+import logging
+import socket
+import threading
+import time
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+import urllib3.util.connection
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError, SSLError
+
+from deadline import Deadline, cap_timeout
+from metrics import METRICS
+from page_encoding import detect_encoding
+from response_cache import ResponseCache, CachedResponse, cache_key
+
+logger = logging.getLogger("HTTPClient")
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+class DNSCache:
+    """
+    Process-wide cache of resolved host addresses with a TTL.
+    Installed into urllib3's connection factory so every pooled
+    connection skips the resolver once a host has been seen.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[Tuple]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, host: str, port: int) -> List[Tuple]:
+        """
+        Resolve a host/port pair, serving from the cache while the entry is fresh
+
+        Args:
+            host: The hostname to resolve
+            port: The port to connect to
+
+        Returns:
+            A list of getaddrinfo() tuples
+        """
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def clear(self) -> None:
+        """Drop all cached resolutions"""
+        with self._lock:
+            self._entries.clear()
+
+
+_dns_cache: Optional[DNSCache] = None
+_original_create_connection = urllib3.util.connection.create_connection
+
+
+def _cached_create_connection(address, *args, **kwargs):
+    """Drop-in replacement for urllib3's create_connection that uses the DNS cache"""
+    host, port = address
+    if _dns_cache is None:
+        return _original_create_connection(address, *args, **kwargs)
+
+    try:
+        addresses = _dns_cache.resolve(host.strip("[]"), port)
+    except socket.gaierror:
+        return _original_create_connection(address, *args, **kwargs)
+
+    last_error = None
+    for _, _, _, _, sockaddr in addresses:
+        try:
+            return _original_create_connection((sockaddr[0], port), *args, **kwargs)
+        except OSError as e:
+            last_error = e
+    raise last_error if last_error else OSError(f"Could not connect to {host}:{port}")
+
+
+def install_dns_cache(ttl: float = 300.0) -> DNSCache:
+    """
+    Install the process-wide DNS cache (idempotent)
+
+    Args:
+        ttl: How long a resolution stays valid, in seconds
+
+    Returns:
+        The active DNS cache
+    """
+    global _dns_cache
+    if _dns_cache is None:
+        _dns_cache = DNSCache(ttl)
+        urllib3.util.connection.create_connection = _cached_create_connection
+        logger.info(f"DNS cache installed (ttl={ttl}s)")
+    else:
+        _dns_cache.ttl = ttl
+    return _dns_cache
+
+
+class FetchedPage:
+    """
+    The body of a fetched page plus the response metadata the scrapers need
+    `truncated` is set when the download stopped before the end of the body.
+    """
+
+    __slots__ = ("url", "status_code", "reason", "headers", "content", "truncated", "from_cache", "_encoding")
+
+    def __init__(self, url: str, status_code: int, reason: str, headers: Dict[str, str], content: bytes,
+                 truncated: bool = False, from_cache: bool = False):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.truncated = truncated
+        self.from_cache = from_cache
+        self._encoding: Optional[str] = None
+
+    @property
+    def encoding(self) -> str:
+        """The declared (header, BOM or <meta>) encoding, detected from a capped prefix only as a last resort"""
+        if self._encoding is None:
+            self._encoding = detect_encoding(self.content, self.headers)
+        return self._encoding
+
+    @property
+    def text(self) -> str:
+        """The body decoded once with its encoding"""
+        return str(self.content, self.encoding, errors="replace")
+
+    def raise_for_status(self) -> None:
+        """Raise requests' HTTPError for 4XX/5XX responses"""
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise requests.exceptions.HTTPError(f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}")
+
+
+class HTTPClient:
+    """
+    Pooled HTTP client
+    Keeps per-host keep-alive connection pools so repeated requests to the
+    same host reuse TCP/TLS connections instead of handshaking every time.
+    """
+
+    def __init__(self,
+                 pool_connections: int = 20,
+                 pool_maxsize: int = 10,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 10.0,
+                 dns_ttl: Optional[float] = 300.0,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 cache: Optional[ResponseCache] = None):
+        """
+        Initialize the HTTP client
+
+        Args:
+            pool_connections: Number of per-host pools to keep
+            pool_maxsize: Maximum number of kept-alive connections per host
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait between bytes from the server
+            dns_ttl: DNS cache TTL in seconds, or None to disable DNS caching
+            user_agent: Default User-Agent header
+            cache: Optional persistent response cache used for plain GETs
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': user_agent})
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.dns_cache = install_dns_cache(dns_ttl) if dns_ttl else None
+        logger.info(f"HTTP client initialized (pools={pool_connections}, maxsize={pool_maxsize}, timeout={self.timeout})")
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[Any] = None, use_cache: bool = True,
+            deadline: Optional[Deadline] = None, **kwargs) -> requests.Response:
+        """
+        Send a GET request over the pooled session
+
+        When a response cache is configured, fresh entries are served without
+        touching the network and stale ones are revalidated with a conditional GET.
+
+        Args:
+            url: The URL to fetch
+            headers: Extra request headers
+            timeout: Overrides the configured (connect, read) timeout
+            use_cache: Set to False to bypass the response cache
+            deadline: The turn's time budget; the timeout is shortened to what is left of it
+
+        Returns:
+            The requests Response object
+
+        Raises:
+            DeadlineExceeded: If the deadline has already passed
+        """
+        if deadline is not None:
+            deadline.check("fetch")
+        timeout = cap_timeout(deadline, timeout or self.timeout)
+        host = urlparse(url).netloc.lower()
+        if self.cache is None or not use_cache or kwargs:
+            return self._record(host, self._send(host, url, headers=headers, timeout=timeout, **kwargs))
+
+        key, entry, request_headers = self._cache_lookup(url, headers)
+        if entry is not None and entry.is_fresh():
+            self.cache.record("hits", len(entry.body))
+            METRICS.count("cache_hits", host=host)
+            return self._from_cache(entry)
+
+        response = self._record(host, self._send(host, url, headers=request_headers, timeout=timeout))
+        if entry is not None and response.status_code == 304:
+            self.cache.record("revalidations", len(entry.body))
+            self.cache.refresh(key, dict(response.headers))
+            METRICS.count("cache_hits", host=host)
+            return self._from_cache(entry)
+
+        self.cache.record("misses")
+        self.cache.store(key, url, response.status_code, dict(response.headers), response.content)
+        return response
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None,
+              timeout: Optional[Any] = None, max_bytes: Optional[int] = None,
+              until: Optional[Callable[[bytes], bool]] = None,
+              chunk_size: int = 64 * 1024, deadline: Optional[Deadline] = None) -> FetchedPage:
+        """
+        Stream a page body in chunks, stopping at a byte budget or when the caller has enough
+
+        Complete bodies go through the response cache like get(); truncated ones are never cached.
+
+        Args:
+            url: The URL to fetch
+            headers: Extra request headers
+            timeout: Overrides the configured (connect, read) timeout
+            max_bytes: Stop downloading after this many bytes
+            until: Called with each chunk; returning True stops the download
+            chunk_size: Bytes to read per chunk
+            deadline: The turn's time budget; the timeout is shortened to what is left of it
+                and a download still running when it passes is cut off (truncated)
+
+        Returns:
+            The fetched page
+
+        Raises:
+            DeadlineExceeded: If the deadline has already passed
+        """
+        if deadline is not None:
+            deadline.check("fetch")
+        host = urlparse(url).netloc.lower()
+        key, entry, request_headers = None, None, headers
+        if self.cache is not None:
+            key, entry, request_headers = self._cache_lookup(url, headers)
+            if entry is not None and entry.is_fresh():
+                return self._cache_hit(entry, host)
+
+        response = self._send(host, url, headers=request_headers, timeout=cap_timeout(deadline, timeout or self.timeout),
+                              stream=True)
+        try:
+            if entry is not None and response.status_code == 304:
+                self.cache.record("revalidations", len(entry.body))
+                self.cache.refresh(key, dict(response.headers))
+                METRICS.count("cache_hits", host=host)
+                return FetchedPage(entry.url, entry.status, "OK", entry.headers, entry.body, from_cache=True)
+
+            chunks, size, truncated = [], 0, False
+            for chunk in self._chunks(response, chunk_size, deadline):
+                chunks.append(chunk)
+                size += len(chunk)
+                if max_bytes is not None and size >= max_bytes:
+                    truncated = size > max_bytes or response.raw.read(1) != b""
+                    break
+                if until is not None and until(chunk):
+                    truncated = True
+                    break
+                if deadline is not None and deadline.expired():
+                    logger.info(f"Time budget ran out while downloading {url}; keeping {size} bytes")
+                    deadline.cut_short("fetch")
+                    truncated = True
+                    break
+            content = b"".join(chunks)[:max_bytes] if max_bytes is not None else b"".join(chunks)
+        finally:
+            response.close()
+
+        page = FetchedPage(response.url, response.status_code, response.reason, dict(response.headers),
+                           content, truncated=truncated)
+        METRICS.count("bytes", len(content), host=host)
+        if page.status_code >= 400:
+            METRICS.count("errors", host=host)
+        if self.cache is not None:
+            self.cache.record("misses")
+            if not truncated:
+                self.cache.store(key, url, page.status_code, dict(response.headers), content)
+        return page
+
+    def cached(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[FetchedPage]:
+        """
+        A fresh cached copy of a page, without touching the network
+
+        Lets callers that pace or guard their requests (rate limits, robots.txt)
+        serve cache hits before doing so.
+
+        Args:
+            url: The URL to look up
+            headers: The request headers fetch() would send
+
+        Returns:
+            The cached page, or None if there is no fresh copy
+        """
+        if self.cache is None:
+            return None
+        _, entry, _ = self._cache_lookup(url, headers)
+        if entry is None or not entry.is_fresh():
+            return None
+        return self._cache_hit(entry, urlparse(url).netloc.lower())
+
+    def _cache_hit(self, entry: CachedResponse, host: str) -> FetchedPage:
+        """Count a fresh cache entry as a hit and return it as a page"""
+        self.cache.record("hits", len(entry.body))
+        METRICS.count("cache_hits", host=host)
+        return FetchedPage(entry.url, entry.status, "OK", entry.headers, entry.body, from_cache=True)
+
+    @staticmethod
+    def _chunks(response: requests.Response, chunk_size: int, deadline: Optional[Deadline]) -> Iterator[bytes]:
+        """
+        Body chunks of a streamed response
+
+        iter_content() blocks until a whole chunk has arrived, so a server
+        dripping bytes can hold it open indefinitely. With a deadline, chunks
+        are read with read1() (urllib3 2+), which returns whatever has arrived,
+        so the caller gets to check the deadline between reads. urllib3's
+        errors are raised as the requests exceptions iter_content() raises,
+        so retries and circuit breakers see the same failures either way.
+        """
+        read1 = getattr(response.raw, "read1", None)
+        if deadline is None or read1 is None:
+            yield from response.iter_content(chunk_size)
+            return
+        while True:
+            try:
+                chunk = read1(chunk_size, decode_content=True)
+            except ProtocolError as e:
+                raise requests.exceptions.ChunkedEncodingError(e)
+            except DecodeError as e:
+                raise requests.exceptions.ContentDecodingError(e)
+            except ReadTimeoutError as e:
+                raise requests.exceptions.ConnectionError(e)
+            except SSLError as e:
+                raise requests.exceptions.SSLError(e)
+            if not chunk:
+                return
+            yield chunk
+
+    def _send(self, host: str, url: str, **kwargs) -> requests.Response:
+        """GET over the pooled session, counting the request (and any failure) against its host"""
+        METRICS.count("requests", host=host)
+        try:
+            return self.session.get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            METRICS.count("errors", host=host)
+            raise
+
+    @staticmethod
+    def _record(host: str, response: requests.Response) -> requests.Response:
+        """Count a fully read response's bytes and error status against its host"""
+        METRICS.count("bytes", len(response.content), host=host)
+        if response.status_code >= 400:
+            METRICS.count("errors", host=host)
+        return response
+
+    def _cache_lookup(self, url: str, headers: Optional[Dict[str, str]]) -> Tuple[str, Optional[CachedResponse], Dict[str, str]]:
+        """Return the cache key, any cached entry and the (conditional) request headers"""
+        key = cache_key(url, dict(self.session.headers, **(headers or {})))
+        entry = self.cache.lookup(key)
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers.update(entry.conditional_headers())
+        return key, entry, request_headers
+
+    @staticmethod
+    def _from_cache(entry: CachedResponse) -> requests.Response:
+        """Rebuild a requests Response from a cache entry"""
+        response = requests.Response()
+        response.status_code = entry.status
+        response.reason = "OK"
+        response.url = entry.url
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = entry.body
+        response.from_cache = True
+        return response
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        self.session.close()
+
+
+_default_client: Optional[HTTPClient] = None
+_default_lock = threading.Lock()
+
+
+def get_default_client() -> HTTPClient:
+    """Return the process-wide shared HTTP client, creating it on first use"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HTTPClient()
+        return _default_client
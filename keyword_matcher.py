@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Keyword Matcher Module
+Answers every routing and context keyword question about a request from one
+lowercased copy, looking each keyword up at most once.
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+# Keyword tables by group, then label. Labels are listed in priority order:
+# when several labels of a group match, first() returns the earliest one.
+KEYWORD_TABLES: Dict[str, Dict[str, List[str]]] = {
+    "route": {
+        "webscraping": ["scrape", "extract data", "website data", "html", "web page", "crawler"]
+    },
+    "format": {
+        "json": ["json", "javascript", "object", "notation"],
+        "csv": ["csv", "comma", "excel", "spreadsheet"],
+        "xml": ["xml", "extensible", "markup"],
+        "text": ["text", "plain", "txt"],
+        "html": ["html", "webpage", "page"]
+    },
+    "pagination": {
+        "pagination": ["pagination", "multiple pages", "next page", "all pages"]
+    },
+    "frequency": {
+        "once": ["once", "one time", "single", "just once"],
+        "hourly": ["hourly", "every hour", "each hour"],
+        "daily": ["daily", "every day", "each day"],
+        "weekly": ["weekly", "every week", "each week"],
+        "monthly": ["monthly", "every month", "each month"]
+    },
+    "auth": {
+        "login": ["login", "authenticate"]
+    },
+    "depth": {
+        "basic": ["basic", "simple"],
+        "advanced": ["advanced", "detailed", "in-depth"],
+        "intermediate": ["intermediate", "moderate"]
+    },
+    "sources": {
+        "without": ["no sources", "without references"],
+        "with": ["sources", "references", "citations"]
+    },
+    "focus": {
+        "personal": ["personal", "casual"],
+        "academic": ["academic", "scholarly", "research"]
+    },
+    "scrape_question": {
+        "url": ["url"],
+        "extract": ["extract"],
+        "scrape": ["scrape"],
+        "format": ["format", "output"]
+    },
+    "research_question": {
+        "topic": ["topic"],
+        "sources": ["sources", "reference"],
+        "depth": ["depth", "detail"]
+    }
+}
+
+
+class KeywordHits:
+    """
+    The keywords found in one text, answerable per group and label
+
+    The text is lowercased once. Each keyword is looked up at most once,
+    when a caller first asks about it, and the answer is remembered, so
+    routing, question generation and the context update can all query the
+    same hits without rescanning.
+    """
+
+    __slots__ = ("text", "_matcher", "_found")
+
+    def __init__(self, text: str, matcher: "KeywordMatcher"):
+        self.text = text.lower()
+        self._matcher = matcher
+        self._found: Dict[str, bool] = {}
+
+    def contains(self, keyword: str) -> bool:
+        """Whether the keyword occurs in the text (same answer as `keyword in text.lower()`)"""
+        found = self._found.get(keyword)
+        if found is None:
+            # A keyword can only occur where every shorter keyword inside it does too
+            found = True
+            for part in self._matcher.parts[keyword]:
+                if not self.contains(part):
+                    found = False
+                    break
+            else:
+                found = self._search(keyword)
+            self._found[keyword] = found
+        return found
+
+    def _search(self, keyword: str) -> bool:
+        return keyword in self.text
+
+    def has(self, group: str, label: str) -> bool:
+        for keyword in self._matcher.tables[group][label]:
+            if self.contains(keyword):
+                return True
+        return False
+
+    def any(self, group: str) -> bool:
+        return self.first(group) is not None
+
+    def first(self, group: str) -> Optional[str]:
+        """The highest-priority label of the group that matched, or None"""
+        for label in self._matcher.tables[group]:
+            if self.has(group, label):
+                return label
+        return None
+
+
+class JoinedHits(KeywordHits):
+    """
+    Hits for `first + " " + second` built from the hits of the two parts
+
+    A keyword occurs in the joined text if it occurs in either part or spans
+    the join, so only a short window around the seam is searched; neither
+    part is lowercased or scanned again.
+    """
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, first: KeywordHits, second: KeywordHits, matcher: "KeywordMatcher"):
+        reach = matcher.max_length - 1
+        super().__init__(first.text[-reach:] + " " + second.text[:reach], matcher)
+        self._parts = (first, second)
+
+    def _search(self, keyword: str) -> bool:
+        return keyword in self.text or self._parts[0].contains(keyword) or self._parts[1].contains(keyword)
+
+
+class KeywordMatcher:
+    """
+    Multi-keyword substring matcher built once from all keyword tables
+
+    Lookups use CPython's substring search, which skips through the text
+    far faster than a regex alternation can step through it one position
+    at a time, and are pruned with a containment table built up front: if
+    "page" is absent, "next page", "all pages" and "webpage" are never
+    searched for.
+    """
+
+    def __init__(self, tables: Mapping[str, Mapping[str, Sequence[str]]]):
+        """
+        Compile the matcher
+
+        Args:
+            tables: Keyword lists by group and label
+        """
+        self.tables = tables
+        keywords = sorted({keyword for labels in tables.values() for words in labels.values() for keyword in words})
+        # For each keyword, the other keywords it contains that are not inside a longer contained one
+        self.parts: Dict[str, Tuple[str, ...]] = {}
+        for keyword in keywords:
+            inside = [other for other in keywords if other != keyword and other in keyword]
+            self.parts[keyword] = tuple(other for other in inside
+                                        if not any(other != bigger and other in bigger for bigger in inside))
+        self.max_length = max(len(keyword) for keyword in keywords)
+
+    def scan(self, text: str) -> KeywordHits:
+        """
+        Prepare the keyword hits for a text
+
+        Args:
+            text: The text to match against (any case)
+
+        Returns:
+            The hits, resolved on demand
+        """
+        return KeywordHits(text, self)
+
+    def join(self, first: KeywordHits, second: KeywordHits) -> KeywordHits:
+        """Hits for the two texts joined with a space, reusing what each part has already looked up"""
+        return JoinedHits(first, second, self)
+
+
+# Built once at import from every table the router and the MCPs use
+MATCHER = KeywordMatcher(KEYWORD_TABLES)
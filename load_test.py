@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Load Test Harness
+Drives many simulated conversations (request -> clarifying question ->
+answer -> response) concurrently through `mcp_server.MCPServer` or
+`server.MCPServer` against a local stand-in backend. input() is replaced by
+scripted answers, given after a configurable think time. Reports throughput,
+p50/p99 turn latency, error rates and memory growth over time.
+"""
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+from bench_suite import fixture_routes, local_mcps
+from fixture_server import FixtureServer
+from http_client import HTTPClient
+from metrics import Histogram
+from session_store import SessionStore
+import mcp_server
+import server
+
+logger = logging.getLogger("LoadTest")
+
+TOPICS = ["quantum computing", "machine learning", "climate change", "protein folding", "plate tectonics",
+          "renewable energy", "black holes", "gene editing"]
+RESEARCH_ANSWERS = ["a basic overview", "an intermediate summary with sources", "advanced, academic sources please"]
+WEBSCRAPING_ANSWERS = ["titles and prices as json", "product titles and descriptions as csv", "prices only"]
+
+# A target runs one conversation: (request, mcp_type, session_id) -> error description or None
+Target = Callable[[str, str, str], Optional[str]]
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+
+class ScriptedInput:
+    """
+    Thread-aware stand-in for input()
+
+    Each client thread sets the answer for its current conversation; the
+    prompt blocks for that conversation's think time, as a user typing
+    would, and the time spent thinking is recorded so it can be taken out
+    of the turn latency.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def script(self, answer: str, think_time: float) -> None:
+        self._local.answer = answer
+        self._local.think_time = think_time
+        self._local.thought = 0.0
+
+    @property
+    def thought(self) -> float:
+        return getattr(self._local, "thought", 0.0)
+
+    def __call__(self, prompt: str = "") -> str:
+        if self._local.think_time:
+            time.sleep(self._local.think_time)
+            self._local.thought += self._local.think_time
+        return self._local.answer
+
+    @contextlib.contextmanager
+    def installed(self) -> Iterator[None]:
+        """Replace input() and swallow the servers' prints for the duration"""
+        original = builtins.input
+        builtins.input = self
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield
+        finally:
+            builtins.input = original
+
+
+def core_target(mcps: Dict[str, Any]) -> Target:
+    """Conversations through mcp_server.MCPServer.process_request, which routes each request itself"""
+    core = mcp_server.MCPServer(mcps=mcps)
+
+    def run(request: str, mcp_type: str, session_id: str) -> Optional[str]:
+        core.process_request(request, session_id=session_id)
+        return None
+
+    return run
+
+
+def repl_target(mcps: Dict[str, Any]) -> Target:
+    """
+    Conversations through server.MCPServer.process_request
+
+    The REPL server keeps the selected MCP on the instance, so each MCP type
+    gets its own server; they share the MCPs and the session store.
+    """
+    sessions = SessionStore()
+    servers = {}
+    for name in mcps:
+        servers[name] = server.MCPServer(mcps=mcps, sessions=sessions)
+        servers[name].set_current_mcp(name)
+
+    def run(request: str, mcp_type: str, session_id: str) -> Optional[str]:
+        result = servers[mcp_type].process_request(request, session_id=session_id)
+        return result.get("message") if result.get("status") != "success" else None
+
+    return run
+
+
+TARGETS = {"mcp_server": core_target, "server": repl_target}
+
+
+class LoadTest:
+    """
+    Load generator for one target
+
+    With an arrival rate, conversations start on a Poisson schedule (open
+    loop) and queue for a free client, and the queueing counts toward their
+    latency. Without one, each of the clients starts its next conversation
+    as soon as the previous one finishes (closed loop).
+    """
+
+    def __init__(self, target: Target, fixtures: FixtureServer, clients: int = 8, arrival_rate: float = 0.0,
+                 think_time: float = 0.0, research_fraction: float = 0.5, sample_interval: float = 1.0,
+                 seed: int = 0):
+        """
+        Initialize the load test
+
+        Args:
+            target: Runs one conversation
+            fixtures: Stand-in backend the webscraping requests point at
+            clients: Conversations in flight at most
+            arrival_rate: New conversations per second (0 for a closed loop)
+            think_time: Mean seconds before a simulated user answers (exponentially distributed)
+            research_fraction: Share of conversations that are research requests
+            sample_interval: Seconds between memory samples
+            seed: Seed for the request mix, think times and arrivals
+        """
+        self.target = target
+        self.fixtures = fixtures
+        self.clients = clients
+        self.arrival_rate = arrival_rate
+        self.think_time = think_time
+        self.research_fraction = research_fraction
+        self.sample_interval = sample_interval
+        self.rng = random.Random(seed)
+        self.input = ScriptedInput()
+        self.latency = Histogram()
+        self.counters = {"started": 0, "completed": 0, "errors": 0}
+        self.errors: Dict[str, int] = {}
+        self.timeline: List[Dict[str, float]] = []
+        self._lock = threading.Lock()
+
+    def _conversation(self, number: int) -> Tuple[str, str, str, float]:
+        """(request, mcp type, answer, think time) for one conversation"""
+        think = self.rng.expovariate(1 / self.think_time) if self.think_time else 0.0
+        if self.rng.random() < self.research_fraction:
+            topic = self.rng.choice(TOPICS)
+            return f"I need information about {topic} (question {number})", "research", \
+                self.rng.choice(RESEARCH_ANSWERS), think
+        path = self.rng.choice(["/small", "/nested"])
+        return f"Scrape {self.fixtures.url(path)} for product data", "webscraping", \
+            self.rng.choice(WEBSCRAPING_ANSWERS), think
+
+    def _run_one(self, number: int, arrived: float, conversation: Tuple[str, str, str, float]) -> None:
+        request, mcp_type, answer, think = conversation
+        self.input.script(answer, think)
+        try:
+            error = self.target(request, mcp_type, f"load-{number}")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - arrived - self.input.thought
+        with self._lock:
+            self.latency.record(latency)
+            self.counters["completed"] += 1
+            if error:
+                self.counters["errors"] += 1
+                key = error.split(":", 1)[0][:60]
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def _sample_memory(self, start: float, stop: threading.Event) -> None:
+        while True:
+            with self._lock:
+                completed = self.counters["completed"]
+            self.timeline.append({"elapsed": time.perf_counter() - start, "rss_mb": rss_mb(), "completed": completed})
+            if stop.wait(self.sample_interval):
+                return
+
+    def run(self, conversations: int = 200, duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run conversations until the count or the duration is reached
+
+        Args:
+            conversations: Conversations to start
+            duration: Seconds after which no new conversations start
+
+        Returns:
+            Throughput, latency percentiles, errors and the memory timeline
+        """
+        free = threading.Semaphore(self.clients)
+        stop = threading.Event()
+        start = time.perf_counter()
+        sampler = threading.Thread(target=self._sample_memory, args=(start, stop), daemon=True)
+        sampler.start()
+        next_arrival = start
+
+        with self.input.installed(), ThreadPoolExecutor(max_workers=self.clients) as executor:
+            for number in range(conversations):
+                if duration is not None and time.perf_counter() - start >= duration:
+                    break
+                if self.arrival_rate:
+                    next_arrival += self.rng.expovariate(self.arrival_rate)
+                    time.sleep(max(0.0, next_arrival - time.perf_counter()))
+                    arrived = next_arrival
+                else:
+                    free.acquire()
+                    arrived = time.perf_counter()
+                conversation = self._conversation(number)
+                future = executor.submit(self._run_one, number, arrived, conversation)
+                if not self.arrival_rate:
+                    future.add_done_callback(lambda _: free.release())
+                self.counters["started"] += 1
+        elapsed = time.perf_counter() - start
+        stop.set()
+        sampler.join()
+        self.timeline.append({"elapsed": elapsed, "rss_mb": rss_mb(), "completed": self.counters["completed"]})
+
+        completed = self.counters["completed"]
+        return {
+            "clients": self.clients,
+            "arrival_rate": self.arrival_rate,
+            "think_time": self.think_time,
+            "research_fraction": self.research_fraction,
+            "elapsed_seconds": elapsed,
+            "conversations": completed,
+            "throughput_per_sec": completed / elapsed if elapsed else 0.0,
+            "latency": self.latency.summary(),
+            "errors": self.counters["errors"],
+            "error_rate": self.counters["errors"] / completed if completed else 0.0,
+            "error_types": dict(self.errors),
+            "rss_growth_mb": self.timeline[-1]["rss_mb"] - self.timeline[0]["rss_mb"],
+            "memory": self.timeline
+        }
+
+
+def run_load_test(target: str = "mcp_server", conversations: int = 200, duration: Optional[float] = None,
+                  **options: Any) -> Dict[str, Any]:
+    """
+    Start the stand-in backend and run a load test against one server code path
+
+    Args:
+        target: "mcp_server" or "server"
+        conversations: Conversations to start
+        duration: Seconds after which no new conversations start
+        **options: LoadTest options (clients, arrival_rate, think_time, ...)
+
+    Returns:
+        The load test report, with the target name
+    """
+    with FixtureServer(fixture_routes()) as fixtures:
+        http = HTTPClient(cache=None)
+        try:
+            mcps = local_mcps(http, fixtures.url("/w/api.php"))
+            load_test = LoadTest(TARGETS[target](mcps), fixtures, **options)
+            report = load_test.run(conversations, duration)
+        finally:
+            http.close()
+    return dict(report, target=target)
+
+
+def format_load_report(report: Dict[str, Any]) -> str:
+    """Render a load test report as text"""
+    latency = report["latency"]
+    lines = [
+        f"=== Load test: {report['target']} ({report['clients']} clients, "
+        f"{'closed loop' if not report['arrival_rate'] else str(report['arrival_rate']) + '/s arrivals'}, "
+        f"think {report['think_time']}s, {report['research_fraction']:.0%} research) ===",
+        f"conversations  {report['conversations']} in {report['elapsed_seconds']:.1f}s "
+        f"({report['throughput_per_sec']:.1f}/s)",
+        f"turn latency   p50 {latency['p50_ms']:.1f} ms  p99 {latency['p99_ms']:.1f} ms  max {latency['max_ms']:.1f} ms",
+        f"errors         {report['errors']} ({report['error_rate']:.1%})"
+        + "".join(f"\n  {name}: {count}" for name, count in report["error_types"].items()),
+        f"memory         {report['memory'][0]['rss_mb']:.1f} MB -> {report['memory'][-1]['rss_mb']:.1f} MB "
+        f"({report['rss_growth_mb']:+.1f} MB)"
+    ]
+    for sample in report["memory"]:
+        lines.append(f"  t={sample['elapsed']:6.1f}s  rss={sample['rss_mb']:7.1f} MB  completed={sample['completed']}")
+    return "\n".join(lines)
+
+
+def main():
+    """Run the load test"""
+    parser = argparse.ArgumentParser(description="Concurrent conversation load test")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="mcp_server", help="Server code path to drive")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent simulated clients")
+    parser.add_argument("--conversations", type=int, default=200, help="Conversations to run")
+    parser.add_argument("--duration", type=float, help="Stop starting conversations after this many seconds")
+    parser.add_argument("--rate", type=float, default=0.0, help="Arrivals per second (0 for a closed loop)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean seconds before each answer")
+    parser.add_argument("--research-fraction", type=float, default=0.5, help="Share of research conversations")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between memory samples")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the request mix and timings")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    # The server modules configure INFO logging when imported
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run_load_test(args.target, args.conversations, args.duration, clients=args.clients,
+                           arrival_rate=args.rate, think_time=args.think_time,
+                           research_fraction=args.research_fraction, sample_interval=args.sample_interval,
+                           seed=args.seed)
+    print(json.dumps(report, indent=2) if args.json else format_load_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+MCP Registry Module
+Imports and constructs each MCP only when it is first used, so a session
+that never scrapes never pays for Beautiful Soup and one that never calls
+out pays for neither requests nor the HTTP client.
+"""
+
+import importlib
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("MCPRegistry")
+
+
+class Lazy:
+    """A shared value built by `factory` on first call"""
+
+    __slots__ = ("_factory", "_value", "_lock")
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._value: Any = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> Any:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory()
+        return self._value
+
+    @property
+    def built(self) -> bool:
+        return self._value is not None
+
+
+class MCPRegistry(Mapping):
+    """
+    Read-only mapping of MCP name to MCP instance
+
+    Names and membership come from the registered factories; looking an MCP
+    up imports its module and constructs it the first time only.
+    """
+
+    def __init__(self, http_client: Optional[Lazy] = None):
+        """
+        Initialize an empty registry
+
+        Args:
+            http_client: The lazily built HTTP client the MCPs share
+        """
+        self.http_client = http_client
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register a zero-argument factory that imports and builds the MCP"""
+        self._factories[name] = factory
+
+    def __getitem__(self, name: str) -> Any:
+        mcp = self._instances.get(name)
+        if mcp is None:
+            factory = self._factories[name]
+            with self._lock:
+                mcp = self._instances.get(name)
+                if mcp is None:
+                    logger.info(f"Loading {name} MCP")
+                    mcp = self._instances[name] = factory()
+        return mcp
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._factories
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def loaded(self) -> List[str]:
+        """Names of the MCPs constructed so far"""
+        return list(self._instances)
+
+
+def _default_http_client() -> Any:
+    return importlib.import_module("http_client").HTTPClient()
+
+
+def default_registry(http_client: Optional[Any] = None,
+                     http_client_factory: Optional[Callable[[], Any]] = None,
+                     search_cache_factory: Optional[Callable[[], Any]] = None,
+                     job_store_factory: Optional[Callable[[], Any]] = None,
+                     parse_workers: int = 0,
+                     prefetch_workers: int = 4,
+                     resilience_policies: Optional[Dict[str, Any]] = None,
+                     legacy_webscraping: bool = False) -> MCPRegistry:
+    """
+    Build the registry of the research and webscraping MCPs
+
+    Args:
+        http_client: An HTTP client to share (skips building one)
+        http_client_factory: Builds the shared HTTP client on first use
+            (defaults to an HTTPClient with default settings)
+        search_cache_factory: Builds the research search cache on first use
+        job_store_factory: Builds the store recurring scrapes are recorded in on first use
+        parse_workers: Worker processes for parsing scraped pages (0 parses on the fetching threads)
+        prefetch_workers: Threads each MCP prefetches on while users answer; size it to the
+            server's worker count so concurrent turns are not queued behind each other
+        resilience_policies: ResiliencePolicy per MCP name, overriding that MCP's default
+            retry, hedging and circuit breaker settings
+        legacy_webscraping: Use mcp_webscraping's WebscrapingMCP, which only
+            describes a scraping plan, instead of the scraping one
+
+    Returns:
+        The registry; nothing is imported or built yet
+    """
+    if http_client is not None:
+        shared_client = Lazy(lambda: http_client)
+    else:
+        shared_client = Lazy(http_client_factory or _default_http_client)
+    registry = MCPRegistry(http_client=shared_client)
+
+    def resilience(name: str) -> Any:
+        policy = (resilience_policies or {}).get(name)
+        return importlib.import_module("resilience").Resilience(policy) if policy is not None else None
+
+    def prefetcher() -> Any:
+        return importlib.import_module("prefetch").Prefetcher(max_workers=prefetch_workers)
+
+    def research() -> Any:
+        search_cache = search_cache_factory() if search_cache_factory else None
+        return importlib.import_module("mcp_research").ResearchMCP(http_client=shared_client(),
+                                                                   search_cache=search_cache,
+                                                                   prefetcher=prefetcher(),
+                                                                   resilience=resilience("research"))
+
+    def webscraping() -> Any:
+        if legacy_webscraping:
+            return importlib.import_module("mcp_webscraping").WebscrapingMCP()
+        job_store = job_store_factory() if job_store_factory else None
+        parse_pool = importlib.import_module("parse_pool").ParsePool(parse_workers) if parse_workers else None
+        return importlib.import_module("enhanced_webscraping_mcp").WebscrapingMCP(http_client=shared_client(),
+                                                                                  job_store=job_store,
+                                                                                  parse_pool=parse_pool,
+                                                                                  prefetcher=prefetcher(),
+                                                                                  resilience=resilience("webscraping"))
+
+    registry.register("research", research)
+    registry.register("webscraping", webscraping)
+    return registry
@@ -6,44 +6,117 @@ Handles research-related context and interactions.
 
 import logging
 import json
+import re
+import uuid
 import requests
+from concurrent.futures import TimeoutError as FutureTimeout
 from typing import Dict, Any, List, Optional
 
+from concurrency import SingleFlight
+from deadline import Deadline, DeadlineExceeded
+from http_client import HTTPClient, get_default_client
+from metrics import METRICS
+from prefetch import Prefetcher
+from query_cache import TTLCache, clean_query, normalize_query
+from request_analysis import analyze
+from resilience import Resilience, ResiliencePolicy
+
 logger = logging.getLogger("ResearchMCP")
 
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+
+# A search response is small, so a slow one is given up on sooner than a page download
+SEARCH_RESILIENCE = ResiliencePolicy(max_attempts=2, timeout=(3.0, 5.0))
+
+# Seconds a search that found nothing is cached: long enough to absorb repeats,
+# short enough that a hiccup upstream does not blank the query for long
+EMPTY_SEARCH_TTL = 60.0
+
+# Words in an answer that only steer depth, sources or focus (or are filler) and
+# so do not change what should be searched for
+NON_SEARCH_WORDS = frozenset(
+    "basic simple advanced detailed in-depth intermediate moderate sources source references "
+    "citations academic scholarly research personal casual interest interested purposes purpose "
+    "level depth no without yes ok okay sure please just i i'm im want would like need it is be "
+    "the a an and or of for to in on with me my some any".split()
+)
+_ANSWER_WORD = re.compile(r"[\w'-]+")
+
 class ResearchMCP:
     """
     Research Model Context Protocol
     Manages context for research-related queries and responses.
     """
     
-    def __init__(self):
-        self.context = {
+    def __init__(self, http_client: Optional[HTTPClient] = None, search_cache: Optional[TTLCache] = None,
+                 api_url: str = WIKIPEDIA_API_URL, prefetcher: Optional[Prefetcher] = None,
+                 resilience: Optional[Resilience] = None, turn_budget: Optional[float] = 30.0,
+                 single_flight: Optional[SingleFlight] = None):
+        """
+        Initialize the Research MCP
+
+        Args:
+            http_client: Shared pooled HTTP client (defaults to the process-wide client)
+            search_cache: Cache of raw search results keyed by normalized query
+            api_url: MediaWiki search API endpoint
+            prefetcher: Background runner used to search while the user answers
+            resilience: Retries, hedging and circuit breaker for search requests
+                (defaults to SEARCH_RESILIENCE)
+            turn_budget: Seconds generate_response may spend searching before it answers
+                with what it has (None for no limit)
+            single_flight: Coalesces identical searches running at the same time into one request
+        """
+        self.http = http_client or get_default_client()
+        self.api_url = api_url
+        self.prefetcher = prefetcher or Prefetcher()
+        self.search_cache = search_cache if search_cache is not None else TTLCache()
+        self.resilience = resilience or Resilience(SEARCH_RESILIENCE)
+        self.turn_budget = turn_budget
+        self.single_flight = single_flight or SingleFlight("search")
+        self.context = self.new_context()
+        logger.info("Research MCP initialized")
+    
+    def new_context(self) -> Dict[str, Any]:
+        """Return the starting context for a new conversation"""
+        return {
             "topics": [],
             "depth": "standard",
             "sources_required": True,
-            "academic_focus": True
+            "academic_focus": True,
+            "conversation_id": uuid.uuid4().hex,
+            "prefetch_keys": []
         }
-        logger.info("Research MCP initialized")
     
-    def generate_question(self, user_input: str) -> str:
+    def generate_question(self, user_input: str, context: Optional[Dict[str, Any]] = None,
+                          prefetch: bool = True) -> str:
         """
         Generate a clarifying question based on the user's research request
         
         Args:
             user_input: The initial user request
+            context: Session context to use (defaults to this MCP's own context)
+            prefetch: Start work speculatively while the user answers (off when the
+                answer is already known, as in batch runs)
             
         Returns:
             A question to ask the user for more context
         """
+        context = self.context if context is None else context
+
+        # Start the search for the core query while the user answers
+        if prefetch:
+            self.start_prefetch(user_input, context)
+        
         # Analyze the user input to determine what clarification is needed
-        if "topic" in user_input.lower() or len(user_input.split()) < 5:
+        analysis = analyze(user_input)
+        hits = analysis.hits
+        if hits.has("research_question", "topic") or analysis.token_count < 5:
             return "Could you specify the exact research topic you're interested in?"
         
-        if "sources" in user_input.lower() or "reference" in user_input.lower():
+        if hits.has("research_question", "sources"):
             return "What type of sources would you prefer? (e.g., academic papers, books, websites)"
         
-        if "depth" in user_input.lower() or "detail" in user_input.lower():
+        if hits.has("research_question", "depth"):
             return "How in-depth would you like this research to be? (basic, intermediate, advanced)"
         
         # Default questions based on common research needs
@@ -60,25 +133,39 @@ class ResearchMCP:
         question_index = len(user_input) % len(questions)
         return questions[question_index]
     
-    def generate_response(self, original_request: str, user_answer: str) -> str:
+    def generate_response(self, original_request: str, user_answer: str, context: Optional[Dict[str, Any]] = None,
+                          deadline: Optional[Deadline] = None) -> str:
         """
         Generate a research response based on the original request and the user's answer
         
         Args:
             original_request: The initial user request
             user_answer: The user's answer to the clarifying question
+            context: Session context to use (defaults to this MCP's own context)
+            deadline: Time budget for the whole response (defaults to turn_budget from now)
             
         Returns:
             A research response with actual research information
         """
+        context = self.context if context is None else context
+        deadline = deadline or Deadline(self.turn_budget)
+
         # Update context based on user's answer
-        self._update_context(original_request, user_answer)
+        self._update_context(original_request, user_answer, context)
         
         # Combine the original request and user answer to create a research query
-        research_query = f"{original_request} {user_answer}"
+        research_query = self._research_query(original_request, user_answer)
+        
+        # Use the search prefetched while the user was answering if the query is unchanged, drop it otherwise
+        for key in context["prefetch_keys"]:
+            if key[-1] == normalize_query(research_query):
+                self.prefetcher.take(key, deadline=deadline)
+            else:
+                self.prefetcher.cancel(key)
+        context["prefetch_keys"] = []
         
         # Get actual research information
-        research_data = self._get_research_information(research_query)
+        research_data = self._get_research_information(research_query, context, deadline)
         
         # Generate a response with the actual research data
         response = f"Based on your interest in {original_request} and your clarification that {user_answer}, I've gathered the following research information:\n\n"
@@ -92,129 +179,113 @@ class ResearchMCP:
         
         # Add information about the research approach
         response += "**Research Approach**:\n"
-        response += f"- Depth level: {self.context['depth'].upper()}\n"
+        response += f"- Depth level: {context['depth'].upper()}\n"
         
-        if self.context["sources_required"]:
+        if context["sources_required"]:
             response += "- Sources have been included where available\n"
         
-        if self.context["academic_focus"]:
+        if context["academic_focus"]:
             response += "- Focus on academic and scholarly sources\n"
         else:
             response += "- Focus on general information and practical applications\n"
         
-        if self.context["topics"]:
-            response += f"- Key topics explored: {', '.join(self.context['topics'])}\n"
+        if context["topics"]:
+            response += f"- Key topics explored: {', '.join(context['topics'])}\n"
+        
+        if deadline.partial:
+            response += (f"- The {deadline.budget:g}s time budget ran out during {deadline.cut_short_in}; "
+                         "the findings above are what was found until then\n")
         
         return response
     
-    def _update_context(self, original_request: str, user_answer: str) -> None:
+    def start_prefetch(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Speculatively run the search for the original request before the user answers
+        
+        The result lands in the search cache, so _search picks it up if the final query matches.
+        
+        Args:
+            user_input: The initial user request
+            context: Session context to use (defaults to this MCP's own context)
+        """
+        context = self.context if context is None else context
+
+        key = ("search", context["conversation_id"], normalize_query(user_input))
+        self.prefetcher.submit(key, lambda cancelled: self._search(user_input))
+        context["prefetch_keys"] = [key]
+
+    def _research_query(self, original_request: str, user_answer: str) -> str:
+        """
+        Build the search query for a request and its clarification
+        
+        Answers that only pick a depth, source or focus (e.g. "basic, with sources")
+        add nothing worth searching for, so the original request is searched on its own.
+        
+        Args:
+            original_request: The initial user request
+            user_answer: The user's answer to the clarifying question
+            
+        Returns:
+            The research query
+        """
+        answer_words = _ANSWER_WORD.findall(user_answer.lower())
+        if all(word in NON_SEARCH_WORDS for word in answer_words):
+            return original_request
+        return f"{original_request} {user_answer}"
+
+    def _update_context(self, original_request: str, user_answer: str, context: Optional[Dict[str, Any]] = None) -> None:
         """
         Update the internal context based on user interactions
         
         Args:
             original_request: The initial user request
             user_answer: The user's answer to the clarifying question
+            context: Session context to use (defaults to this MCP's own context)
         """
-        # Extract potential topics from the original request and answer
-        words = set(original_request.lower().split() + user_answer.lower().split())
+        context = self.context if context is None else context
+
+        # Every depth, source and focus keyword in the answer is found in one pass
+        hits = analyze(user_answer).hits
         
         # Update depth based on user answer
-        if "basic" in user_answer.lower() or "simple" in user_answer.lower():
-            self.context["depth"] = "basic"
-        elif "advanced" in user_answer.lower() or "detailed" in user_answer.lower() or "in-depth" in user_answer.lower():
-            self.context["depth"] = "advanced"
-        elif "intermediate" in user_answer.lower() or "moderate" in user_answer.lower():
-            self.context["depth"] = "intermediate"
+        depth = hits.first("depth")
+        if depth:
+            context["depth"] = depth
         
         # Update sources requirement
-        if "no sources" in user_answer.lower() or "without references" in user_answer.lower():
-            self.context["sources_required"] = False
-        elif "sources" in user_answer.lower() or "references" in user_answer.lower() or "citations" in user_answer.lower():
-            self.context["sources_required"] = True
+        sources = hits.first("sources")
+        if sources:
+            context["sources_required"] = sources == "with"
         
         # Update academic focus
-        if "personal" in user_answer.lower() or "casual" in user_answer.lower():
-            self.context["academic_focus"] = False
-        elif "academic" in user_answer.lower() or "scholarly" in user_answer.lower() or "research" in user_answer.lower():
-            self.context["academic_focus"] = True
+        focus = hits.first("focus")
+        if focus:
+            context["academic_focus"] = focus == "academic"
             
-        logger.debug(f"Updated research context: {self.context}")
+        logger.debug(f"Updated research context: {context}")
         
-    def _get_research_information(self, query: str) -> str:
+    def _get_research_information(self, query: str, context: Optional[Dict[str, Any]] = None,
+                                  deadline: Optional[Deadline] = None) -> str:
         """
         Retrieve actual research information based on the query
         
         Args:
             query: The research query
+            context: Session context to use (defaults to this MCP's own context)
+            deadline: The turn's time budget
             
         Returns:
             A string containing the research information
         """
+        context = self.context if context is None else context
+
         try:
-            # Attempt to get research information from a public API
-            # For this implementation, we'll use the Wikipedia API as an example
-            # In a production environment, you might use academic APIs like Scopus, PubMed, etc.
-            
-            # Clean the query
-            clean_query = query.replace(' ', '%20')
-            
-            # Make a request to the Wikipedia API
-            url = f"https://en.wikipedia.org/w/api.php?action=query&list=search&srsearch={clean_query}&format=json&srlimit=3"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            results = self._search(query, deadline)
             
             # Process the results
-            if 'query' in data and 'search' in data['query'] and data['query']['search']:
-                results = data['query']['search']
-                
-                # Format the research information based on the depth
-                if self.context["depth"] == "advanced":
-                    # For advanced depth, provide more detailed information
-                    research_info = []
-                    for i, result in enumerate(results, 1):
-                        title = result.get('title', 'Unknown')
-                        snippet = result.get('snippet', '').replace('<span class="searchmatch">', '**').replace('</span>', '**')
-                        snippet = snippet.replace('<span class=\"searchmatch\">', '**').replace('</span>', '**')
-                        
-                        research_info.append(f"{i}. **{title}**")
-                        research_info.append(f"   {snippet}")
-                        if self.context["sources_required"]:
-                            research_info.append(f"   Source: Wikipedia - https://en.wikipedia.org/wiki/{title.replace(' ', '_')}")
-                        research_info.append("")
-                    
-                    return "\n".join(research_info)
-                
-                elif self.context["depth"] == "intermediate":
-                    # For intermediate depth, provide moderate information
-                    research_info = []
-                    for i, result in enumerate(results[:2], 1):
-                        title = result.get('title', 'Unknown')
-                        snippet = result.get('snippet', '').replace('<span class="searchmatch">', '**').replace('</span>', '**')
-                        snippet = snippet.replace('<span class=\"searchmatch\">', '**').replace('</span>', '**')
-                        
-                        research_info.append(f"{i}. **{title}**")
-                        research_info.append(f"   {snippet}")
-                    
-                    if self.context["sources_required"]:
-                        research_info.append("\nSources: Wikipedia and other academic resources")
-                    
-                    return "\n".join(research_info)
-                
-                else:  # basic depth
-                    # For basic depth, provide a simple summary
-                    result = results[0]
-                    title = result.get('title', 'Unknown')
-                    snippet = result.get('snippet', '').replace('<span class="searchmatch">', '**').replace('</span>', '**')
-                    snippet = snippet.replace('<span class=\"searchmatch\">', '**').replace('</span>', '**')
-                    
-                    research_info = [f"**{title}**: {snippet}"]
-                    
-                    if self.context["sources_required"]:
-                        research_info.append("\nSource: Wikipedia")
-                    
-                    return "\n".join(research_info)
+            if results:
+                with METRICS.time("format"):
+                    return self._format_results(results, context)
             
             return "No specific research information found for this query."
             
@@ -224,3 +295,136 @@ class ResearchMCP:
         except Exception as e:
             logger.error(f"Unexpected error during research: {str(e)}")
             return f"Unexpected error during research: {str(e)}"
+
+    def _search(self, query: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+        """
+        Run a Wikipedia search, serving repeated queries from the search cache
+        
+        Args:
+            query: The research query
+            deadline: The turn's time budget (the request's timeout is capped to it)
+            
+        Returns:
+            The raw search results
+            
+        Raises:
+            requests.exceptions.RequestException: If the search request fails or the deadline passes
+        """
+        # Normalize case, whitespace and URL encoding so equivalent queries share an entry
+        normalized = normalize_query(query)
+        results = self.search_cache.get(normalized)
+        if results is not None:
+            logger.debug(f"Search cache hit for query: {normalized}")
+            METRICS.count("search_cache_hits")
+            return results
+        
+        # Concurrent identical queries (a trending topic, or the prefetch and the
+        # final search of one turn) share a single request. A turn with less time left
+        # than the one that sent it stops waiting in time; one with more time left
+        # searches again (once) if the shared request ran out of the other turn's time.
+        key = ("search", normalized)
+        for attempt in range(2):
+            try:
+                return self.single_flight.do(key, lambda: self._fetch_search(query, normalized, deadline),
+                                             timeout=deadline.wait_timeout() if deadline else None)
+            except FutureTimeout:
+                deadline.cut_short("fetch")
+                raise DeadlineExceeded(f"Time budget ran out waiting for the search for '{normalized}' already running")
+            except DeadlineExceeded:
+                if deadline is None or deadline.expired() or attempt:
+                    if deadline is not None:
+                        deadline.cut_short("fetch")
+                    raise
+                logger.info(f"Shared search for '{normalized}' ran out of another turn's time; searching again")
+
+    def _fetch_search(self, query: str, normalized: str, deadline: Optional[Deadline]) -> List[Dict[str, Any]]:
+        """Send the search request for _search and cache its results under the normalized query"""
+        # A flight that landed just before this one started may have filled the cache
+        results = self.search_cache.get(normalized)
+        if results is not None:
+            return results
+        
+        # Attempt to get research information from a public API
+        # For this implementation, we'll use the Wikipedia API as an example
+        # In a production environment, you might use academic APIs like Scopus, PubMed, etc.
+        params = {
+            "action": "query",
+            "list": "search",
+            "srsearch": clean_query(query),
+            "format": "json",
+            "srlimit": 3
+        }
+        with METRICS.time("fetch"):
+            response = self.resilience.call(self.api_url, lambda: self.http.get(
+                self.api_url, params=params, timeout=self.resilience.policy.timeout, deadline=deadline), deadline)
+        response.raise_for_status()
+        
+        data = response.json()
+        if "error" in data:
+            # The API reports errors with a 200 status; they are not cached
+            error = data["error"]
+            detail = error.get("info", error.get("code")) if isinstance(error, dict) else error
+            raise requests.exceptions.RequestException(f"Search API error: {detail}")
+        results = data.get('query', {}).get('search', [])
+        self.search_cache.set(normalized, results, ttl=None if results else EMPTY_SEARCH_TTL)
+        return results
+    
+    def _format_results(self, results: List[Dict[str, Any]], context: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Format raw search results for the current depth
+        
+        Args:
+            results: The raw search results
+            context: Session context to use (defaults to this MCP's own context)
+            
+        Returns:
+            A string containing the research information
+        """
+        context = self.context if context is None else context
+
+        # Format the research information based on the depth
+        if context["depth"] == "advanced":
+            # For advanced depth, provide more detailed information
+            research_info = []
+            for i, result in enumerate(results, 1):
+                title = result.get('title', 'Unknown')
+                snippet = result.get('snippet', '').replace('<span class="searchmatch">', '**').replace('</span>', '**')
+                snippet = snippet.replace('<span class=\"searchmatch\">', '**').replace('</span>', '**')
+                
+                research_info.append(f"{i}. **{title}**")
+                research_info.append(f"   {snippet}")
+                if context["sources_required"]:
+                    research_info.append(f"   Source: Wikipedia - https://en.wikipedia.org/wiki/{title.replace(' ', '_')}")
+                research_info.append("")
+            
+            return "\n".join(research_info)
+        
+        elif context["depth"] == "intermediate":
+            # For intermediate depth, provide moderate information
+            research_info = []
+            for i, result in enumerate(results[:2], 1):
+                title = result.get('title', 'Unknown')
+                snippet = result.get('snippet', '').replace('<span class="searchmatch">', '**').replace('</span>', '**')
+                snippet = snippet.replace('<span class=\"searchmatch\">', '**').replace('</span>', '**')
+                
+                research_info.append(f"{i}. **{title}**")
+                research_info.append(f"   {snippet}")
+            
+            if context["sources_required"]:
+                research_info.append("\nSources: Wikipedia and other academic resources")
+            
+            return "\n".join(research_info)
+        
+        else:  # basic depth
+            # For basic depth, provide a simple summary
+            result = results[0]
+            title = result.get('title', 'Unknown')
+            snippet = result.get('snippet', '').replace('<span class="searchmatch">', '**').replace('</span>', '**')
+            snippet = snippet.replace('<span class=\"searchmatch\">', '**').replace('</span>', '**')
+            
+            research_info = [f"**{title}**: {snippet}"]
+            
+            if context["sources_required"]:
+                research_info.append("\nSource: Wikipedia")
+            
+            return "\n".join(research_info)
@@ -6,13 +6,14 @@ Manages multiple specialized MCPs and handles client requests.
 
 import logging
 import argparse
-import json
 import sys
 from typing import Dict, Any, List, Optional
 
-# Import specialized MCPs
-from mcp_research import ResearchMCP
-from mcp_webscraping import WebscrapingMCP
+# Specialized MCPs are imported by the registry on first use
+from mcp_registry import MCPRegistry, default_registry
+from metrics import METRICS, format_report
+from routing import determine_mcp_type
+from session_store import DEFAULT_SESSION, SessionStore
 
 # Configure logging
 logging.basicConfig(
@@ -31,26 +32,29 @@ class MCPServer:
     Manages multiple specialized MCPs and routes user requests to the appropriate one.
     """
     
-    def __init__(self, name: str = "Praneeth's MCP"):
+    def __init__(self, name: str = "Praneeth's MCP", http_client: Optional[Any] = None,
+                 sessions: Optional[SessionStore] = None, mcps: Optional[MCPRegistry] = None):
         """
         Initialize the MCP server with specialized MCPs
         
         Args:
             name: The name of the MCP server
+            http_client: Pooled HTTP client shared by the MCPs
+            sessions: Per-conversation context store
+            mcps: MCP registry (defaults to research and the plan-only webscraping MCP)
         """
         self.name = name
-        self.mcps = {
-            "research": ResearchMCP(),
-            "webscraping": WebscrapingMCP()
-        }
+        self.mcps = mcps or default_registry(http_client=http_client, legacy_webscraping=True)
+        self.sessions = sessions or SessionStore()
         logger.info(f"MCP Server '{name}' initialized with {len(self.mcps)} specialized MCPs")
     
-    def process_request(self, user_request: str) -> str:
+    def process_request(self, user_request: str, session_id: str = DEFAULT_SESSION) -> str:
         """
         Process a user request by routing it to the appropriate MCP
         
         Args:
             user_request: The user's request
+            session_id: The conversation the request belongs to
             
         Returns:
             A response to the user's request
@@ -61,9 +65,10 @@ class MCPServer:
         
         # Get the appropriate MCP
         mcp = self.mcps[mcp_type]
+        context = self.sessions.context(session_id, mcp_type, mcp.new_context)
         
         # Generate a clarifying question
-        question = mcp.generate_question(user_request)
+        question = METRICS.call("question", mcp.generate_question, user_request, context)
         logger.info(f"Generated clarifying question: {question}")
         
         # In a real implementation, we would wait for the user's answer
@@ -72,7 +77,7 @@ class MCPServer:
         user_answer = input("Your answer: ")
         
         # Generate a response based on the original request and the user's answer
-        response = mcp.generate_response(user_request, user_answer)
+        response = METRICS.call("response", mcp.generate_response, user_request, user_answer, context)
         logger.info("Generated response")
         
         return response
@@ -87,15 +92,7 @@ class MCPServer:
         Returns:
             The type of MCP to use (e.g., "research", "webscraping")
         """
-        user_request_lower = user_request.lower()
-        
-        # Check for webscraping-related keywords
-        webscraping_keywords = ["scrape", "extract data", "website data", "html", "web page", "crawler"]
-        if any(keyword in user_request_lower for keyword in webscraping_keywords):
-            return "webscraping"
-        
-        # Default to research for all other requests
-        return "research"
+        return determine_mcp_type(user_request)
 
 def main():
     """
@@ -110,7 +107,7 @@ def main():
     
     # Simple interactive loop
     print(f"Welcome to {server.name}!")
-    print("Type 'exit' to quit.")
+    print("Type 'stats' for timings and counters, 'exit' to quit.")
     
     while True:
         user_input = input("\nYour request: ")
@@ -119,6 +116,10 @@ def main():
             print("Goodbye!")
             break
         
+        if user_input.lower() == "stats":
+            print(format_report(METRICS.snapshot()))
+            continue
+        
         try:
             response = server.process_request(user_input)
             print(f"\nResponse: {response}")
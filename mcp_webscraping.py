@@ -6,11 +6,9 @@ Handles webscraping-related context and interactions.
 
 import logging
 from typing import Dict, Any, List, Optional
-import re
 import json
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+
+from request_analysis import analyze, analyze_turn
 
 logger = logging.getLogger("WebscrapingMCP")
 
@@ -21,36 +19,45 @@ class WebscrapingMCP:
     """
     
     def __init__(self):
-        self.context = {
+        self.context = self.new_context()
+        logger.info("Webscraping MCP initialized")
+    
+    def new_context(self) -> Dict[str, Any]:
+        """Return the starting context for a new conversation"""
+        return {
             "target_urls": [],
             "data_format": "json",
             "elements_to_extract": [],
             "pagination": False,
             "frequency": "once"
         }
-        logger.info("Webscraping MCP initialized")
     
-    def generate_question(self, user_input: str) -> str:
+    def generate_question(self, user_input: str, context: Optional[Dict[str, Any]] = None,
+                          prefetch: bool = True) -> str:
         """
         Generate a clarifying question based on the user's webscraping request
         
         Args:
             user_input: The initial user request
+            context: Session context to use (defaults to this MCP's own context)
+            prefetch: Accepted for interface compatibility; this MCP fetches nothing
             
         Returns:
             A question to ask the user for more context
         """
+        analysis = analyze(user_input)
+        hits = analysis.hits
+        
         # Check if URL is provided
-        url_pattern = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')
-        if not url_pattern.search(user_input) and "url" not in user_input.lower():
+        if not analysis.urls and not hits.has("scrape_question", "url"):
             return "What specific website or URL would you like to scrape data from?"
         
         # Check for data elements
-        if "extract" not in user_input.lower() and "scrape" in user_input.lower():
+        if not hits.has("scrape_question", "extract") and hits.has("scrape_question", "scrape"):
             return "What specific elements or data would you like to extract from the website? (e.g., product prices, article titles, images)"
         
         # Check for data format preference
-        if "format" not in user_input.lower() and "output" not in user_input.lower():
+        if not hits.has("scrape_question", "format"):
             return "In what format would you like the scraped data? (e.g., JSON, CSV, plain text)"
         
         # Default questions based on common webscraping needs
@@ -66,30 +73,32 @@ class WebscrapingMCP:
         question_index = len(user_input) % len(questions)
         return questions[question_index]
     
-    def generate_response(self, original_request: str, user_answer: str) -> str:
+    def generate_response(self, original_request: str, user_answer: str, context: Optional[Dict[str, Any]] = None) -> str:
         """
         Generate a webscraping response based on the original request and the user's answer
         
         Args:
             original_request: The initial user request
             user_answer: The user's answer to the clarifying question
+            context: Session context to use (defaults to this MCP's own context)
             
         Returns:
             A webscraping response
         """
+        context = self.context if context is None else context
+
         # Update context based on user's answer
-        self._update_context(original_request, user_answer)
+        self._update_context(original_request, user_answer, context)
         
         # Extract URL if present in either the original request or the answer
-        url_pattern = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')
-        url_match = url_pattern.search(original_request) or url_pattern.search(user_answer)
-        url = url_match.group(0) if url_match else "the specified website"
+        turn = analyze_turn(original_request, user_answer)
+        url = turn.urls[0] if turn.urls else "the specified website"
         
         # Generate a webscraping-style response
         response = f"Based on your request to scrape data from {url} "
         
-        if self.context["elements_to_extract"]:
-            elements = ", ".join(self.context["elements_to_extract"])
+        if context["elements_to_extract"]:
+            elements = ", ".join(context["elements_to_extract"])
             response += f"and extract {elements}, "
         
         response += "here's how we can approach this:\n\n"
@@ -98,11 +107,12 @@ class WebscrapingMCP:
         response += "1. **Web Scraping Approach**:\n"
         
         # Determine the appropriate library based on the complexity
-        if self.context["pagination"] or "login" in user_answer.lower() or "authenticate" in user_answer.lower():
+        needs_login = turn.answer.hits.has("auth", "login")
+        if context["pagination"] or needs_login:
             response += "   - We'll use Selenium with a headless browser to handle dynamic content"
-            if "login" in user_answer.lower() or "authenticate" in user_answer.lower():
+            if needs_login:
                 response += ", authentication, and session management"
-            if self.context["pagination"]:
+            if context["pagination"]:
                 response += ", including pagination across multiple pages"
             response += ".\n"
         else:
@@ -110,24 +120,24 @@ class WebscrapingMCP:
         
         # Data extraction strategy
         response += "2. **Data Extraction**:\n"
-        if self.context["elements_to_extract"]:
-            response += f"   - We'll target the following elements: {', '.join(self.context['elements_to_extract'])}.\n"
+        if context["elements_to_extract"]:
+            response += f"   - We'll target the following elements: {', '.join(context['elements_to_extract'])}.\n"
         else:
             response += "   - We'll extract the main content based on common HTML patterns and selectors.\n"
         
         # Data format
         response += "3. **Output Format**:\n"
-        response += f"   - The scraped data will be provided in {self.context['data_format'].upper()} format"
-        if self.context["data_format"] == "json":
+        response += f"   - The scraped data will be provided in {context['data_format'].upper()} format"
+        if context["data_format"] == "json":
             response += ", which is easily parseable and can be used in various applications"
-        elif self.context["data_format"] == "csv":
+        elif context["data_format"] == "csv":
             response += ", which is ideal for spreadsheet analysis and data processing"
         response += ".\n"
         
         # Scheduling if applicable
-        if self.context["frequency"] != "once":
+        if context["frequency"] != "once":
             response += "4. **Scheduling**:\n"
-            response += f"   - The scraping process will be scheduled to run {self.context['frequency']}.\n"
+            response += f"   - The scraping process will be scheduled to run {context['frequency']}.\n"
         
         # Legal and ethical considerations
         response += "\n**Important Considerations**:\n"
@@ -137,83 +147,62 @@ class WebscrapingMCP:
         
         return response
     
-    def _update_context(self, original_request: str, user_answer: str) -> None:
+    def _update_context(self, original_request: str, user_answer: str, context: Optional[Dict[str, Any]] = None) -> None:
         """
         Update the internal context based on user interactions
         
         Args:
             original_request: The initial user request
             user_answer: The user's answer to the clarifying question
+            context: Session context to use (defaults to this MCP's own context)
         """
+        context = self.context if context is None else context
+
+        # The turn is analyzed once; routing and the question stage already did the request's half
+        turn = analyze_turn(original_request, user_answer)
+        hits = turn.hits
+        
         # Extract URLs
-        url_pattern = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+')
-        urls = url_pattern.findall(original_request) + url_pattern.findall(user_answer)
-        if urls:
-            self.context["target_urls"] = list(set(urls))
+        if turn.urls:
+            context["target_urls"] = list(turn.urls)
         
         # Update data format preference
-        format_keywords = {
-            "json": ["json", "javascript", "object", "notation"],
-            "csv": ["csv", "comma", "excel", "spreadsheet"],
-            "xml": ["xml", "extensible", "markup"],
-            "text": ["text", "plain", "txt"],
-            "html": ["html", "webpage", "page"]
-        }
-        
-        combined_text = (original_request + " " + user_answer).lower()
-        for fmt, keywords in format_keywords.items():
-            if any(keyword in combined_text for keyword in keywords):
-                self.context["data_format"] = fmt
-                break
+        fmt = hits.first("format")
+        if fmt:
+            context["data_format"] = fmt
         
         # Extract elements to scrape
-        element_patterns = [
-            r"extract\s+([a-zA-Z\s,]+)",
-            r"scrape\s+([a-zA-Z\s,]+)",
-            r"get\s+([a-zA-Z\s,]+)",
-            r"collect\s+([a-zA-Z\s,]+)"
-        ]
-        
-        for pattern in element_patterns:
-            matches = re.search(pattern, combined_text)
-            if matches:
-                elements = matches.group(1).split(',')
-                elements = [e.strip() for e in elements if e.strip()]
-                if elements:
-                    self.context["elements_to_extract"] = elements
-                break
+        if turn.elements:
+            context["elements_to_extract"] = list(turn.elements)
         
         # Check for pagination
-        pagination_keywords = ["pagination", "multiple pages", "next page", "all pages"]
-        if any(keyword in combined_text for keyword in pagination_keywords):
-            self.context["pagination"] = True
+        if hits.any("pagination"):
+            context["pagination"] = True
         
         # Update frequency
-        frequency_mapping = {
-            "once": ["once", "one time", "single", "just once"],
-            "hourly": ["hourly", "every hour", "each hour"],
-            "daily": ["daily", "every day", "each day"],
-            "weekly": ["weekly", "every week", "each week"],
-            "monthly": ["monthly", "every month", "each month"]
-        }
-        
-        for freq, keywords in frequency_mapping.items():
-            if any(keyword in combined_text for keyword in keywords):
-                self.context["frequency"] = freq
-                break
+        frequency = hits.first("frequency")
+        if frequency:
+            context["frequency"] = frequency
                 
-        logger.debug(f"Updated webscraping context: {self.context}")
+        logger.debug(f"Updated webscraping context: {context}")
         
-    def _scrape_website(self, url: str) -> str:
+    def _scrape_website(self, url: str, context: Optional[Dict[str, Any]] = None) -> str:
         """
         Attempt to scrape data from the specified URL
         
         Args:
             url: The URL to scrape
+            context: Session context to use (defaults to this MCP's own context)
             
         Returns:
             A string containing the scraped data formatted according to the context
         """
+        context = self.context if context is None else context
+
+        # Only this method scrapes, so the HTTP and HTML libraries load on its first call
+        import requests
+        from bs4 import BeautifulSoup
+
         try:
             # Set a user agent to avoid being blocked
             headers = {
@@ -231,8 +220,8 @@ class WebscrapingMCP:
             extracted_data = {}
             
             # If specific elements are requested, try to extract them
-            if self.context["elements_to_extract"]:
-                for element in self.context["elements_to_extract"]:
+            if context["elements_to_extract"]:
+                for element in context["elements_to_extract"]:
                     # Try different strategies to find the elements
                     if "price" in element.lower():
                         # Look for common price patterns
@@ -281,9 +270,9 @@ class WebscrapingMCP:
                     extracted_data["Meta Description"] = meta_desc['content']
             
             # Format the data according to the preferred format
-            if self.context["data_format"] == "json":
+            if context["data_format"] == "json":
                 return json.dumps(extracted_data, indent=2)
-            elif self.context["data_format"] == "csv":
+            elif context["data_format"] == "csv":
                 csv_data = []
                 for key, values in extracted_data.items():
                     if isinstance(values, list):
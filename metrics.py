@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Metrics Module
+In-process latency histograms per request stage and per-host counters,
+cheap enough to leave on in production.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+# Histogram buckets grow by 10% from 10 microseconds, so percentiles are
+# accurate to within 10% from microseconds up to hours
+_MIN_SECONDS = 1e-5
+_GROWTH = 1.1
+_LOG_GROWTH = math.log(_GROWTH)
+_BUCKETS = 256
+
+# Per-host counters and the order they are reported in
+HOST_COUNTERS = ("requests", "bytes", "cache_hits", "errors")
+
+
+class Histogram:
+    """
+    Fixed log-scale latency histogram
+
+    Recording is a log, an index and a few additions; percentiles are read
+    from the bucket counts, so memory stays constant however many samples
+    are recorded.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        index = 0 if seconds <= _MIN_SECONDS else min(_BUCKETS - 1, int(math.log(seconds / _MIN_SECONDS) / _LOG_GROWTH) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (seconds) of the bucket holding the given fraction of samples"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.max, _MIN_SECONDS * _GROWTH ** index)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000
+        }
+
+
+class Metrics:
+    """
+    Stage latencies plus per-host and global counters
+
+    Every instrumented call site records into the process-wide METRICS;
+    `snapshot()` is what the REPL `stats` command and the JSON-RPC `stats`
+    method report.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Histogram] = {}
+        self._hosts: Dict[str, Dict[str, int]] = {}
+        self._counters: Dict[str, int] = {}
+        self._fan_in: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record one duration for a stage"""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.record(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time the block as one sample of the stage (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def call(self, stage: str, fn: Callable[..., Any], *args) -> Any:
+        """Call fn(*args), timing it as one sample of the stage (for handing to executors)"""
+        with self.time(stage):
+            return fn(*args)
+
+    def count(self, name: str, value: int = 1, host: Optional[str] = None) -> None:
+        """Add to a counter, per host when a host is given"""
+        with self._lock:
+            if host is None:
+                self._counters[name] = self._counters.get(name, 0) + value
+                return
+            counters = self._hosts.get(host)
+            if counters is None:
+                counters = self._hosts[host] = dict.fromkeys(HOST_COUNTERS, 0)
+            counters[name] = counters.get(name, 0) + value
+
+    def coalesced(self, group: str, shared: bool) -> None:
+        """Count one call to a single-flight group, and whether it shared a flight already in the air"""
+        with self._lock:
+            counts = self._fan_in.get(group)
+            if counts is None:
+                counts = self._fan_in[group] = [0, 0]
+            counts[0] += 1
+            if not shared:
+                counts[1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything recorded so far, as JSON-serializable data"""
+        with self._lock:
+            return {
+                "uptime_seconds": time.time() - self.started,
+                "stages": {stage: histogram.summary() for stage, histogram in self._stages.items()},
+                "hosts": {host: dict(counters) for host, counters in self._hosts.items()},
+                "counters": dict(self._counters),
+                "fan_in": {group: {"calls": calls, "flights": flights, "ratio": calls / flights if flights else 0.0}
+                           for group, (calls, flights) in self._fan_in.items()}
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._hosts.clear()
+            self._counters.clear()
+            self._fan_in.clear()
+            self.started = time.time()
+
+
+def format_report(snapshot: Dict[str, Any]) -> str:
+    """Render a snapshot as the plain-text tables the REPLs print"""
+    lines: List[str] = [f"Uptime: {snapshot['uptime_seconds']:.0f}s", "",
+                        f"{'stage':<20}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)"]
+    for stage, summary in sorted(snapshot["stages"].items()):
+        lines.append(f"{stage:<20}{summary['count']:>8}{summary['mean_ms']:>10.1f}{summary['p50_ms']:>10.1f}"
+                     f"{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}{summary['max_ms']:>10.1f}")
+    if snapshot["hosts"]:
+        lines += ["", f"{'host':<32}" + "".join(f"{name:>12}" for name in HOST_COUNTERS)]
+        for host, counters in sorted(snapshot["hosts"].items()):
+            lines.append(f"{host:<32}" + "".join(f"{counters.get(name, 0):>12}" for name in HOST_COUNTERS))
+    if snapshot.get("fan_in"):
+        lines += ["", f"{'single-flight':<20}{'calls':>10}{'flights':>10}{'fan-in':>10}"]
+        for group, fan_in in sorted(snapshot["fan_in"].items()):
+            lines.append(f"{group:<20}{fan_in['calls']:>10}{fan_in['flights']:>10}{fan_in['ratio']:>10.2f}")
+    if snapshot["counters"]:
+        lines += [""] + [f"{name}: {value}" for name, value in sorted(snapshot["counters"].items())]
+    return "\n".join(lines)
+
+
+# Process-wide metrics every instrumented module records into
+METRICS = Metrics()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Parse Pool Module
+Runs HTML parsing and extraction in worker processes, so scraping many
+pages uses every core instead of queueing on the GIL.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger("ParsePool")
+
+# Element lists compiled in every worker at startup, so the first pages do not pay for it
+WARM_ELEMENT_SETS = [(), ("prices", "product titles", "images", "description")]
+
+# Set in each worker by _init_worker
+_worker_backend: Optional[str] = None
+
+
+def _init_worker(backend: str) -> None:
+    """Import the parsing stack and compile the common plans once per worker"""
+    global _worker_backend
+    from extraction import compile_plan
+    from html_parsers import parse_html
+
+    _worker_backend = backend
+    soup = parse_html(b"<html><head><title>warm</title></head><body><p>warm</p></body></html>", backend,
+                      encoding="utf-8")
+    for elements in WARM_ELEMENT_SETS:
+        compile_plan(elements).run(soup)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def parse_and_extract(content: bytes, encoding: str, elements: Tuple[str, ...],
+                      partial_parsing: bool = True, backend: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Parse a page and run its extraction plan
+
+    This is the work shipped to the pool: the raw bytes go in and only the
+    extracted dict comes back, never the parse tree.
+
+    Args:
+        content: The page body
+        encoding: The page's encoding
+        elements: The elements to extract
+        partial_parsing: Parse only the subtrees the plan can extract from
+        backend: Parser backend (defaults to the worker's)
+
+    Returns:
+        The extracted data keyed by element name
+    """
+    from extraction import compile_plan
+    from html_parsers import parse_html
+
+    plan = compile_plan(tuple(elements))
+    strainer = plan.strainer() if partial_parsing else None
+    soup = parse_html(content, backend or _worker_backend, encoding=encoding, parse_only=strainer)
+    return plan.run(soup)
+
+
+class ParsePool:
+    """
+    Process pool for parse-plus-extract
+
+    Fetching stays on the caller's I/O threads (or event loop); only the
+    CPU-bound parse and extraction move to the workers. Workers are started
+    up front with the parsing modules imported and the common plans
+    compiled. They are started with forkserver (spawn where that is not
+    available), never by forking the multi-threaded server process.
+    """
+
+    def __init__(self, workers: Optional[int] = None, backend: Optional[str] = None,
+                 partial_parsing: bool = True):
+        """
+        Start and warm the workers
+
+        Args:
+            workers: Worker processes (defaults to the number of cores)
+            backend: HTML parser backend the workers use (defaults to the fastest installed one)
+            partial_parsing: Parse only the subtrees each plan can extract from
+        """
+        from html_parsers import select_backend
+
+        self.workers = workers or os.cpu_count() or 1
+        self.backend = select_backend(backend)
+        self.partial_parsing = partial_parsing
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                            initializer=_init_worker, initargs=(self.backend,))
+        # Make every worker start (and run its initializer) now rather than on the first pages
+        wait([self.executor.submit(_ready) for _ in range(self.workers)])
+        logger.info(f"Parse pool started ({self.workers} workers, backend={self.backend})")
+
+    def submit(self, content: bytes, encoding: str, elements: Tuple[str, ...]) -> Future:
+        """Queue a page; the future resolves to its extracted data"""
+        return self.executor.submit(parse_and_extract, content, encoding, tuple(elements), self.partial_parsing)
+
+    def extract(self, content: bytes, encoding: str, elements: Tuple[str, ...]) -> Dict[str, Any]:
+        """Parse and extract a page in a worker, blocking the calling thread until it is done"""
+        return self.submit(content, encoding, elements).result()
+
+    async def extract_async(self, content: bytes, encoding: str, elements: Tuple[str, ...]) -> Dict[str, Any]:
+        """Parse and extract a page in a worker without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(content, encoding, elements))
+
+    def close(self) -> None:
+        """Stop the workers"""
+        self.executor.shutdown(wait=True)
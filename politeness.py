@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Politeness Module
+Per-host rate limits, robots.txt rules and server back-off for every page
+the scrapers fetch, so fetching concurrently does not get us throttled or banned.
+"""
+
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import timezone
+from typing import Dict, Any, Callable, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from deadline import Deadline, DeadlineExceeded
+logger = logging.getLogger("Politeness")
+
+# Status codes whose Retry-After header tells us when the host will take requests again
+BACKOFF_STATUSES = (429, 503)
+
+# robots.txt files larger than this are cut off, as RFC 9309 allows
+MAX_ROBOTS_BYTES = 512 * 1024
+
+
+class RobotsDisallowed(requests.exceptions.RequestException):
+    """Raised for URLs the host's robots.txt does not allow us to fetch"""
+
+
+def host_key(url: str) -> str:
+    """The host a URL counts against (host and port, lowercased)"""
+    return urlparse(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds to wait according to a Retry-After header
+
+    Args:
+        value: The header value, either delay-seconds or an HTTP-date
+        now: Current wall-clock time (defaults to time.time())
+
+    Returns:
+        The delay in seconds (never negative), or None if the header is absent or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations
+
+    Tokens refill at `rate` per second up to `burst`. Taking a token when
+    none is left drives the balance negative and returns how long the
+    caller has to wait, so concurrent callers queue up one interval apart
+    instead of all waking at the same moment.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take one token; returns the seconds to wait before using it"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def delay(self, now: float) -> float:
+        """The seconds reserve() would ask a caller to wait, without taking a token"""
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - 1
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+
+class RobotsRules:
+    """One host's parsed robots.txt and when it has to be fetched again"""
+
+    __slots__ = ("parser", "expires_at", "status")
+
+    def __init__(self, parser: RobotFileParser, expires_at: float, status: int):
+        self.parser = parser
+        self.expires_at = expires_at
+        self.status = status
+
+
+class RobotsCache:
+    """
+    robots.txt per origin, fetched at most once per TTL
+
+    Concurrent lookups for a host whose rules are missing or stale wait for
+    one fetch; lookups for other hosts are not held up by it. Following
+    RFC 9309, a 4XX robots.txt allows everything, while a 5XX or an
+    unreachable one disallows everything until it is retried after `error_ttl`.
+    """
+
+    def __init__(self, http_client: Any, ttl: float = 3600.0, error_ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache
+
+        Args:
+            http_client: HTTPClient used to download robots.txt files
+            ttl: Seconds fetched rules are kept
+            error_ttl: Seconds before an unreachable robots.txt is tried again
+            clock: Monotonic time source
+        """
+        self.http = http_client
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.clock = clock
+        self._rules: Dict[str, RobotsRules] = {}
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def rules(self, url: str, deadline: Optional[Deadline] = None) -> RobotFileParser:
+        """
+        Return the robots.txt rules for the URL's origin, fetching them if needed
+
+        Raises:
+            DeadlineExceeded: If the deadline cut the robots.txt fetch short; nothing is cached then
+        """
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc.lower()}"
+        rules = self._rules.get(origin)
+        if rules is not None and rules.expires_at > self.clock():
+            return rules.parser
+
+        with self._lock:
+            host_lock = self._host_locks.setdefault(origin, threading.Lock())
+        with host_lock:
+            rules = self._rules.get(origin)
+            if rules is None or rules.expires_at <= self.clock():
+                rules = self._rules[origin] = self._fetch(origin, deadline)
+        return rules.parser
+
+    def _fetch(self, origin: str, deadline: Optional[Deadline] = None) -> RobotsRules:
+        parser = RobotFileParser(origin + "/robots.txt")
+        with self._lock:
+            self.fetches += 1
+        try:
+            page = self.http.fetch(origin + "/robots.txt", max_bytes=MAX_ROBOTS_BYTES, deadline=deadline)
+            status = page.status_code
+        except requests.exceptions.RequestException as e:
+            if deadline is not None and deadline.expired():
+                # One turn running out of time says nothing about the host, so no rules are cached for it
+                deadline.cut_short("fetch")
+                raise DeadlineExceeded(f"Time budget ran out while fetching {origin}/robots.txt") from e
+            logger.warning(f"Could not fetch {origin}/robots.txt: {str(e)}")
+            parser.disallow_all = True
+            return RobotsRules(parser, self.clock() + self.error_ttl, 0)
+
+        if page.truncated and deadline is not None and deadline.expired():
+            raise DeadlineExceeded(f"Time budget ran out while fetching {origin}/robots.txt")
+        if status >= 500:
+            logger.warning(f"{origin}/robots.txt returned {status}; treating the host as disallowed for now")
+            parser.disallow_all = True
+            return RobotsRules(parser, self.clock() + self.error_ttl, status)
+        if status >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(page.text.splitlines())
+        parser.modified()
+        return RobotsRules(parser, self.clock() + self.ttl, status)
+
+
+class HostState:
+    """Rate limit and back-off state of one host"""
+
+    __slots__ = ("bucket", "blocked_until", "rules")
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.blocked_until = 0.0
+        self.rules: Optional[RobotFileParser] = None
+
+
+class PolitenessScheduler:
+    """
+    Per-host request scheduler
+
+    Each host gets its own token bucket, slowed down to its robots.txt
+    Crawl-delay or Request-rate when those are stricter than our own limit,
+    and paused until the time a 429/503 Retry-After names. Waiting happens
+    only in the thread fetching from that host, so with the fan-out
+    interleaving hosts, requests to other hosts keep going at full speed
+    while a slow or throttling host waits its turn.
+    """
+
+    def __init__(self, http_client: Any, rate: float = 2.0, burst: int = 4,
+                 robots_agent: str = "PraneethMCP", respect_robots: bool = True,
+                 robots_ttl: float = 3600.0, max_retry_after: float = 120.0,
+                 max_retries: int = 1, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Initialize the scheduler
+
+        Args:
+            http_client: HTTPClient the pages (and robots.txt files) are fetched with
+            rate: Requests per second allowed to any one host
+            burst: Requests a host may get back to back before the rate applies
+            robots_agent: Product token matched against robots.txt User-agent lines
+            respect_robots: Check robots.txt rules and delays before fetching
+            robots_ttl: Seconds a host's robots.txt is cached
+            max_retry_after: Longest Retry-After we wait out and retry; longer ones fail the fetch
+            max_retries: Retries of a fetch answered with 429/503 and a usable Retry-After
+            clock: Monotonic time source
+            sleep: Blocks the calling thread for a number of seconds
+        """
+        self.http = http_client
+        self.rate = rate
+        self.burst = burst
+        self.robots_agent = robots_agent
+        self.robots = RobotsCache(http_client, ttl=robots_ttl, clock=clock) if respect_robots else None
+        self.max_retry_after = max_retry_after
+        self.max_retries = max_retries
+        self.clock = clock
+        self.sleep = sleep
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "delayed": 0, "disallowed": 0, "retry_after": 0}
+        self.waited = 0.0
+
+    def _host(self, url: str, rules: Optional[RobotFileParser] = None) -> HostState:
+        """
+        Return the URL host's state (call with the lock held)
+
+        The bucket is created on first use and re-tuned whenever the host's
+        robots.txt has been fetched again.
+        """
+        host = host_key(url)
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(TokenBucket(self.rate, self.burst, self.clock()))
+        if rules is not None and rules is not state.rules:
+            state.rules = rules
+            rate, burst = self.rate, self.burst
+            crawl_delay = rules.crawl_delay(self.robots_agent)
+            request_rate = rules.request_rate(self.robots_agent)
+            if crawl_delay:
+                rate, burst = min(rate, 1.0 / float(crawl_delay)), 1
+            # "Request-rate: 1/0" names no usable interval, so it is ignored
+            if request_rate and request_rate.requests and request_rate.seconds > 0:
+                rate, burst = min(rate, request_rate.requests / request_rate.seconds), 1
+            state.bucket.rate, state.bucket.burst = rate, burst
+            state.bucket.tokens = min(state.bucket.tokens, burst)
+        return state
+
+    def allowed(self, url: str) -> bool:
+        """Whether robots.txt lets us fetch the URL"""
+        return self.robots is None or self.robots.rules(url).can_fetch(self.robots_agent, url)
+
+    def wait(self, url: str, deadline: Optional[Deadline] = None) -> float:
+        """
+        Block until the URL's host may be sent another request
+
+        Args:
+            url: The URL about to be fetched
+            deadline: The turn's time budget; a wait that would outlast it is not started
+
+        Returns:
+            The seconds waited
+
+        Raises:
+            RobotsDisallowed: If robots.txt does not allow the URL
+            DeadlineExceeded: If the host's schedule would only allow the request after the deadline
+                (no token is taken then), or robots.txt could not be fetched in time
+        """
+        # robots.txt is fetched before taking the lock so one slow host does not stall the others
+        rules = self.robots.rules(url, deadline) if self.robots is not None else None
+        if rules is not None and not rules.can_fetch(self.robots_agent, url):
+            with self._lock:
+                self.counters["disallowed"] += 1
+            raise RobotsDisallowed(f"robots.txt disallows {url}")
+
+        with self._lock:
+            state = self._host(url, rules)
+            now = self.clock()
+            blocked = state.blocked_until - now
+            # A request the deadline rules out gives up before taking a token, leaving
+            # the host's schedule as it was for the requests that can still use it
+            if deadline is not None:
+                delay = max(state.bucket.delay(now), blocked)
+                if delay > 0 and delay >= deadline.remaining():
+                    deadline.cut_short("fetch")
+                    raise DeadlineExceeded(f"{host_key(url)} can only be fetched again in {delay:.1f}s, "
+                                           "after the time budget runs out")
+            delay = max(state.bucket.reserve(now), blocked)
+            self.counters["requests"] += 1
+            if delay > 0:
+                self.counters["delayed"] += 1
+                self.waited += delay
+        if delay <= 0:
+            return 0.0
+        logger.debug(f"Waiting {delay:.2f}s before fetching {url}")
+        self.sleep(delay)
+        return delay
+
+    def observe(self, url: str, status_code: int, headers: Any) -> Optional[float]:
+        """
+        Record a response, pausing its host if it asked us to back off
+
+        Args:
+            url: The URL that was fetched
+            status_code: The response status
+            headers: The response headers
+
+        Returns:
+            The Retry-After delay in seconds, if the response carried one we honor
+        """
+        if status_code not in BACKOFF_STATUSES:
+            return None
+        delay = parse_retry_after(headers.get("Retry-After"))
+        if delay is None:
+            return None
+        with self._lock:
+            state = self._host(url)
+            state.blocked_until = max(state.blocked_until, self.clock() + min(delay, self.max_retry_after))
+            self.counters["retry_after"] += 1
+        logger.warning(f"{host_key(url)} answered {status_code}; backing off for {delay:.1f}s")
+        return delay
+
+    def fetch(self, url: str, deadline: Optional[Deadline] = None, **kwargs) -> Any:
+        """
+        Fetch a page with HTTPClient.fetch once the host's schedule allows it
+
+        A fresh copy in the client's response cache is returned at once: it
+        sends the host nothing, so it needs no token. A 429/503 with a
+        Retry-After of at most `max_retry_after` is retried
+        after that delay (up to `max_retries` times, and only if the deadline
+        leaves time for it); otherwise the response is returned as-is for the
+        caller's raise_for_status().
+
+        Args:
+            url: The URL to fetch
+            deadline: The turn's time budget, passed on to the waits and the download
+            **kwargs: Passed on to HTTPClient.fetch
+
+        Returns:
+            The fetched page
+
+        Raises:
+            RobotsDisallowed: If robots.txt does not allow the URL
+            DeadlineExceeded: If the deadline passes before the page can be requested
+        """
+        page = self.http.cached(url, kwargs.get("headers"))
+        if page is not None:
+            return page
+        attempt = 0
+        while True:
+            self.wait(url, deadline)
+            page = self.http.fetch(url, deadline=deadline, **kwargs)
+            if page.from_cache:
+                return page
+            delay = self.observe(url, page.status_code, page.headers)
+            if delay is None or delay > self.max_retry_after or attempt >= self.max_retries:
+                return page
+            if deadline is not None and delay >= deadline.remaining():
+                return page
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, hosts=len(self._hosts), waited_seconds=round(self.waited, 3),
+                        robots_fetches=self.robots.fetches if self.robots is not None else 0)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Prefetch Module
+Runs speculative work in the background while the user answers the
+clarifying question.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Callable, Hashable, Optional, Tuple
+
+from deadline import Deadline
+
+logger = logging.getLogger("Prefetcher")
+
+# Seconds take() waits past the turn's deadline for a prefetch to hand over
+# what it had when the deadline cut it short
+HANDOFF_GRACE = 0.25
+
+
+class Prefetcher:
+    """
+    Keyed background task runner
+    Tasks receive a cancellation event they should check while working.
+    A task may also be given a deadline of its own (unlimited at first); the
+    turn that claims it tightens it to the turn's, so a slow prefetch stops
+    in time to hand over a partial result instead of outliving the turn.
+    Results are claimed once with take(); unclaimed ones expire after `ttl`.
+    Keys should name the conversation as well as the work, so one
+    conversation can never claim or cancel another's prefetch.
+    """
+
+    def __init__(self, max_workers: int = 4, ttl: float = 120.0, max_entries: int = 256):
+        """
+        Initialize the prefetcher
+
+        Args:
+            max_workers: Background threads available for prefetching
+            ttl: Seconds an unclaimed result is kept
+            max_entries: Maximum number of outstanding prefetches
+        """
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._tasks: Dict[Hashable, Tuple[Future, threading.Event, float, Optional[Deadline]]] = {}
+        self._lock = threading.Lock()
+        self.counters = {"submitted": 0, "used": 0, "cancelled": 0, "expired": 0, "failed": 0}
+
+    def submit(self, key: Hashable, fn: Callable[[threading.Event], Any],
+               deadline: Optional[Deadline] = None) -> None:
+        """
+        Start fn(cancelled_event) in the background unless the key is already in flight
+
+        Args:
+            key: Identifies the conversation and the work (e.g. ("page", conversation_id, url))
+            fn: The work to run
+            deadline: The deadline fn works under, tightened to the claiming turn's by take()
+        """
+        with self._lock:
+            self._expire()
+            if key in self._tasks or len(self._tasks) >= self.max_entries:
+                return
+            cancelled = threading.Event()
+            future = self._pool.submit(fn, cancelled)
+            self._tasks[key] = (future, cancelled, time.monotonic() + self.ttl, deadline)
+            self.counters["submitted"] += 1
+        logger.debug(f"Prefetch started for {key}")
+
+    def take(self, key: Hashable, timeout: Optional[float] = None,
+             deadline: Optional[Deadline] = None) -> Optional[Any]:
+        """
+        Claim a prefetched result, waiting for it if it is still running
+
+        With a deadline, the task's own deadline is tightened to it and the
+        wait lasts until it passes plus HANDOFF_GRACE, so a prefetch cut short
+        by it still hands over what it had; the deadline then records the
+        stage the prefetch was cut short in. A prefetch still queued for a
+        worker is cancelled rather than waited for, and one that does not
+        finish within the wait is cancelled too, so it stops downloading for
+        a result nobody will claim any more.
+
+        Args:
+            key: The key the work was submitted under
+            timeout: Maximum seconds to wait for a running prefetch (without a deadline)
+            deadline: The claiming turn's time budget
+
+        Returns:
+            The result, or None if nothing usable was prefetched
+        """
+        with self._lock:
+            task = self._tasks.pop(key, None)
+        if task is None:
+            return None
+        future, cancelled, _, task_deadline = task
+        if future.cancel():
+            # Still queued behind other prefetches: the caller is better off fetching itself
+            cancelled.set()
+            logger.debug(f"Prefetch for {key} had not started; cancelled")
+            with self._lock:
+                self.counters["cancelled"] += 1
+            return None
+        if deadline is not None:
+            if task_deadline is not None:
+                task_deadline.tighten(deadline.expires_at)
+            remaining = deadline.wait_timeout()
+            timeout = None if remaining is None else remaining + HANDOFF_GRACE
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeout:
+            cancelled.set()
+            future.cancel()
+            logger.debug(f"Prefetch for {key} still running after {timeout}s; cancelled")
+            with self._lock:
+                self.counters["cancelled"] += 1
+            return None
+        except Exception as e:
+            logger.debug(f"Prefetch for {key} not usable: {str(e)}")
+            with self._lock:
+                self.counters["failed"] += 1
+            return None
+        with self._lock:
+            self.counters["used" if result is not None else "failed"] += 1
+        if result is not None and deadline is not None and task_deadline is not None and task_deadline.partial:
+            deadline.cut_short(task_deadline.cut_short_in)
+        return result
+
+    def cancel(self, key: Hashable) -> None:
+        """Drop a prefetch that no longer applies, stopping it if it has not finished"""
+        with self._lock:
+            task = self._tasks.pop(key, None)
+            if task is None:
+                return
+            self.counters["cancelled"] += 1
+        future, cancelled, _, _ = task
+        cancelled.set()
+        future.cancel()
+        logger.debug(f"Prefetch cancelled for {key}")
+
+    def _expire(self) -> None:
+        """Cancel results nobody claimed in time (lock held)"""
+        now = time.monotonic()
+        for key in [key for key, (_, _, expires_at, _) in self._tasks.items() if expires_at <= now]:
+            future, cancelled, _, _ = self._tasks.pop(key)
+            cancelled.set()
+            future.cancel()
+            self.counters["expired"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._tasks))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for future, cancelled, _, _ in self._tasks.values():
+                cancelled.set()
+                future.cancel()
+            self._tasks.clear()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Query Cache Module
+In-process TTL/LRU memoization of search results, optionally backed by SQLite.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import unquote
+
+logger = logging.getLogger("QueryCache")
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def clean_query(query: str) -> str:
+    """
+    A query as the user meant it: hand-built `%XX` escapes (e.g. `%20`) decoded
+    and runs of whitespace collapsed, with case and literal '+' signs kept
+
+    Args:
+        query: The raw query
+
+    Returns:
+        The cleaned query
+    """
+    return _WHITESPACE.sub(' ', unquote(query)).strip()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query so equivalent queries share a cache entry
+
+    Cleans the query (see clean_query) and lowercases it. Only `%XX` escapes
+    are decoded, so "C++" keeps its plus signs.
+
+    Args:
+        query: The raw query
+
+    Returns:
+        The normalized query
+    """
+    return clean_query(query).lower()
+
+
+class SQLiteStore:
+    """
+    Persistent key/value store for cached query results
+    Pruned every `prune_every` writes: expired rows go first, then the rows
+    closest to expiry until at most `max_entries` are left.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, prune_every: int = 100):
+        """
+        Open (or create) the store
+
+        Args:
+            path: SQLite database file
+            max_entries: Rows kept after a prune
+            prune_every: Writes between prunes
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        # The store may be the first thing to use a fresh cache directory
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS queries (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS queries_expires_at ON queries (expires_at)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) for an unexpired key, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT value, expires_at FROM queries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO queries VALUES (?, ?, ?)", (key, json.dumps(value), expires_at))
+            self._writes += 1
+            if self._writes % self.prune_every == 0:
+                self._prune()
+            self._db.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows (and the soonest to expire beyond max_entries); returns how many were removed"""
+        with self._lock:
+            removed = self._prune()
+            self._db.commit()
+        return removed
+
+    def _prune(self) -> int:
+        """Delete expired rows, then the soonest to expire beyond max_entries (lock held)"""
+        removed = self._db.execute("DELETE FROM queries WHERE expires_at <= ?", (time.time(),)).rowcount
+        excess = self._db.execute("SELECT COUNT(*) FROM queries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            removed += self._db.execute(
+                "DELETE FROM queries WHERE key IN (SELECT key FROM queries ORDER BY expires_at LIMIT ?)", (excess,)
+            ).rowcount
+        if removed:
+            logger.debug(f"Pruned {removed} rows from {self.path}")
+        return removed
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a TTL
+    Bounded by both entry count and the approximate serialized size of the values.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 1024,
+                 max_bytes: int = 16 * 1024 * 1024, store: Optional[SQLiteStore] = None):
+        """
+        Initialize the cache
+
+        Args:
+            ttl: Seconds an entry stays valid
+            max_entries: Maximum number of in-memory entries
+            max_bytes: Maximum approximate size of in-memory values
+            store: Optional persistent second level consulted on in-memory misses
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "store_hits": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None on a miss or expiry"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[0]
+                self._remove(key)
+
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None:
+                value, expires_at = stored
+                with self._lock:
+                    self.counters["store_hits"] += 1
+                    self._insert(key, value, expires_at)
+                return value
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache a value for `ttl` seconds (defaults to the configured TTL)"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._insert(key, value, expires_at)
+        if self.store is not None:
+            self.store.set(key, value, expires_at)
+
+    def _insert(self, key: str, value: Any, expires_at: float) -> None:
+        """Insert an entry and evict down to the bounds (lock held)"""
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires_at, size)
+        self._size += size
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), size_bytes=self._size)
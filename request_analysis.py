@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Request Analysis Module
+Analyzes a request (and its clarification) once per turn; routing and the
+MCPs read the result instead of re-running their own regexes and scans.
+"""
+
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Tuple
+
+from keyword_matcher import MATCHER, KeywordHits
+
+# Matches the scheme, host and port, plus any path/query up to whitespace or a quote
+URL_PATTERN = re.compile(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+(?::\d+)?(?:[/?#][^\s<>"\']*)?')
+
+# Phrases naming the elements to scrape, in priority order; run on the lowercased turn text
+ELEMENT_PATTERNS = [
+    re.compile(r"extract\s+([a-zA-Z\s,]+)"),
+    re.compile(r"scrape\s+([a-zA-Z\s,]+)"),
+    re.compile(r"get\s+([a-zA-Z\s,]+)"),
+    re.compile(r"collect\s+([a-zA-Z\s,]+)")
+]
+
+
+def find_urls(text: str) -> List[str]:
+    """Return every URL in the text, with trailing sentence punctuation removed"""
+    return [url.rstrip('.,;:!?)') for url in URL_PATTERN.findall(text)]
+
+
+def find_elements(lowered_text: str) -> Tuple[str, ...]:
+    """Element names from the first element phrase in the text (empty if none names any)"""
+    for pattern in ELEMENT_PATTERNS:
+        match = pattern.search(lowered_text)
+        if match:
+            return tuple(e.strip() for e in match.group(1).split(',') if e.strip())
+    return ()
+
+
+class RequestAnalysis(NamedTuple):
+    """
+    Everything routing and the MCPs need to know about one piece of text
+
+    The keyword hits resolve lazily and remember their answers, so callers
+    sharing an analysis share the lookups too.
+    """
+    text: str
+    urls: Tuple[str, ...]
+    hits: KeywordHits
+    token_count: int
+
+
+class TurnAnalysis(NamedTuple):
+    """A request and the answer to its clarifying question, analyzed together"""
+    request: RequestAnalysis
+    answer: RequestAnalysis
+    urls: Tuple[str, ...]
+    hits: KeywordHits
+    elements: Tuple[str, ...]
+
+
+@lru_cache(maxsize=64)
+def analyze(text: str) -> RequestAnalysis:
+    """
+    Analyze a request, or an answer, once
+
+    Args:
+        text: The text to analyze
+
+    Returns:
+        Its URLs (deduplicated, in order of appearance), keyword hits and token count
+    """
+    return RequestAnalysis(
+        text=text,
+        urls=tuple(dict.fromkeys(find_urls(text))),
+        hits=MATCHER.scan(text),
+        token_count=len(text.split())
+    )
+
+
+@lru_cache(maxsize=64)
+def analyze_turn(original_request: str, user_answer: str) -> TurnAnalysis:
+    """
+    Analyze a request together with the answer to its clarifying question
+
+    The request's own analysis is reused from the question stage, so only
+    the answer, the seam between the two and the element phrases are new work.
+
+    Args:
+        original_request: The initial user request
+        user_answer: The user's answer to the clarifying question
+
+    Returns:
+        The combined analysis
+    """
+    request, answer = analyze(original_request), analyze(user_answer)
+    return TurnAnalysis(
+        request=request,
+        answer=answer,
+        urls=tuple(dict.fromkeys(request.urls + answer.urls)),
+        hits=MATCHER.join(request.hits, answer.hits),
+        elements=find_elements(request.hits.text + " " + answer.hits.text)
+    )
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Resilience Module
+Retries with jittered exponential backoff, hedged requests and per-host
+circuit breakers around the GETs the MCPs send, so a slow or dead host
+costs one fast failure instead of a full timeout for every user.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Dict, Any, Callable, NamedTuple, Optional, Tuple, TypeVar
+
+import requests
+
+from deadline import Deadline, DeadlineExceeded
+from metrics import Histogram, METRICS
+from politeness import host_key
+
+logger = logging.getLogger("Resilience")
+
+T = TypeVar("T")
+
+# Network failures worth another attempt; other RequestExceptions (bad URLs,
+# robots.txt refusals, open circuits) would fail the same way again. An expired
+# deadline (a Timeout subclass) is never retried.
+RETRYABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(requests.exceptions.RequestException):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+
+class ResiliencePolicy(NamedTuple):
+    """
+    How hard to try one GET
+
+    Attributes:
+        max_attempts: Attempts per GET, the first one included
+        backoff_base: Cap (seconds) of the first retry's randomized delay; it doubles per retry
+        backoff_max: Largest cap of a retry's randomized delay
+        retry_statuses: Response statuses retried like network errors
+        timeout: (connect, read) timeout per attempt (None keeps the HTTP client's)
+        hedge_after: Latency percentile of the host after which a second request is sent
+            (None disables hedging)
+        hedge_initial_delay: Hedge delay until the host has hedge_min_samples latencies
+        hedge_min_delay: Shortest hedge delay, however fast the host usually is
+        hedge_min_samples: Latencies recorded before the percentile is trusted
+        failure_threshold: Consecutive failures that open a host's circuit
+        reset_timeout: Seconds an open circuit fails fast before one probe is let through
+    """
+    max_attempts: int = 3
+    backoff_base: float = 0.2
+    backoff_max: float = 5.0
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    timeout: Optional[Tuple[float, float]] = None
+    hedge_after: Optional[float] = None
+    hedge_initial_delay: float = 1.0
+    hedge_min_delay: float = 0.05
+    hedge_min_samples: int = 20
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+def backoff_delay(retry: int, policy: ResiliencePolicy, rng: random.Random) -> float:
+    """Delay before the given retry (0-based): uniform between 0 and the exponential cap ("full jitter")"""
+    return rng.uniform(0.0, min(policy.backoff_max, policy.backoff_base * 2 ** retry))
+
+
+class CircuitBreaker:
+    """
+    One host's circuit
+
+    Closed, requests flow and consecutive failures are counted. At the
+    threshold the circuit opens and requests fail fast. After the reset
+    timeout it is half-open: a single probe is let through, whose success
+    closes the circuit and whose failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float]):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the probe when half-open)"""
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def release(self) -> None:
+        """Give back a half-open probe whose outcome says nothing about the host's health"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True if it opened the circuit"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = self.clock()
+                return True
+            return False
+
+
+class Resilience:
+    """
+    Retry, hedging and circuit-breaking wrapper for idempotent GETs
+
+    Each MCP owns one, built from its own policy. `call(url, send)` runs
+    send() (which performs one GET and returns a Response or FetchedPage)
+    as often as the policy allows and the URL's host is healthy.
+    """
+
+    def __init__(self, policy: Optional[ResiliencePolicy] = None, hedge_workers: int = 16,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 rng: Optional[random.Random] = None):
+        """
+        Initialize the wrapper
+
+        Args:
+            policy: Retry, hedge and breaker settings (defaults to ResiliencePolicy())
+            hedge_workers: Threads running primary and hedged requests when hedging is on
+            clock: Monotonic time source
+            sleep: Blocks the calling thread for a number of seconds
+            rng: Source of backoff jitter
+        """
+        self.policy = policy or ResiliencePolicy()
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.executor = (ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="hedge")
+                         if self.policy.hedge_after is not None else None)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0,
+                         "short_circuited": 0, "hedges": 0, "hedge_wins": 0}
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """The circuit breaker of the URL's host"""
+        host = host_key(url)
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.policy.failure_threshold,
+                                                                self.policy.reset_timeout, self.clock)
+            return breaker
+
+    def call(self, url: str, send: Callable[[], T], deadline: Optional[Deadline] = None) -> T:
+        """
+        Run a GET with retries, hedging and the host's circuit breaker
+
+        A response with a retryable status is retried like a network error;
+        if the last attempt still gets one, that response is returned for the
+        caller's raise_for_status(). No retry is started that the deadline
+        would not leave time for.
+
+        Args:
+            url: The URL the GET is for (its host selects the breaker)
+            send: Performs one attempt
+            deadline: The turn's time budget
+
+        Returns:
+            What the successful (or last) attempt returned
+
+        Raises:
+            CircuitOpen: If the host's circuit is open
+            DeadlineExceeded: If the deadline passed before an attempt could be made
+            requests.exceptions.RequestException: If the last attempt failed
+        """
+        policy = self.policy
+        host = host_key(url)
+        breaker = self.breaker(url)
+        self._count("calls")
+        for attempt in range(policy.max_attempts):
+            if deadline is not None:
+                deadline.check("fetch")
+            if not breaker.allow():
+                self._count("short_circuited")
+                METRICS.count("circuit_open_rejections")
+                raise CircuitOpen(f"Circuit open for {host} after repeated failures; not fetching {url}")
+            self._count("attempts")
+            last = attempt == policy.max_attempts - 1
+            failure = None
+            try:
+                result = self._send(host, send)
+            except DeadlineExceeded:
+                breaker.release()
+                raise
+            except RETRYABLE_ERRORS as e:
+                if deadline is not None and deadline.expired():
+                    # The attempt was cut short by the turn's budget, not by the host
+                    breaker.release()
+                    raise
+                self._failed(host, breaker)
+                if last:
+                    raise
+                failure = e
+                logger.info(f"Attempt {attempt + 1} for {url} failed ({type(e).__name__}); retrying")
+            except BaseException:
+                # Not the host's fault (bad URL, robots.txt refusal): nothing to count against it
+                breaker.release()
+                raise
+            else:
+                status = getattr(result, "status_code", 200)
+                if status not in policy.retry_statuses:
+                    breaker.record_success()
+                    return result
+                if status >= 500:
+                    self._failed(host, breaker)
+                else:
+                    # A 429 means busy, not broken: retry without counting against the circuit
+                    breaker.release()
+                if last:
+                    return result
+                logger.info(f"Attempt {attempt + 1} for {url} answered {status}; retrying")
+            delay = backoff_delay(attempt, policy, self.rng)
+            if deadline is not None and delay >= deadline.remaining():
+                deadline.cut_short("fetch")
+                if failure is not None:
+                    raise failure
+                return result
+            self._count("retries")
+            METRICS.count("retries")
+            self.sleep(delay)
+        raise ValueError("ResiliencePolicy.max_attempts must be at least 1")
+
+    def _send(self, host: str, send: Callable[[], T]) -> T:
+        """One attempt, hedged when the policy says so; successful latencies feed the hedge delay"""
+        if self.executor is None:
+            return send()
+        start = self.clock()
+        primary = self.executor.submit(send)
+        try:
+            result = primary.result(timeout=self._hedge_delay(host))
+        except FutureTimeout:
+            result = self._hedge(host, primary, send)
+        self._observe(host, self.clock() - start)
+        return result
+
+    def _hedge(self, host: str, primary: Any, send: Callable[[], T]) -> T:
+        """
+        Send a second request and return whichever of the two succeeds first
+
+        An answer with a retryable status (a 503, say) only wins if the other
+        request does no better; the request that loses is cancelled, or its
+        response closed once it arrives.
+        """
+        self._count("hedges")
+        METRICS.count("hedged_requests")
+        hedge = self.executor.submit(send)
+        pending, error, fallback = {primary, hedge}, None, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                elif getattr(future.result(), "status_code", 200) in self.policy.retry_statuses:
+                    if fallback is None:
+                        fallback = future
+                    else:
+                        self._discard(future)
+                else:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    for other in (primary, hedge):
+                        if other is not future:
+                            self._discard(other)
+                    return future.result()
+        if fallback is not None:
+            return fallback.result()
+        raise error
+
+    @staticmethod
+    def _discard(future: Any) -> None:
+        """Drop a request that lost the race: cancel it, or close its response when it completes"""
+        def close(done: Any) -> None:
+            if not done.cancelled() and done.exception() is None:
+                close_response = getattr(done.result(), "close", None)
+                if close_response is not None:
+                    close_response()
+
+        if not future.cancel():
+            future.add_done_callback(close)
+
+    def _hedge_delay(self, host: str) -> float:
+        with self._lock:
+            latencies = self._latencies.get(host)
+            if latencies is None or latencies.count < self.policy.hedge_min_samples:
+                return self.policy.hedge_initial_delay
+            return max(self.policy.hedge_min_delay, latencies.percentile(self.policy.hedge_after))
+
+    def _observe(self, host: str, seconds: float) -> None:
+        with self._lock:
+            latencies = self._latencies.get(host)
+            if latencies is None:
+                latencies = self._latencies[host] = Histogram()
+            latencies.record(seconds)
+
+    def _failed(self, host: str, breaker: CircuitBreaker) -> None:
+        self._count("failures")
+        if breaker.record_failure():
+            logger.warning(f"Circuit opened for {host}; failing fast for {self.policy.reset_timeout:.0f}s")
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            open_hosts = sorted(host for host, breaker in self._breakers.items() if breaker.state != CLOSED)
+            return dict(self.counters, open_circuits=open_hosts)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
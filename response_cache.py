@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Response Cache Module
+Persistent, size-bounded HTTP response cache with conditional revalidation.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger("ResponseCache")
+
+# Request headers that change what the server sends back, and so are part of the cache key
+KEY_HEADERS = ("accept", "accept-language", "authorization", "cookie")
+
+_MAX_AGE_PATTERN = re.compile(r'(?:s-maxage|max-age)\s*=\s*"?(\d+)')
+
+
+class CachedResponse:
+    """A response body plus the metadata needed to serve or revalidate it"""
+
+    __slots__ = ("url", "status", "headers", "body", "expires_at", "etag", "last_modified")
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes,
+                 expires_at: float, etag: Optional[str], last_modified: Optional[str]):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return self.expires_at > (now if now is not None else time.time())
+
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that turn a GET into a conditional GET for this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def cache_key(url: str, request_headers: Optional[Dict[str, str]] = None) -> str:
+    """
+    Build the cache key for a request
+
+    Args:
+        url: The request URL
+        request_headers: Headers sent with the request
+
+    Returns:
+        A hex digest identifying the URL plus the response-affecting headers
+    """
+    lowered = {k.lower(): v for k, v in (request_headers or {}).items()}
+    parts = [url] + [f"{name}:{lowered[name]}" for name in KEY_HEADERS if name in lowered]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def freshness_lifetime(headers: Dict[str, str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Work out how long a response may be served without revalidation
+
+    Args:
+        headers: The response headers
+        now: Current time (defaults to time.time())
+
+    Returns:
+        The expiry timestamp, or None if the response must not be stored
+    """
+    now = now if now is not None else time.time()
+    lowered = {k.lower(): v for k, v in headers.items()}
+    cache_control = lowered.get("cache-control", "").lower()
+
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return now  # storable, but always revalidated
+
+    max_age = _MAX_AGE_PATTERN.search(cache_control)
+    if max_age:
+        age = lowered.get("age", "0")
+        return now + int(max_age.group(1)) - (int(age) if age.isdigit() else 0)
+
+    if "expires" in lowered:
+        try:
+            return parsedate_to_datetime(lowered["expires"]).timestamp()
+        except (TypeError, ValueError):
+            return now  # an invalid Expires means "already expired"
+
+    return now
+
+
+class ResponseCache:
+    """
+    On-disk HTTP response cache
+    Entries live in a SQLite file and are evicted least-recently-used first
+    once the stored bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite file (or a directory, in which case `http_cache.sqlite` is used inside it)
+            max_bytes: Upper bound on the total size of cached bodies
+        """
+        if os.path.isdir(path) or path.endswith(os.sep):
+            os.makedirs(path, exist_ok=True)
+            path = os.path.join(path, "http_cache.sqlite")
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body BLOB,"
+            " size INTEGER, expires_at REAL, etag TEXT, last_modified TEXT, last_access REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._db.commit()
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bytes_saved": 0
+        }
+        logger.info(f"Response cache opened at {path} (max {max_bytes} bytes)")
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        """Return the cached entry for a key, marking it as recently used"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, status, headers, body, expires_at, etag, last_modified"
+                " FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        url, status, headers, body, expires_at, etag, last_modified = row
+        return CachedResponse(url, status, json.loads(headers), body, expires_at, etag, last_modified)
+
+    def store(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes) -> bool:
+        """
+        Store a response if its headers allow it
+
+        Returns:
+            True if the response was stored
+        """
+        expires_at = freshness_lifetime(headers)
+        lowered = {k.lower(): v for k, v in headers.items()}
+        etag, last_modified = lowered.get("etag"), lowered.get("last-modified")
+        if expires_at is None or status != 200 or len(body) > self.max_bytes:
+            return False
+        if expires_at <= time.time() and not (etag or last_modified):
+            return False  # it could never be served or revalidated
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status, json.dumps(dict(headers)), body, len(body),
+                 expires_at, etag, last_modified, time.time())
+            )
+            self.counters["stores"] += 1
+            self._evict()
+            self._db.commit()
+        return True
+
+    def refresh(self, key: str, headers: Dict[str, str]) -> None:
+        """Update an entry's freshness after a 304 Not Modified"""
+        expires_at = freshness_lifetime(headers)
+        if expires_at is None:
+            return
+        with self._lock:
+            self._db.execute("UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                             (expires_at, time.time(), key))
+            self._db.commit()
+
+    def record(self, event: str, body_size: int = 0) -> None:
+        """Count a hit, miss or revalidation; hits and revalidations add to bytes_saved"""
+        with self._lock:
+            self.counters[event] += 1
+            if event in ("hits", "revalidations"):
+                self.counters["bytes_saved"] += body_size
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until the cache fits in max_bytes (lock held)"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the hit/miss/revalidation counters plus current size"""
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return dict(self.counters, entries=entries, size_bytes=size)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
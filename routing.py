@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Routing Module
+Decides which specialized MCP should handle a request.
+"""
+
+from keyword_matcher import KEYWORD_TABLES
+from metrics import METRICS
+from request_analysis import analyze
+
+# Keywords that mark a request as a webscraping request
+WEBSCRAPING_KEYWORDS = KEYWORD_TABLES["route"]["webscraping"]
+
+
+def determine_mcp_type(user_request: str) -> str:
+    """
+    Determine which specialized MCP should handle the user request
+    
+    Args:
+        user_request: The user's request
+        
+    Returns:
+        The type of MCP to use (e.g., "research", "webscraping")
+    """
+    with METRICS.time("classify"):
+        # Check for webscraping-related keywords
+        if analyze(user_request).hits.has("route", "webscraping"):
+            return "webscraping"
+        
+        # Default to research for all other requests
+        return "research"
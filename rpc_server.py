@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+JSON-RPC MCP Server
+Asyncio server speaking newline-delimited JSON-RPC 2.0 over stdio, TCP or a
+Unix socket. Many conversations can be in flight at once; the clarifying
+question is returned as a protocol message instead of blocking on input().
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+from mcp_registry import default_registry
+from metrics import METRICS
+from routing import determine_mcp_type
+from session_store import SessionStore
+
+logger = logging.getLogger("RPCServer")
+
+PROTOCOL_VERSION = "2024-11-05"
+
+# Default longest message line read from a client; longer ones are answered
+# with INVALID_REQUEST and skipped (asyncio's own default is 64 KiB)
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_BUSY = -32000
+UNKNOWN_TURN = -32001
+
+
+class RPCError(Exception):
+    """An error that is reported to the client as a JSON-RPC error object"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class RPCServer:
+    """
+    Asyncio JSON-RPC front end for the MCPs
+
+    Methods:
+        initialize       -> server info and available MCPs
+        mcps/list        -> available MCPs
+        session/request  {request, mcp?, session_id?} -> {turn_id, session_id, mcp, question}
+        session/answer   {turn_id, session_id, answer} -> {mcp, question, response}
+        session/close    {session_id}                 -> {closed}
+        stats                                         -> stage latencies and per-host counters
+
+    Each session_id has its own MCP contexts; a request without one starts a
+    new session whose id is returned for the following requests.
+
+    The MCP calls are blocking (network and parsing), so they run on a thread
+    pool; the event loop only shuffles messages.
+    """
+
+    def __init__(self, mcps: Optional[Dict[str, Any]] = None,
+                 max_in_flight: int = 64, max_pending_per_connection: int = 16,
+                 max_pending_turns: int = 10000, turn_ttl: float = 900.0, workers: int = 32,
+                 sessions: Optional[SessionStore] = None, max_message_bytes: int = MAX_MESSAGE_BYTES):
+        """
+        Initialize the server
+
+        Args:
+            mcps: MCP instances by name (defaults to a registry that loads research and
+                webscraping, on one shared HTTP client, on first use)
+            max_in_flight: MCP calls allowed to run at once across all connections
+            max_pending_per_connection: Requests a connection may have outstanding before
+                the server stops reading from it
+            max_pending_turns: Questions awaiting an answer before new requests are refused
+            turn_ttl: Seconds a question waits for its answer
+            workers: Threads running the blocking MCP calls
+            sessions: Per-conversation context store
+            max_message_bytes: Longest message line accepted from a client
+        """
+        self.mcps = mcps if mcps is not None else default_registry(prefetch_workers=workers)
+        self.sessions = sessions or SessionStore()
+        self.max_pending_per_connection = max_pending_per_connection
+        self.max_pending_turns = max_pending_turns
+        self.turn_ttl = turn_ttl
+        self.max_message_bytes = max_message_bytes
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcp")
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._max_in_flight = max_in_flight
+        self._turns: Dict[str, Tuple[str, str, str, str, float]] = {}
+        logger.info(f"RPC server initialized with MCPs: {list(self.mcps.keys())}")
+
+    async def _call(self, fn, *args) -> Any:
+        """Run a blocking MCP call on the thread pool, within the in-flight limit"""
+        if self._in_flight is None:
+            self._in_flight = asyncio.Semaphore(self._max_in_flight)
+        async with self._in_flight:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def handle_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Handle one decoded JSON-RPC message
+
+        Args:
+            message: The decoded message
+
+        Returns:
+            The response object, or None for notifications
+        """
+        msg_id = message.get("id") if isinstance(message, dict) else None
+        try:
+            if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or "method" not in message:
+                raise RPCError(INVALID_REQUEST, "Invalid Request")
+            params = message.get("params") or {}
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "params must be an object")
+            result = await self._dispatch(message["method"], params)
+        except RPCError as e:
+            return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            logger.error(f"Error handling {message.get('method')}: {str(e)}")
+            return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": INTERNAL_ERROR, "message": str(e)}}
+
+        if "id" not in message:
+            return None
+        return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+    async def _dispatch(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "initialize":
+            return {
+                "protocolVersion": PROTOCOL_VERSION,
+                "serverInfo": {"name": "praneeths-mcp-server", "version": "1.0"},
+                "capabilities": {"mcps": list(self.mcps.keys())}
+            }
+        if method == "mcps/list":
+            return {"mcps": list(self.mcps.keys())}
+        if method == "session/request":
+            return await self._session_request(params)
+        if method == "session/answer":
+            return await self._session_answer(params)
+        if method == "session/close":
+            return {"closed": self.sessions.discard(params.get("session_id"))}
+        if method == "stats":
+            return self.stats()
+        raise RPCError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    async def _session_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """First half of a turn: route the request and return the clarifying question"""
+        request = params.get("request")
+        if not isinstance(request, str) or not request.strip():
+            raise RPCError(INVALID_PARAMS, "'request' must be a non-empty string")
+        mcp_name = params.get("mcp") or determine_mcp_type(request)
+        if mcp_name not in self.mcps:
+            raise RPCError(INVALID_PARAMS, f"Unknown MCP '{mcp_name}'")
+
+        session_id = params.get("session_id") or uuid.uuid4().hex
+        if not isinstance(session_id, str):
+            raise RPCError(INVALID_PARAMS, "'session_id' must be a string")
+
+        self._expire_turns()
+        if len(self._turns) >= self.max_pending_turns:
+            raise RPCError(SERVER_BUSY, "Too many conversations awaiting an answer")
+
+        mcp = self.mcps[mcp_name]
+        context = self.sessions.context(session_id, mcp_name, mcp.new_context)
+        question = await self._call(METRICS.call, "question", mcp.generate_question, request, context)
+        turn_id = uuid.uuid4().hex
+        self._turns[turn_id] = (mcp_name, session_id, request, question, time.monotonic() + self.turn_ttl)
+        return {"turn_id": turn_id, "session_id": session_id, "mcp": mcp_name, "question": question}
+
+    async def _session_answer(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Second half of a turn: answer the question and return the MCP's response"""
+        # A malformed answer must not use up the turn; the client can send a valid one
+        answer = params.get("answer")
+        if not isinstance(answer, str):
+            raise RPCError(INVALID_PARAMS, "'answer' must be a string")
+        # Only the session that asked the question may answer it
+        turn_id = params.get("turn_id")
+        turn = self._turns.get(turn_id) if isinstance(turn_id, str) else None
+        if turn is None or turn[1] != params.get("session_id"):
+            raise RPCError(UNKNOWN_TURN, "Unknown or expired turn_id for this session")
+        del self._turns[turn_id]
+
+        mcp_name, session_id, request, question, _ = turn
+        mcp = self.mcps[mcp_name]
+        context = self.sessions.context(session_id, mcp_name, mcp.new_context)
+        response = await self._call(METRICS.call, "response", mcp.generate_response, request, answer, context)
+        return {"mcp": mcp_name, "question": question, "response": response}
+
+    def stats(self) -> Dict[str, Any]:
+        """Stage latencies, per-host counters, sessions and pending turns, as the `stats` method returns them"""
+        return dict(METRICS.snapshot(), sessions=self.sessions.stats(), pending_turns=len(self._turns))
+
+    def _expire_turns(self) -> None:
+        now = time.monotonic()
+        for turn_id in [t for t, turn in self._turns.items() if turn[4] <= now]:
+            del self._turns[turn_id]
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: Any) -> None:
+        """
+        Serve one stream of newline-delimited messages
+
+        Requests are handled concurrently. Once a connection has
+        max_pending_per_connection requests outstanding, reading pauses until
+        one completes, which pushes back on the client.
+        """
+        slots = asyncio.Semaphore(self.max_pending_per_connection)
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def send(response: Dict[str, Any]) -> None:
+            async with write_lock:
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+
+        async def respond(line: bytes) -> None:
+            try:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    response = {"jsonrpc": "2.0", "id": None,
+                                "error": {"code": PARSE_ERROR, "message": "Parse error"}}
+                else:
+                    response = await self.handle_message(message)
+                if response is not None:
+                    await send(response)
+            finally:
+                slots.release()
+
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                line = e.partial  # the last line may lack its newline
+                if not line:
+                    break
+            except asyncio.LimitOverrunError:
+                await self._skip_line(reader)
+                await send({"jsonrpc": "2.0", "id": None,
+                            "error": {"code": INVALID_REQUEST, "message": "Message too large"}})
+                continue
+            if not line.strip():
+                continue
+            await slots.acquire()
+            task = asyncio.create_task(respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def _skip_line(reader: asyncio.StreamReader) -> None:
+        """Discard the rest of an oversized line, without ever buffering more than the reader's limit"""
+        while True:
+            try:
+                await reader.readuntil(b"\n")
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                return
+
+    async def serve_tcp(self, host: str, port: int) -> asyncio.AbstractServer:
+        server = await asyncio.start_server(self._serve_socket, host, port, limit=self.max_message_bytes)
+        logger.info(f"Listening on tcp://{host}:{server.sockets[0].getsockname()[1]}")
+        return server
+
+    async def serve_unix(self, path: str) -> asyncio.AbstractServer:
+        server = await asyncio.start_unix_server(self._serve_socket, path, limit=self.max_message_bytes)
+        logger.info(f"Listening on unix://{path}")
+        return server
+
+    async def _serve_socket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await self.serve_connection(reader, writer)
+        finally:
+            writer.close()
+
+    async def serve_stdio(self) -> None:
+        """Serve a single client on stdin/stdout"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=self.max_message_bytes)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+        await self.serve_connection(reader, writer)
+
+
+def main():
+    """Main entry point for the JSON-RPC server"""
+    parser = argparse.ArgumentParser(description="Praneeth's MCP Server (JSON-RPC mode)")
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument('--stdio', action='store_true', help='Serve on stdin/stdout (default)')
+    transport.add_argument('--tcp', type=str, metavar='HOST:PORT', help='Listen on a TCP socket')
+    transport.add_argument('--unix', type=str, metavar='PATH', help='Listen on a Unix socket')
+    parser.add_argument('--max-in-flight', type=int, default=64, help='MCP calls allowed to run at once')
+    parser.add_argument('--max-pending', type=int, default=16, help='Outstanding requests per connection')
+    parser.add_argument('--workers', type=int, default=32, help='Threads for blocking MCP calls')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='Processes that parse scraped pages (0 parses on the I/O threads)')
+    args = parser.parse_args()
+
+    # stdout carries the protocol in stdio mode, so logs always go to stderr
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+    server = RPCServer(mcps=default_registry(parse_workers=args.parse_workers, prefetch_workers=args.workers),
+                       max_in_flight=args.max_in_flight, max_pending_per_connection=args.max_pending,
+                       workers=args.workers)
+
+    async def run():
+        if args.tcp:
+            host, _, port = args.tcp.rpartition(":")
+            listener = await server.serve_tcp(host or "127.0.0.1", int(port))
+        elif args.unix:
+            listener = await server.serve_unix(args.unix)
+        else:
+            await server.serve_stdio()
+            return
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Scrape Scheduler
+Runs the recurring scrapes users ask for ("daily", "weekly", ...) and emits
+a page's data only when the extracted fields have changed.
+"""
+
+import argparse
+import hashlib
+import heapq
+import json
+import logging
+import random
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger("ScrapeScheduler")
+
+# Seconds between runs for each recurring frequency the MCPs recognize
+INTERVALS = {
+    "hourly": 3600.0,
+    "daily": 86400.0,
+    "weekly": 7 * 86400.0,
+    "monthly": 30 * 86400.0
+}
+
+
+def fingerprint(data: Dict[str, Any]) -> str:
+    """Content fingerprint of extracted fields, independent of key order"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def job_id_for(url: str, elements: Tuple[str, ...], frequency: str) -> str:
+    """Stable job id, so asking for the same recurring scrape twice does not add a second job"""
+    return hashlib.sha256("\n".join((url, frequency) + tuple(elements)).encode("utf-8")).hexdigest()[:16]
+
+
+def next_run_time(frequency: str, after: float, jitter: float = 0.1, rng: Optional[random.Random] = None) -> float:
+    """
+    When a job runs next
+
+    Args:
+        frequency: One of INTERVALS
+        after: Time of the previous run (or of scheduling)
+        jitter: Fraction of the interval runs are spread by, either way
+        rng: Random source (defaults to the module's)
+
+    Returns:
+        The next run time; jobs scheduled together drift apart instead of
+        all firing on the same second every period
+    """
+    spread = (rng or random).uniform(-jitter, jitter)
+    return after + INTERVALS[frequency] * (1.0 + spread)
+
+
+class ScrapeJob:
+    """A recurring scrape and what its last run saw"""
+
+    __slots__ = ("job_id", "url", "elements", "frequency", "next_run", "last_run",
+                 "page_hash", "fingerprint", "runs", "changes", "last_error")
+
+    COLUMNS = __slots__
+
+    def __init__(self, job_id: str, url: str, elements: Tuple[str, ...], frequency: str, next_run: float,
+                 last_run: Optional[float] = None, page_hash: Optional[str] = None,
+                 fingerprint: Optional[str] = None, runs: int = 0, changes: int = 0,
+                 last_error: Optional[str] = None):
+        self.job_id = job_id
+        self.url = url
+        self.elements = tuple(elements)
+        self.frequency = frequency
+        self.next_run = next_run
+        self.last_run = last_run
+        self.page_hash = page_hash
+        self.fingerprint = fingerprint
+        self.runs = runs
+        self.changes = changes
+        self.last_error = last_error
+
+    def to_row(self) -> Tuple:
+        return tuple(json.dumps(list(self.elements)) if column == "elements" else getattr(self, column)
+                     for column in self.COLUMNS)
+
+    @classmethod
+    def from_row(cls, row: Tuple) -> "ScrapeJob":
+        values = dict(zip(cls.COLUMNS, row))
+        values["elements"] = tuple(json.loads(values["elements"]))
+        return cls(**values)
+
+
+class JobStore:
+    """
+    SQLite-backed job table shared by the MCPs that add jobs and the scheduler that runs them
+
+    Adding never overwrites a job that already exists, so re-asking for a
+    scrape keeps the state its earlier runs recorded.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the job table
+
+        Args:
+            path: SQLite file, or ":memory:"
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._changes = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, url TEXT, elements TEXT, frequency TEXT, next_run REAL, last_run REAL,"
+            " page_hash TEXT, fingerprint TEXT, runs INTEGER, changes INTEGER, last_error TEXT)"
+        )
+        self._db.commit()
+
+    def add(self, job: ScrapeJob) -> bool:
+        """Insert a new job; returns False if a job with its id already exists"""
+        with self._lock:
+            cursor = self._db.execute("INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                      job.to_row())
+            self._db.commit()
+            self._changes += cursor.rowcount
+        return cursor.rowcount > 0
+
+    def save(self, job: ScrapeJob) -> None:
+        """Record a job's state after a run (a job removed while it ran stays removed)"""
+        columns = ScrapeJob.COLUMNS[1:]
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {', '.join(f'{column} = ?' for column in columns)} WHERE job_id = ?",
+                             job.to_row()[1:] + (job.job_id,))
+            self._db.commit()
+
+    def remove(self, job_id: str) -> bool:
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+            self._db.commit()
+            self._changes += cursor.rowcount
+        return cursor.rowcount > 0
+
+    def version(self) -> Tuple[int, int]:
+        """
+        Cheap change marker: differs from an earlier value once jobs were added or
+        removed through this store, or the file was written by another connection
+        (another process's MCP adding jobs, say)
+        """
+        with self._lock:
+            return self._changes, self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self) -> List[ScrapeJob]:
+        with self._lock:
+            rows = self._db.execute(f"SELECT {', '.join(ScrapeJob.COLUMNS)} FROM jobs").fetchall()
+        return [ScrapeJob.from_row(row) for row in rows]
+
+
+class ScrapeScheduler:
+    """
+    Priority-queue timer that runs due scrape jobs on a worker pool
+
+    Jobs sit in a heap keyed by their next run time, so finding the next
+    due job is O(1) and rescheduling one is O(log n) however many jobs
+    there are. Each run hashes the downloaded page first: an identical page
+    is not parsed or extracted again, and a changed page is only emitted if
+    the fingerprint of its extracted fields changed too.
+    """
+
+    def __init__(self, fetch: Callable[[str], Any], extract: Callable[[Any, Tuple[str, ...]], Dict[str, Any]],
+                 store: JobStore, on_change: Optional[Callable[[ScrapeJob, Dict[str, Any]], None]] = None,
+                 workers: int = 4, jitter: float = 0.1, clock: Callable[[], float] = time.time,
+                 rng: Optional[random.Random] = None):
+        """
+        Initialize the scheduler
+
+        Args:
+            fetch: Downloads a URL; returns a page with content and raise_for_status()
+                (e.g. PolitenessScheduler.fetch)
+            extract: Extracts the requested elements from a fetched page
+            store: Where jobs are read from and their state is saved
+            on_change: Called with the job and its data whenever the extracted fields change
+            workers: Jobs run at the same time
+            jitter: Fraction of the interval each run is moved by, either way
+            clock: Wall-clock time source
+            rng: Random source for the jitter
+        """
+        self.fetch = fetch
+        self.extract = extract
+        self.store = store
+        self.on_change = on_change or (lambda job, data: None)
+        self.workers = workers
+        self.jitter = jitter
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.jobs: Dict[str, ScrapeJob] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self.counters = {"runs": 0, "changed": 0, "unchanged": 0, "extractions_skipped": 0, "failed": 0}
+
+    def sync(self) -> int:
+        """
+        Pick up jobs added or removed in the store since the last sync
+
+        Jobs that were due while nothing was running are spread over the
+        jitter window instead of all running at once.
+
+        Returns:
+            The number of newly scheduled jobs
+        """
+        now = self.clock()
+        stored = {job.job_id: job for job in self.store.load()}
+        added = 0
+        with self._lock:
+            for job_id in list(self.jobs):
+                if job_id not in stored:
+                    del self.jobs[job_id]
+            for job_id, job in stored.items():
+                if job_id in self.jobs or job.frequency not in INTERVALS:
+                    continue
+                if job.next_run < now:
+                    job.next_run = now + self.rng.uniform(0, self.jitter * INTERVALS[job.frequency])
+                self.jobs[job_id] = job
+                heapq.heappush(self._heap, (job.next_run, job_id))
+                added += 1
+        return added
+
+    def next_due(self) -> Optional[float]:
+        """Run time of the earliest job, if any"""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self) -> None:
+        """Pop heap entries of removed or rescheduled jobs (call with the lock held)"""
+        while self._heap:
+            run_at, job_id = self._heap[0]
+            job = self.jobs.get(job_id)
+            if job is not None and job.next_run == run_at:
+                return
+            heapq.heappop(self._heap)
+
+    def run_pending(self, executor: Optional[ThreadPoolExecutor] = None) -> int:
+        """
+        Run every job that is due
+
+        Args:
+            executor: Pool to hand the jobs to without waiting for them; without
+                one, this returns once they have all run
+
+        Returns:
+            The number of jobs run (or started)
+        """
+        now = self.clock()
+        due = []
+        with self._lock:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                due.append(self.jobs[heapq.heappop(self._heap)[1]])
+                self._drop_stale()
+        if not due:
+            return 0
+        if executor is not None:
+            for job in due:
+                executor.submit(self._run, job)
+            return len(due)
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(due)), thread_name_prefix="scheduler") as pool:
+            list(pool.map(self._run, due))
+        return len(due)
+
+    def _run(self, job: ScrapeJob) -> None:
+        started = job.last_run = self.clock()
+        try:
+            page = self.fetch(job.url)
+            page.raise_for_status()
+            page_hash = hashlib.sha256(page.content).hexdigest()
+            if page_hash == job.page_hash:
+                outcome = "extractions_skipped"
+            else:
+                data = self.extract(page, job.elements)
+                job.page_hash = page_hash
+                new_fingerprint = fingerprint(data)
+                if new_fingerprint == job.fingerprint:
+                    outcome = "unchanged"
+                else:
+                    job.fingerprint = new_fingerprint
+                    job.changes += 1
+                    outcome = "changed"
+                    self.on_change(job, data)
+            job.last_error = None
+        except Exception as e:
+            logger.error(f"Scheduled scrape of {job.url} failed: {str(e)}")
+            job.last_error = str(e)
+            outcome = "failed"
+
+        job.runs += 1
+        job.next_run = next_run_time(job.frequency, started, self.jitter, self.rng)
+        self.store.save(job)
+        with self._lock:
+            self.counters["runs"] += 1
+            self.counters[outcome] += 1
+            if self.jobs.get(job.job_id) is job:
+                heapq.heappush(self._heap, (job.next_run, job.job_id))
+
+    def run_forever(self, stop: threading.Event, poll_interval: float = 60.0, check_interval: float = 1.0) -> None:
+        """
+        Run jobs as they come due until `stop` is set
+
+        Due jobs are handed to the worker pool, so one slow scrape does not hold
+        back jobs falling due after it. The job table is only reloaded every
+        poll_interval or when the store's cheap change marker moves (checked
+        every check_interval), not on every wake.
+
+        Args:
+            stop: Set to end the loop
+            poll_interval: Longest time between reloads of the job table
+            check_interval: Longest time between checks of the store for added or removed jobs
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler")
+        synced_at, synced_version = None, None
+        try:
+            while not stop.is_set():
+                version = self.store.version()
+                if synced_at is None or version != synced_version or self.clock() - synced_at >= poll_interval:
+                    self.sync()
+                    synced_at, synced_version = self.clock(), version
+                self.run_pending(executor)
+                due = self.next_due()
+                timeout = min(poll_interval, check_interval)
+                if due is not None:
+                    timeout = min(timeout, max(0.0, due - self.clock()))
+                stop.wait(timeout)
+        finally:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, jobs=len(self.jobs))
+
+
+def main():
+    """Run the persisted scrape jobs, writing changed pages as JSON lines"""
+    parser = argparse.ArgumentParser(description="Praneeth's MCP Server (scrape scheduler)")
+    parser.add_argument('--jobs', type=str, required=True, help="Job database shared with the server's --jobs option")
+    parser.add_argument('-o', '--output', type=str, default='-', help="Where changed pages are appended ('-' for stdout)")
+    parser.add_argument('--workers', type=int, default=4, help='Jobs run at the same time')
+    parser.add_argument('--poll', type=float, default=60.0, help='Seconds between checks for new jobs')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+    from enhanced_webscraping_mcp import WebscrapingMCP
+    mcp = WebscrapingMCP()
+    output = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    output_lock = threading.Lock()
+
+    def emit(job: ScrapeJob, data: Dict[str, Any]) -> None:
+        record = {"job_id": job.job_id, "url": job.url, "frequency": job.frequency,
+                  "time": job.last_run, "data": data}
+        with output_lock:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+    scheduler = ScrapeScheduler(mcp.fetch_page, mcp.extract_page, JobStore(args.jobs),
+                                on_change=emit, workers=args.workers)
+    stop = threading.Event()
+    try:
+        scheduler.run_forever(stop, poll_interval=args.poll)
+    except KeyboardInterrupt:
+        logger.info(f"Scheduler stopped: {scheduler.stats()}")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,15 @@ A Model Context Protocol server that manages multiple context protocols.
 """
 
 import argparse
-import json
 import logging
+import os
 import random
 import sys
 from typing import Dict, Any, List, Optional
 
-from mcp_research import ResearchMCP
-from enhanced_webscraping_mcp import WebscrapingMCP
+from mcp_registry import MCPRegistry, default_registry
+from metrics import METRICS, format_report
+from session_store import DEFAULT_SESSION, SessionStore
 
 # Configure logging
 logging.basicConfig(
@@ -26,11 +27,16 @@ logger = logging.getLogger("PraneethMCP")
 class MCPServer:
     """Main MCP Server that manages multiple context protocols"""
     
-    def __init__(self):
-        self.mcps = {
-            "research": ResearchMCP(),
-            "webscraping": WebscrapingMCP()
-        }
+    def __init__(self, http_client: Optional[Any] = None, search_cache: Optional[Any] = None,
+                 sessions: Optional[SessionStore] = None, mcps: Optional[MCPRegistry] = None):
+        # One pooled client is shared by every MCP so connections are reused across them.
+        # MCPs (and the client) are only imported and built when first used.
+        self.mcps = mcps or default_registry(
+            http_client=http_client,
+            search_cache_factory=(lambda: search_cache) if search_cache is not None else None
+        )
+        # Each conversation gets its own context per MCP
+        self.sessions = sessions or SessionStore()
         self.current_mcp = None
         logger.info("Praneeth's MCP Server initialized with protocols: %s", list(self.mcps.keys()))
     
@@ -48,7 +54,7 @@ class MCPServer:
             logger.error(f"MCP '{mcp_name}' not found")
             return False
     
-    def process_request(self, user_input: str) -> Dict[str, Any]:
+    def process_request(self, user_input: str, session_id: str = DEFAULT_SESSION) -> Dict[str, Any]:
         """Process a user request through the current MCP"""
         if not self.current_mcp:
             return {
@@ -60,9 +66,10 @@ class MCPServer:
         try:
             # Get the appropriate MCP handler
             mcp_handler = self.mcps[self.current_mcp]
+            context = self.sessions.context(session_id, self.current_mcp, mcp_handler.new_context)
             
             # First, get the question from the MCP
-            question = mcp_handler.generate_question(user_input)
+            question = METRICS.call("question", mcp_handler.generate_question, user_input, context)
             
             # Display the question to the user
             print(f"\n[{self.current_mcp.upper()} MCP]: {question}")
@@ -71,7 +78,7 @@ class MCPServer:
             answer = input("Your answer: ")
             
             # Process the answer and generate a response
-            response = mcp_handler.generate_response(user_input, answer)
+            response = METRICS.call("response", mcp_handler.generate_response, user_input, answer, context)
             
             return {
                 "status": "success",
@@ -91,9 +98,34 @@ def main():
     parser = argparse.ArgumentParser(description="Praneeth's MCP Server")
     parser.add_argument('--mcp', type=str, help='Initial MCP to use')
     parser.add_argument('--random', action='store_true', help='Randomly select an MCP')
+    parser.add_argument('--timeout', type=float, default=10.0, help='HTTP read timeout in seconds')
+    parser.add_argument('--pool-size', type=int, default=10, help='Kept-alive connections per host')
+    parser.add_argument('--cache-dir', type=str, default=os.path.join(os.path.expanduser('~'), '.cache', 'praneeths_mcp'),
+                        help='Directory for the persistent HTTP response cache')
+    parser.add_argument('--cache-size', type=int, default=256, help='Response cache size limit in MB')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the HTTP response cache')
+    parser.add_argument('--jobs', type=str, help='Job database recurring scrapes are recorded in (run them with scrape_scheduler.py)')
     args = parser.parse_args()
     
-    server = MCPServer()
+    def make_http_client():
+        from http_client import HTTPClient
+        from response_cache import ResponseCache
+        cache = None
+        if not args.no_cache:
+            cache = ResponseCache(args.cache_dir + os.sep, max_bytes=args.cache_size * 1024 * 1024)
+        return HTTPClient(pool_maxsize=args.pool_size, read_timeout=args.timeout, cache=cache)
+
+    def make_search_cache():
+        from query_cache import SQLiteStore, TTLCache
+        return TTLCache(store=SQLiteStore(os.path.join(args.cache_dir, 'research_cache.sqlite')))
+
+    def make_job_store():
+        from scrape_scheduler import JobStore
+        return JobStore(args.jobs)
+
+    server = MCPServer(mcps=default_registry(http_client_factory=make_http_client,
+                                             search_cache_factory=None if args.no_cache else make_search_cache,
+                                             job_store_factory=make_job_store if args.jobs else None))
     print(f"Welcome to Praneeth's MCP Server!")
     print(f"Available MCPs: {', '.join(server.list_available_mcps())}")
     
@@ -121,7 +153,7 @@ def main():
                 continue
             
             # Get user input for the current MCP
-            user_input = input(f"\n[{server.current_mcp.upper()} MCP] Enter your request (or 'switch' to change MCP, 'exit' to quit): ")
+            user_input = input(f"\n[{server.current_mcp.upper()} MCP] Enter your request (or 'switch' to change MCP, 'stats' for timings, 'exit' to quit): ")
             
             if user_input.lower() == 'exit':
                 print("Exiting Praneeth's MCP Server. Goodbye!")
@@ -131,6 +163,10 @@ def main():
                 server.current_mcp = None
                 continue
             
+            if user_input.lower() == 'stats':
+                print(format_report(METRICS.snapshot()))
+                continue
+            
             # Process the request
             result = server.process_request(user_input)
             
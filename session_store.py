@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Session Store Module
+Keeps each conversation's MCP context separate so one user's settings never
+leak into another user's responses.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger("SessionStore")
+
+# Session used by the single-user REPLs
+DEFAULT_SESSION = "local"
+
+
+def approximate_size(value: Any) -> int:
+    """Rough in-memory size of a context: the containers plus the strings and numbers they hold"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + approximate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += approximate_size(item)
+    return size
+
+
+class Session:
+    """One conversation's contexts, created per MCP on first use"""
+
+    __slots__ = ("contexts", "size", "expires_at")
+
+    def __init__(self, expires_at: float):
+        self.contexts: Dict[str, Dict[str, Any]] = {}
+        self.size = 0
+        self.expires_at = expires_at
+
+
+class SessionStore:
+    """
+    Session-scoped MCP contexts with LRU/TTL eviction and a memory cap
+
+    Sessions are kept in access order, so a lookup, the TTL sweep and LRU
+    eviction all work from the ends of one OrderedDict and cost O(1) per
+    request (amortized). A session's size is re-measured each time it is
+    looked up, so the memory cap accounts for a turn's changes by the next
+    turn of the same session.
+    """
+
+    def __init__(self, max_sessions: int = 50000, ttl: float = 1800.0,
+                 max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the store
+
+        Args:
+            max_sessions: Maximum number of conversations kept
+            ttl: Seconds an idle conversation is kept
+            max_bytes: Approximate memory budget for all contexts
+        """
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "created": 0, "expired": 0, "evictions": 0}
+
+    def context(self, session_id: str, mcp_name: str,
+                factory: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return a session's context for an MCP, creating it if needed
+
+        Args:
+            session_id: Identifies the conversation
+            mcp_name: The MCP the context belongs to
+            factory: Builds a fresh context (e.g. mcp.new_context)
+
+        Returns:
+            The context dict; the MCP updates it in place
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(now + self.ttl)
+                self._sessions[session_id] = session
+                self.counters["created"] += 1
+            else:
+                self._sessions.move_to_end(session_id)
+                session.expires_at = now + self.ttl
+                self.counters["hits"] += 1
+
+            context = session.contexts.get(mcp_name)
+            if context is None:
+                context = session.contexts[mcp_name] = factory()
+
+            size = approximate_size(session.contexts)
+            self._bytes += size - session.size
+            session.size = size
+            self._evict()
+            return context
+
+    def discard(self, session_id: str) -> bool:
+        """Forget a conversation; returns whether it existed"""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._bytes -= session.size
+            return True
+
+    def _expire(self, now: float) -> None:
+        """Drop idle sessions from the least recently used end (lock held)"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.expires_at > now:
+                break
+            del self._sessions[session_id]
+            self._bytes -= session.size
+            self.counters["expired"] += 1
+
+    def _evict(self) -> None:
+        """Drop least recently used sessions until within both limits (lock held)
+
+        The session just looked up is the most recently used one and is never dropped.
+        """
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            session_id, session = self._sessions.popitem(last=False)
+            self._bytes -= session.size
+            self.counters["evictions"] += 1
+            logger.debug(f"Evicted session {session_id}")
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._sessions
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, sessions=len(self._sessions), bytes=self._bytes)
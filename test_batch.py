@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test script for the JSONL batch runner
+"""
+
+import io
+import json
+import os
+import tempfile
+import time
+
+from batch import BatchRunner, Checkpoint
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from http_client import HTTPClient
+from mcp_registry import default_registry
+from mcp_research import ResearchMCP
+from politeness import PolitenessScheduler
+from prefetch import Prefetcher
+
+
+def search(_):
+    body = {"query": {"search": [{"title": "Quantum computing", "snippet": "qubits"}]}}
+    return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+
+def slow_page(handler):
+    time.sleep(0.2 if handler.path == "/slow" else 0)
+    return 200, {"Content-Type": "text/html"}, f"<html><title>{handler.path}</title></html>".encode()
+
+
+def make_runner(server, workers=4):
+    mcps = {
+        "research": ResearchMCP(api_url=server.url("/w/api.php")),
+        "webscraping": WebscrapingMCP()
+    }
+    return BatchRunner(mcps=mcps, workers=workers)
+
+
+def records(server):
+    return [
+        json.dumps({"id": "slow", "request": f"scrape {server.url('/slow')}", "answer": "titles as csv"}),
+        json.dumps({"id": "fast", "request": f"scrape {server.url('/fast')}", "answer": "json"}),
+        "",
+        "{not json",
+        json.dumps({"id": "research", "request": "quantum computing for beginners", "answer": "basic", "mcp": "research"}),
+        json.dumps({"id": "bad-mcp", "request": "anything", "mcp": "nope"})
+    ]
+
+
+def test_ordered_and_completion_order():
+    """Input order holds back fast rows behind slow ones; completion order does not"""
+    with FixtureServer({"/w/api.php": search, "/slow": slow_page, "/fast": slow_page}) as server:
+        lines = records(server)
+        ordered, unordered = io.StringIO(), io.StringIO()
+        counts = make_runner(server).run(iter(lines), ordered)
+        make_runner(server).run(iter(lines), unordered, ordered=False)
+
+    rows = [json.loads(line) for line in ordered.getvalue().splitlines()]
+    assert [row["line"] for row in rows] == [0, 1, 3, 4, 5]
+    assert counts == {"processed": 3, "failed": 2, "skipped": 0}
+    assert rows[0]["mcp"] == "webscraping" and "/slow" in rows[0]["response"]
+    assert "Invalid JSON" in rows[2]["error"] and "Unknown MCP" in rows[4]["error"]
+    assert "Quantum computing" in rows[3]["response"]
+
+    completed = [json.loads(line)["line"] for line in unordered.getvalue().splitlines()]
+    assert sorted(completed) == [0, 1, 3, 4, 5] and completed[-1] == 0
+
+
+def test_resume_from_checkpoint():
+    """Rows recorded in the checkpoint are skipped and the checkpoint ends past the last line"""
+    with FixtureServer({"/w/api.php": search, "/slow": slow_page, "/fast": slow_page}) as server:
+        lines = records(server)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "progress.json")
+            with open(path, "w") as f:
+                json.dump({"next_line": 2, "done_after": [4]}, f)
+            output = io.StringIO()
+            counts = make_runner(server).run(iter(lines), output, checkpoint=Checkpoint(path), checkpoint_every=1)
+            saved = Checkpoint(path)
+
+    assert [json.loads(line)["line"] for line in output.getvalue().splitlines()] == [3, 5]
+    assert counts["skipped"] == 3
+    assert saved.next_line == len(lines) and not saved.done_after
+
+
+def test_records_run_concurrently_without_prefetching():
+    """Batch turns already have their answer: nothing is prefetched, so the prefetch pool cannot serialize them"""
+    def page(handler):
+        time.sleep(0.3)
+        return 200, {"Content-Type": "text/html"}, f"<html><title>{handler.path}</title></html>".encode()
+
+    http = HTTPClient(cache=None)
+    prefetcher = Prefetcher(max_workers=1)
+    scraper = WebscrapingMCP(http_client=http, prefetcher=prefetcher, max_concurrency=8,
+                             politeness=PolitenessScheduler(http, rate=1e9, burst=1e9, respect_robots=False))
+    with FixtureServer({f"/p{i}": page for i in range(8)}) as server:
+        lines = [json.dumps({"request": f"scrape {server.url(f'/p{i}')}", "answer": "titles in json"})
+                 for i in range(8)]
+        output = io.StringIO()
+        start = time.perf_counter()
+        counts = BatchRunner(mcps={"webscraping": scraper}, workers=8).run(iter(lines), output)
+        elapsed = time.perf_counter() - start
+    http.close()
+    assert counts["processed"] == 8
+    assert elapsed < 1.2, elapsed
+    assert prefetcher.stats()["submitted"] == 0
+    assert default_registry(prefetch_workers=16)["webscraping"].prefetcher.max_workers == 16
+
+
+if __name__ == "__main__":
+    test_ordered_and_completion_order()
+    test_resume_from_checkpoint()
+    test_records_run_concurrently_without_prefetching()
+    print("Batch runner tests passed")
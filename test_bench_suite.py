@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test script for the offline benchmark suite
+"""
+
+import copy
+
+from bench_suite import compare, run_suite
+from fixture_server import FixtureServer, fake_wikipedia_search
+from mcp_research import ResearchMCP
+
+
+def test_fake_wikipedia_search():
+    """The fake API answers MediaWiki search queries the research MCP understands"""
+    with FixtureServer({"/w/api.php": fake_wikipedia_search}) as server:
+        mcp = ResearchMCP(api_url=server.url("/w/api.php"))
+        results = mcp._search("quantum computing")
+        context = mcp.new_context()
+        context["depth"] = "advanced"
+        info = mcp._get_research_information("quantum computing", context)
+    assert [result["title"] for result in results] == ["Quantum Computing", "Quantum Computing (1)", "Quantum Computing (2)"]
+    assert "**quantum computing**" in info
+    assert server.request_count == 1
+
+
+def test_suite_results_are_machine_readable_and_comparable():
+    """A run reports every benchmark; a slower run is flagged against it as a baseline"""
+    run = run_suite(repeat=1, pages=["small"])
+    results = run["results"]
+    assert {"scrape_website.small", "research.cold", "research.cached", "update_context.webscraping.long",
+            "process_request.webscraping", "process_request.research",
+            "server.process_request.webscraping"} <= set(results)
+    for result in results.values():
+        assert result["count"] >= 1 and result["ops_per_sec"] > 0
+    assert results["scrape_website.small"]["mb_per_sec"] > 0
+
+    slower = copy.deepcopy(run)
+    slower["results"]["research.cold"]["p50_ms"] = run["results"]["research.cold"]["p50_ms"] * 2
+    assert compare(run, run) == []
+    regressions = compare(slower, run)
+    assert len(regressions) == 1 and regressions[0].startswith("research.cold")
+
+    slower["corpus_version"] += 1
+    try:
+        compare(slower, run)
+        assert False, "runs on different corpus versions were compared"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_fake_wikipedia_search()
+    test_suite_results_are_machine_readable_and_comparable()
+    print("Benchmark suite tests passed")
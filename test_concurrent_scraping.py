@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent multi-URL scraping in the webscraping MCP
+"""
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from concurrency import SingleFlight
+from deadline import Deadline
+from fixture_server import FixtureServer
+from enhanced_webscraping_mcp import WebscrapingMCP
+from http_client import HTTPClient
+from mcp_research import ResearchMCP
+from metrics import METRICS
+from politeness import PolitenessScheduler
+
+
+def test_scrape_many_keeps_order_and_reports_failures():
+    """Every URL is scraped, results keep request order and failures stay per URL"""
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def slow_page(handler):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        name = handler.path.strip("/")
+        return 200, {"Content-Type": "text/html"}, f"<html><title>{name}</title></html>".encode()
+
+    routes = {f"/p{i}": slow_page for i in range(6)}
+    with FixtureServer(routes) as server:
+        mcp = WebscrapingMCP(max_concurrency=8, per_host_concurrency=3)
+        urls = [server.url(f"/p{i}") for i in range(6)] + [server.url("/missing")]
+        results = mcp._scrape_many(urls)
+
+    assert [url for url, _ in results] == urls
+    assert '"Page Title": "p0"' in results[0][1]
+    assert '"Page Title": "p5"' in results[5][1]
+    assert results[6][1].startswith("Error: 404")
+    assert active["peak"] <= 3
+
+
+def test_generate_response_scrapes_every_target_url():
+    """A request naming several pages gets a section per page"""
+    with FixtureServer({"/a": "<title>A</title>", "/b": "<title>B</title>"}) as server:
+        mcp = WebscrapingMCP()
+        request = f"scrape {server.url('/a')} and {server.url('/b')}"
+        response = mcp.generate_response(request, "json please")
+
+    assert f"({server.url('/a')})" in response
+    assert f"({server.url('/b')})" in response
+    assert response.index('"A"') < response.index('"B"')
+
+
+def test_single_flight_shares_one_call_across_threads_and_tasks():
+    """Identical calls in flight together run once; threads and asyncio tasks get the same result"""
+    flight = SingleFlight("test")
+    calls = {"n": 0}
+    started = threading.Event()
+
+    def work():
+        calls["n"] += 1
+        started.set()
+        time.sleep(0.2)
+        return {"value": calls["n"]}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", work))) for _ in range(6)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+
+    async def tasks():
+        return await asyncio.gather(*[flight.do_async("key", work) for _ in range(4)])
+
+    results += asyncio.run(tasks())
+    for thread in threads:
+        thread.join()
+
+    assert calls["n"] == 1
+    assert len(results) == 10 and all(result is results[0] for result in results)
+    assert flight.stats()["fan_in"] == 10.0
+    assert flight.stats()["in_flight"] == 0
+
+    def fail():
+        raise ValueError("upstream down")
+
+    try:
+        flight.do("key", fail)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert flight.do("key", work) == {"value": 2}
+
+    # A follower with a timeout stops waiting; the leader's flight lands for everyone else
+    started.clear()
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", work)))
+    leader.start()
+    started.wait()
+    start = time.perf_counter()
+    try:
+        flight.do("key", work, timeout=0.05)
+        assert False, "expected the follower to time out"
+    except FutureTimeout:
+        pass
+    assert time.perf_counter() - start < 0.15
+    leader.join()
+    assert results[-1] == {"value": 3} and calls["n"] == 3
+
+
+def test_identical_scrapes_and_searches_share_one_request():
+    """Concurrent users asking for the same page or topic cause one upstream request each"""
+    requests_seen = {"page": 0, "search": 0}
+
+    def page(handler):
+        requests_seen["page"] += 1
+        time.sleep(0.2)
+        return 200, {"Content-Type": "text/html"}, b"<html><title>Trending</title><h1>Deal</h1></html>"
+
+    def search(handler):
+        requests_seen["search"] += 1
+        time.sleep(0.2)
+        body = {"query": {"search": [{"title": "Solar eclipse", "snippet": "moon"}]}}
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    METRICS.reset()
+    http = HTTPClient(cache=None)
+    with FixtureServer({"/deal": page, "/w/api.php": search}) as server:
+        scraper = WebscrapingMCP(http_client=http, politeness=PolitenessScheduler(http, rate=1e9, burst=1e9,
+                                                                                   respect_robots=False))
+        research = ResearchMCP(http_client=http, api_url=server.url("/w/api.php"))
+        # The same page under different spellings of its URL, and the same topic in different case
+        urls = [server.url("/deal"), server.url("/deal#top"), server.url("/deal").replace("http://", "HTTP://")]
+        scraped, found = [], []
+        threads = [threading.Thread(target=lambda url=url: scraped.append(
+                       scraper._scrape_website(url, scraper.new_context()))) for url in urls * 2]
+        threads += [threading.Thread(target=lambda query=query: found.append(
+                        research._get_research_information(query, research.new_context())))
+                    for query in ["solar eclipse", "Solar  Eclipse"] * 3]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    http.close()
+
+    assert requests_seen == {"page": 1, "search": 1}
+    assert len(scraped) == 6 and all('"Page Title": "Trending"' in result for result in scraped)
+    assert len(found) == 6 and all("Solar eclipse" in result for result in found)
+    fan_in = METRICS.snapshot()["fan_in"]
+    assert fan_in["page"]["flights"] == 1 and fan_in["page"]["ratio"] == 6.0
+    assert fan_in["search"]["ratio"] == 6.0
+
+
+def test_search_follower_stops_waiting_at_its_deadline():
+    """A turn joining a slow search gives up when its own budget runs out; the search lands for the leader"""
+    def search(handler):
+        time.sleep(0.4)
+        body = {"query": {"search": [{"title": "Solar eclipse", "snippet": "moon"}]}}
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    with FixtureServer({"/w/api.php": search}) as server:
+        research = ResearchMCP(api_url=server.url("/w/api.php"))
+        found = []
+        leader = threading.Thread(target=lambda: found.append(
+            research._get_research_information("solar eclipse", research.new_context(), Deadline(5.0))))
+        leader.start()
+        time.sleep(0.1)
+        deadline = Deadline(0.1)
+        start = time.perf_counter()
+        result = research._get_research_information("solar eclipse", research.new_context(), deadline)
+        assert time.perf_counter() - start < 0.25
+        leader.join()
+    assert "ran out waiting for the search" in result and deadline.cut_short_in == "fetch"
+    assert "Solar eclipse" in found[0]
+
+
+if __name__ == "__main__":
+    test_scrape_many_keeps_order_and_reports_failures()
+    test_generate_response_scrapes_every_target_url()
+    test_single_flight_shares_one_call_across_threads_and_tasks()
+    test_identical_scrapes_and_searches_share_one_request()
+    test_search_follower_stops_waiting_at_its_deadline()
+    print("Concurrent scraping tests passed")
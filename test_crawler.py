@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script for the pagination crawler
+"""
+
+import threading
+
+from bs4 import BeautifulSoup
+
+from crawler import BloomFilter, CrawlLimits, find_pagination_links, normalize_url
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+
+
+def listing(page: int, last: int) -> str:
+    """A product listing page with a numbered pagination bar"""
+    numbers = "".join(f'<a href="/shop/page/{n}">{n}</a>' for n in range(1, last + 1))
+    next_link = f'<a rel="next" href="/shop/page/{page + 1}#top">Next</a>' if page < last else ""
+    return (f"<html><head><title>Shop page {page}</title></head><body>"
+            f'<span class="price">${page}.00</span>'
+            f'<nav class="pagination">{numbers}{next_link}</nav>'
+            f'<a href="https://elsewhere.example/page/{page + 1}">Partner</a></body></html>')
+
+
+def test_normalize_url():
+    """Equivalent spellings of a URL normalize to the same key"""
+    assert normalize_url("HTTP://Example.COM:80?b=2&a=1#frag") == "http://example.com/?a=1&b=2"
+    assert normalize_url("https://example.com:8443/x") == "https://example.com:8443/x"
+
+
+def test_find_pagination_links():
+    """rel=next, pagination widgets and numbered pages are found; previous and off-site pages are not"""
+    soup = BeautifulSoup(listing(2, 4), "html.parser")
+    links = find_pagination_links(soup, "http://shop.test/shop/page/2")
+    assert links[0] == "http://shop.test/shop/page/3"
+    assert set(links) == {"http://shop.test/shop/page/3", "http://shop.test/shop/page/4"}
+
+
+def test_article_links_are_not_pagination():
+    """WordPress ?p=123 permalinks and "read more" links are left alone; ?p=N inside a pager is followed"""
+    html = ('<html><body><h2><a href="/?p=123">A post</a></h2><a href="/?p=124">More</a>'
+            '<a href="/story">Read more</a><a href="/story-2">more</a>'
+            '<div class="pager"><a href="/blog?p=2">2</a></div></body></html>')
+    links = find_pagination_links(BeautifulSoup(html, "html.parser"), "http://blog.test/blog")
+    assert links == ["http://blog.test/blog?p=2"]
+
+
+def test_bloom_filter():
+    """Added items are always found and the false positive rate stays near the target"""
+    seen = BloomFilter(1000, error_rate=0.01)
+    assert sum(seen.add(f"http://x/{i}") for i in range(1000)) >= 990
+    assert all(f"http://x/{i}" in seen for i in range(1000))
+    false_positives = sum(f"http://y/{i}" in seen for i in range(10000))
+    assert false_positives < 300
+    assert not seen.add("http://x/1")
+
+
+def test_crawl_streams_pages_within_limits():
+    """The crawl follows pagination, yields the first page before later ones load and stops at max_pages"""
+    first_page_seen = threading.Event()
+
+    def page(handler):
+        number = int(handler.path.rsplit("/", 1)[-1]) if "/page/" in handler.path else 1
+        if number > 1:
+            # Later pages are only served once the first page has been handed to the consumer
+            assert first_page_seen.wait(5)
+        return 200, {"Content-Type": "text/html"}, listing(number, 6).encode()
+
+    routes = {"/shop": page}
+    routes.update({f"/shop/page/{n}": page for n in range(1, 7)})
+    with FixtureServer(routes) as server:
+        mcp = WebscrapingMCP(crawl_limits=CrawlLimits(max_pages=4))
+        context = mcp.new_context()
+        context["elements_to_extract"] = ["prices"]
+
+        pages = []
+        for crawled in mcp.crawl([server.url("/shop")], context):
+            pages.append(crawled)
+            first_page_seen.set()
+
+    assert pages[0].url == server.url("/shop") and pages[0].data == {"prices": ["$1.00"]}
+    assert len(pages) == 4
+    urls = [crawled.url for crawled in pages]
+    assert len(set(urls)) == 4
+    assert all("elsewhere" not in url for url in urls)
+
+
+def test_generate_response_crawls_when_pagination_requested():
+    """Asking for all pages crawls the listing instead of claiming a browser was used"""
+    routes = {f"/shop/page/{n}": listing(n, 3) for n in range(1, 4)}
+    with FixtureServer(routes) as server:
+        mcp = WebscrapingMCP()
+        response = mcp.generate_response(f"scrape prices from {server.url('/shop/page/1')}",
+                                         "all pages, csv please")
+
+    assert "from 3 pages" in response
+    assert response.index("page/1") < response.index("page/2") < response.index("page/3")
+    assert "Selenium" not in response
+    assert "Followed next-page links" in response
+
+
+if __name__ == "__main__":
+    test_normalize_url()
+    test_find_pagination_links()
+    test_article_links_are_not_pagination()
+    test_bloom_filter()
+    test_crawl_streams_pages_within_limits()
+    test_generate_response_crawls_when_pagination_requested()
+    print("Crawler tests passed")
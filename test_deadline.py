@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Test script for per-turn deadlines across fetch, parse, extract and format
+"""
+
+import socket
+import threading
+import time
+
+from bs4 import BeautifulSoup
+
+from deadline import Deadline, DeadlineExceeded
+from enhanced_webscraping_mcp import WebscrapingMCP
+from extraction import compile_plan
+from http_client import HTTPClient
+from politeness import PolitenessScheduler
+
+SLOW_PAGE_HEAD = (b"<html><head><title>Slow Catalog</title></head><body>"
+                  b"<h1>Spring Sale</h1><h2>Garden tools</h2><p>")
+
+
+class DripServer:
+    """Raw socket server that sends a page's head at once, then one byte every `interval` seconds"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.closed = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def url(self, path="/"):
+        return f"http://127.0.0.1:{self.sock.getsockname()[1]}{path}"
+
+    def _serve(self):
+        while not self.closed.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._drip, args=(conn,), daemon=True).start()
+
+    def _drip(self, conn):
+        with conn:
+            conn.recv(65536)
+            try:
+                conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                             b"Content-Length: 1000000\r\n\r\n" + SLOW_PAGE_HEAD)
+                while not self.closed.is_set():
+                    time.sleep(self.interval)
+                    conn.sendall(b"x")
+            except OSError:
+                pass
+
+    def close(self):
+        self.closed.set()
+        self.sock.close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_deadline_caps_timeouts_and_checks():
+    """Timeouts shrink to the remaining budget; an expired budget refuses new stages"""
+    clock = FakeClock()
+    deadline = Deadline(2.0, clock=clock)
+    assert deadline.cap((3.05, 10)) == (2.0, 2.0)
+    assert deadline.cap(1.0) == 1.0
+    assert deadline.cap(None) == 2.0
+    clock.now += 1.5
+    assert abs(deadline.wait_timeout() - 0.5) < 1e-9
+    deadline.check("fetch")
+    assert not deadline.partial
+
+    clock.now += 1.0
+    try:
+        deadline.check("fetch")
+        assert False, "expected DeadlineExceeded"
+    except DeadlineExceeded:
+        pass
+    deadline.cut_short("parse")
+    assert deadline.cut_short_in == "fetch"
+    assert deadline.remaining() == 0.0
+
+    unlimited = Deadline()
+    assert unlimited.cap((3.05, 10)) == (3.05, 10)
+    assert unlimited.wait_timeout() is None
+    assert not unlimited.expired()
+
+
+def test_slow_download_is_cut_at_the_deadline():
+    """A server dripping bytes cannot hold a fetch past the deadline; what arrived is kept"""
+    server = DripServer()
+    http = HTTPClient(cache=None)
+    try:
+        deadline = Deadline(0.5)
+        start = time.perf_counter()
+        page = http.fetch(server.url(), deadline=deadline, timeout=(3.05, 10))
+        elapsed = time.perf_counter() - start
+        assert elapsed < 1.0, elapsed
+        assert page.truncated
+        assert page.content.startswith(SLOW_PAGE_HEAD)
+        assert deadline.cut_short_in == "fetch"
+    finally:
+        http.close()
+        server.close()
+
+
+def test_extraction_stops_at_the_deadline():
+    """An expired deadline ends the extraction walk after the first nodes, keeping what was found"""
+    html = ("<html><head><title>Big page</title></head><body><h1>Top</h1>"
+            + "<div><span>filler</span></div>" * 5000
+            + '<meta name="description" content="Late"></body></html>')
+    soup = BeautifulSoup(html, "html.parser")
+    plan = compile_plan(("nothing-here",))
+
+    deadline = Deadline(0.0)
+    partial = plan.run(soup, deadline)
+    assert partial["Page Title"] == "Big page"
+    assert partial["Main Headings"] == ["Top"]
+    assert "Meta Description" not in partial
+    assert deadline.cut_short_in == "extract"
+
+    deadline = Deadline(60.0)
+    assert plan.run(soup, deadline)["Meta Description"] == "Late"
+    assert not deadline.partial
+
+
+def test_politeness_wait_respects_the_deadline():
+    """A rate-limit delay longer than the remaining budget fails at once instead of sleeping"""
+    http = HTTPClient(cache=None)
+    politeness = PolitenessScheduler(http, rate=0.1, burst=1, respect_robots=False)
+    url = "http://rate-limited.example/page"
+    politeness.wait(url)
+    deadline = Deadline(1.0)
+    start = time.perf_counter()
+    try:
+        politeness.wait(url, deadline=deadline)
+        assert False, "expected DeadlineExceeded"
+    except DeadlineExceeded:
+        pass
+    assert time.perf_counter() - start < 0.1
+    assert deadline.cut_short_in == "fetch"
+    http.close()
+
+
+def test_response_reports_partial_results_within_budget():
+    """generate_response answers near its budget with the title and headings seen so far"""
+    server = DripServer()
+    http = HTTPClient(cache=None)
+    try:
+        mcp = WebscrapingMCP(http_client=http, politeness=PolitenessScheduler(http, respect_robots=False),
+                             turn_budget=0.5)
+        start = time.perf_counter()
+        response = mcp.generate_response(f"Scrape {server.url('/catalog')} for the headings",
+                                         "just the title and headings", mcp.new_context())
+        assert time.perf_counter() - start < 1.5
+        assert "Slow Catalog" in response
+        assert "Spring Sale" in response
+        assert "time budget ran out during fetch" in response
+    finally:
+        http.close()
+        server.close()
+
+
+def test_prefetched_page_hands_over_partial_results():
+    """A prefetch still downloading when the turn's budget runs out is cut off and its page used"""
+    server = DripServer()
+    http = HTTPClient(cache=None)
+    try:
+        mcp = WebscrapingMCP(http_client=http, politeness=PolitenessScheduler(http, respect_robots=False),
+                             turn_budget=0.5)
+        context = mcp.new_context()
+        request = f"Scrape {server.url('/catalog')} for the headings"
+        mcp.generate_question(request, context)
+        start = time.perf_counter()
+        response = mcp.generate_response(request, "just the title and headings", context)
+        assert time.perf_counter() - start < 1.5
+        assert "Slow Catalog" in response
+        assert "Spring Sale" in response
+        assert "time budget ran out during fetch" in response
+        assert mcp.prefetcher.stats()["used"] == 1
+    finally:
+        http.close()
+        server.close()
+
+
+def test_shared_scrape_respects_each_turns_deadline():
+    """Turns sharing a scrape stop waiting at their own deadline; a cut-short result is not passed to one with time left"""
+    server = DripServer()
+    http = HTTPClient(cache=None)
+    try:
+        mcp = WebscrapingMCP(http_client=http, politeness=PolitenessScheduler(http, respect_robots=False))
+        request = f"Scrape {server.url('/catalog')} for the headings"
+        responses, elapsed = {}, {}
+
+        def turn(name, budget):
+            start = time.perf_counter()
+            responses[name] = mcp.generate_response(request, "just the title and headings", mcp.new_context(),
+                                                    deadline=Deadline(budget))
+            elapsed[name] = time.perf_counter() - start
+
+        leader = threading.Thread(target=turn, args=("leader", 0.6))
+        leader.start()
+        time.sleep(0.1)
+        followers = [threading.Thread(target=turn, args=("hurried", 0.2)),
+                     threading.Thread(target=turn, args=("patient", 1.2))]
+        for thread in followers:
+            thread.start()
+        for thread in [leader] + followers:
+            thread.join()
+
+        assert elapsed["hurried"] < 0.5, elapsed
+        assert "0.2s time budget ran out during fetch" in responses["hurried"]
+        assert "Spring Sale" in responses["leader"]
+        assert "0.6s time budget ran out during fetch" in responses["leader"]
+
+        # The leader's cut-short page was not good enough for a turn with time left: it scraped again
+        assert 1.0 < elapsed["patient"] < 1.7, elapsed
+        assert "Spring Sale" in responses["patient"]
+        assert "1.2s time budget ran out during fetch" in responses["patient"]
+        assert mcp.single_flight.stats()["flights"] == 2
+    finally:
+        http.close()
+        server.close()
+
+
+if __name__ == "__main__":
+    test_deadline_caps_timeouts_and_checks()
+    test_slow_download_is_cut_at_the_deadline()
+    test_extraction_stops_at_the_deadline()
+    test_politeness_wait_respects_the_deadline()
+    test_response_reports_partial_results_within_budget()
+    test_prefetched_page_hands_over_partial_results()
+    test_shared_scrape_respects_each_turns_deadline()
+    print("Deadline tests passed")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass extraction plan
+"""
+
+from extraction import compile_plan
+from html_corpus import retail_page, news_page, nested_page
+from html_parsers import parse_html
+
+ELEMENT_SETS = [
+    (),
+    ("prices", "product titles", "images", "description"),
+    ("ai", "rating"),
+    ("customer reviews",),
+    ("nothing-here",)
+]
+
+
+def test_single_pass_matches_select_per_category():
+    """The single walk extracts exactly what one soup.select per category would"""
+    for html in (retail_page(30), news_page(20), nested_page(50)):
+        soup = parse_html(html, "html.parser")
+        for elements in ELEMENT_SETS:
+            plan = compile_plan(elements)
+            assert plan.run(soup) == plan.run_with_select(soup), elements
+
+
+def test_plans_are_cached_and_fallback_is_used():
+    """Plans are reused per element list and missing elements fall back to the page summary"""
+    assert compile_plan(("prices",)) is compile_plan(("prices",))
+
+    soup = parse_html('<html><head><title> T </title><meta name="description" content="D"></head>'
+                      '<body><h1>H</h1><p>P1</p></body></html>', "html.parser")
+    assert compile_plan(("nothing-here",)).run(soup) == {
+        "Page Title": "T",
+        "Main Headings": ["H"],
+        "Meta Description": "D",
+        "Main Content": ["P1"]
+    }
+
+
+if __name__ == "__main__":
+    test_single_pass_matches_select_per_category()
+    test_plans_are_cached_and_fallback_is_used()
+    print("Extraction plan tests passed")
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Test script for the HTML parser backends
+"""
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from html_corpus import retail_page, news_page
+from html_parsers import available_backends, parse_html, select_backend
+
+
+def test_fallback_to_installed_backend():
+    """Unknown or missing backends fall back to an installed one"""
+    assert "html.parser" in available_backends()
+    assert select_backend("no-such-parser") == available_backends()[0]
+    assert select_backend("html.parser") == "html.parser"
+
+
+def test_backends_extract_the_same_data():
+    """Every installed backend yields identical extracted_data"""
+    mcp = WebscrapingMCP()
+    for elements in ([], ["prices", "product titles", "images", "description"]):
+        mcp.context["elements_to_extract"] = elements
+        for html in (retail_page(20), news_page(10)):
+            results = [mcp._extract(parse_html(html, backend)) for backend in available_backends()]
+            assert all(result == results[0] for result in results)
+
+
+if __name__ == "__main__":
+    test_fallback_to_installed_backend()
+    test_backends_extract_the_same_data()
+    print("HTML parser tests passed")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test script for the pooled HTTP client
+"""
+
+from fixture_server import FixtureServer
+from http_client import HTTPClient
+from mcp_research import ResearchMCP
+from enhanced_webscraping_mcp import WebscrapingMCP
+
+
+def test_connections_are_reused():
+    """Repeated requests to one host should go over a single kept-alive connection"""
+    connections = set()
+
+    def page(handler):
+        connections.add(handler.client_address)
+        return 200, {"Content-Type": "text/html"}, b"<html><title>ok</title></html>"
+
+    with FixtureServer({"/": page}) as server:
+        client = HTTPClient()
+        for _ in range(5):
+            assert client.get(server.url("/")).status_code == 200
+        client.close()
+
+    assert len(connections) == 1
+
+
+def test_client_is_injected_into_mcps():
+    """Both MCPs should use the client they are given"""
+    client = HTTPClient(read_timeout=3.0)
+    assert ResearchMCP(http_client=client).http is client
+    assert WebscrapingMCP(http_client=client).http is client
+    assert client.timeout == (5.0, 3.0)
+
+
+if __name__ == "__main__":
+    test_connections_are_reused()
+    test_client_is_injected_into_mcps()
+    print("HTTP client tests passed")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Test script for the keyword matcher
+"""
+
+import random
+
+from keyword_matcher import KEYWORD_TABLES, MATCHER
+from routing import determine_mcp_type
+
+
+def test_matches_substring_semantics():
+    """Every keyword is reported exactly when `keyword in text.lower()` is true"""
+    keywords = sorted({k for labels in KEYWORD_TABLES.values() for words in labels.values() for k in words})
+    fragments = keywords + [k[:3] for k in keywords] + [" ", "-", "X", "Pages", "WEB"]
+    rng = random.Random(7)
+    for _ in range(300):
+        text = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 12)))
+        hits = MATCHER.scan(text)
+        for keyword in rng.sample(keywords, len(keywords)):
+            assert hits.contains(keyword) == (keyword in text.lower()), (keyword, text)
+
+
+def test_group_priority():
+    """first() follows table order, as the old if/elif chains did"""
+    hits = MATCHER.scan("Detailed but BASIC, no sources please, for personal research")
+    assert hits.first("depth") == "basic"
+    assert hits.first("sources") == "without"
+    assert hits.first("focus") == "personal"
+    assert hits.first("frequency") is None and not hits.any("pagination")
+    assert determine_mcp_type("Crawl the WEB PAGE") == "webscraping"
+    assert determine_mcp_type("history of the printing press") == "research"
+
+
+if __name__ == "__main__":
+    test_matches_substring_semantics()
+    test_group_priority()
+    print("Keyword matcher tests passed")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test script for the load test harness
+"""
+
+import builtins
+import threading
+
+from load_test import ScriptedInput, run_load_test
+
+
+def test_scripted_input_is_per_thread():
+    """Each client thread gets its own answer and its think time is recorded"""
+    scripted = ScriptedInput()
+    answers = {}
+
+    def client(name):
+        scripted.script(f"answer {name}", 0.01)
+        answers[name] = (input("Your answer: "), scripted.thought)
+
+    with scripted.installed():
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert builtins.input is not scripted
+    assert answers == {i: (f"answer {i}", 0.01) for i in range(4)}
+
+
+def test_both_server_code_paths_under_load():
+    """Concurrent conversations through both servers complete without errors and are reported"""
+    for target in ("mcp_server", "server"):
+        report = run_load_test(target, conversations=24, clients=6, think_time=0.01, sample_interval=0.2)
+        assert report["target"] == target
+        assert report["conversations"] == 24
+        assert report["errors"] == 0, report["error_types"]
+        assert report["latency"]["count"] == 24
+        assert report["latency"]["p99_ms"] >= report["latency"]["p50_ms"] > 0
+        assert report["throughput_per_sec"] > 0
+        assert len(report["memory"]) >= 2 and report["memory"][-1]["completed"] == 24
+
+
+def test_open_loop_arrivals():
+    """With an arrival rate, conversations start on schedule rather than back to back"""
+    report = run_load_test("mcp_server", conversations=10, clients=2, arrival_rate=50.0, research_fraction=1.0)
+    assert report["conversations"] == 10
+    assert report["elapsed_seconds"] >= 0.1
+
+
+if __name__ == "__main__":
+    test_scripted_input_is_per_thread()
+    test_both_server_code_paths_under_load()
+    test_open_loop_arrivals()
+    print("Load test tests passed")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Test script for lazy MCP loading
+"""
+
+import subprocess
+import sys
+
+from mcp_registry import Lazy, MCPRegistry
+
+
+def test_entry_points_do_not_import_heavy_modules():
+    """Starting a server imports neither requests nor Beautiful Soup"""
+    code = ("import sys, server, mcp_server, batch; s = server.MCPServer(); "
+            "print(sorted(m for m in ('requests', 'bs4', 'enhanced_webscraping_mcp', 'mcp_research') if m in sys.modules), "
+            "list(s.mcps), s.mcps.loaded())")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=30, check=True)
+    assert result.stdout.strip() == "[] ['research', 'webscraping'] []"
+
+
+def test_registry_builds_each_mcp_once():
+    """An MCP is constructed on first lookup and reused afterwards; membership checks build nothing"""
+    built = []
+    client = Lazy(lambda: built.append("client") or object())
+    registry = MCPRegistry(http_client=client)
+    registry.register("echo", lambda: built.append("echo") or {"client": client()})
+
+    assert "echo" in registry and "other" not in registry and built == []
+    first = registry["echo"]
+    assert registry["echo"] is first and built == ["echo", "client"]
+    assert registry.loaded() == ["echo"] and client.built
+
+
+if __name__ == "__main__":
+    test_entry_points_do_not_import_heavy_modules()
+    test_registry_builds_each_mcp_once()
+    print("MCP registry tests passed")
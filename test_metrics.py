@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test script for stage latency histograms and per-host counters
+"""
+
+import asyncio
+import random
+import time
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from http_client import HTTPClient
+from metrics import METRICS, Histogram, Metrics, format_report
+from rpc_server import RPCServer
+
+
+def test_histogram_percentiles():
+    """Percentiles land within the 10% bucket width of the exact values"""
+    rng = random.Random(7)
+    samples = sorted(rng.uniform(0.001, 2.0) for _ in range(10000))
+    histogram = Histogram()
+    for sample in samples:
+        histogram.record(sample)
+    for fraction in (0.5, 0.95, 0.99):
+        exact = samples[int(fraction * len(samples)) - 1]
+        assert abs(histogram.percentile(fraction) - exact) <= exact * 0.1
+    summary = histogram.summary()
+    assert summary["count"] == 10000
+    assert summary["max_ms"] == samples[-1] * 1000
+    assert Histogram().percentile(0.5) == 0.0
+
+
+def test_stage_timing_and_report():
+    """time() records also when the block raises; the report lists stages and counters"""
+    metrics = Metrics()
+    with metrics.time("parse"):
+        time.sleep(0.01)
+    try:
+        with metrics.time("parse"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert metrics.call("format", str.upper, "ok") == "OK"
+    metrics.count("search_cache_hits")
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["parse"]["count"] == 2
+    assert snapshot["stages"]["parse"]["max_ms"] >= 10
+    assert snapshot["stages"]["format"]["count"] == 1
+    report = format_report(snapshot)
+    assert "parse" in report and "search_cache_hits: 1" in report
+    metrics.reset()
+    assert metrics.snapshot()["stages"] == {}
+
+
+def test_recording_overhead_is_small():
+    """A stage sample costs microseconds, so instrumentation can stay on"""
+    metrics = Metrics()
+    start = time.perf_counter()
+    for _ in range(100000):
+        with metrics.time("stage"):
+            pass
+    per_sample = (time.perf_counter() - start) / 100000
+    assert per_sample < 50e-6
+    assert metrics.snapshot()["stages"]["stage"]["count"] == 100000
+
+
+def test_per_host_counters_and_scrape_stages():
+    """Fetches count requests, bytes, cache hits and errors per host; scrapes time each stage"""
+    METRICS.reset()
+    page = "<html><head><title>Shop</title></head><body><span class='price'>$5</span></body></html>"
+    with FixtureServer({"/": page}) as server:
+        http = HTTPClient(cache=None)
+        host = server.url("/").split("/")[2]
+        assert http.fetch(server.url("/missing")).status_code == 404
+        mcp = WebscrapingMCP(http_client=http)
+        context = mcp.new_context()
+        context["elements_to_extract"] = ["prices"]
+        mcp._scrape_data(server.url("/"), context)
+        http.close()
+    snapshot = METRICS.snapshot()
+    counters = snapshot["hosts"][host]
+    assert counters["requests"] == 3  # the 404, robots.txt and the page
+    assert counters["errors"] == 2  # the 404 and robots.txt (also a 404)
+    assert counters["bytes"] >= len(page)
+    for stage in ("fetch", "parse", "extract"):
+        assert snapshot["stages"][stage]["count"] >= 1
+
+
+def test_rpc_stats_method():
+    """The JSON-RPC server reports the metrics snapshot with its session counts"""
+    server = RPCServer(mcps={"webscraping": WebscrapingMCP()})
+    response = asyncio.run(server.handle_message({"jsonrpc": "2.0", "id": 1, "method": "stats"}))
+    result = response["result"]
+    assert {"stages", "hosts", "counters", "sessions", "pending_turns"} <= set(result)
+
+
+if __name__ == "__main__":
+    test_histogram_percentiles()
+    test_stage_timing_and_report()
+    test_recording_overhead_is_small()
+    test_per_host_counters_and_scrape_stages()
+    test_rpc_stats_method()
+    print("Metrics tests passed")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for page encoding detection
+"""
+
+from metrics import METRICS, format_report
+from page_encoding import detect_encoding, encoding_stats, FALLBACK_DETECT_BYTES
+from fixture_server import FixtureServer
+from enhanced_webscraping_mcp import WebscrapingMCP
+
+
+def test_declared_sources_win_over_detection():
+    """Header charset, BOM and <meta> are used before any detection runs"""
+    before = encoding_stats()["fallback"]
+    assert detect_encoding(b"<html></html>", {"Content-Type": "text/html; charset=ISO-8859-1"}) == "iso8859-1"
+    assert detect_encoding(b"\xef\xbb\xbf<html></html>", {"Content-Type": "text/html"}) == "utf-8-sig"
+    assert detect_encoding(b'<html><head><meta charset="windows-1252"></head>', {}) == "cp1252"
+    assert detect_encoding(b'<meta http-equiv="Content-Type" content="text/html; charset=utf-8">', {}) == "utf-8"
+    assert encoding_stats()["fallback"] == before
+
+
+def test_bom_overrides_header_and_only_meta_utf16_means_utf8():
+    """A BOM beats the header charset; UTF-16 is honored from the header but not from a <meta>"""
+    body = "<html>é</html>".encode("utf-16")
+    assert detect_encoding(b"\xef\xbb\xbf<html></html>", {"Content-Type": "text/html; charset=ISO-8859-1"}) == "utf-8-sig"
+    assert detect_encoding(body, {"Content-Type": "text/html; charset=utf-8"}) == "utf-16"
+    assert detect_encoding("<html>é</html>".encode("utf-16-le"), {"Content-Type": "text/html; charset=UTF-16LE"}) == "utf-16-le"
+    assert detect_encoding(b'<meta charset="utf-16">', {}) == "utf-8"
+
+
+def test_fallback_is_counted():
+    """Pages with no declaration fall back to capped detection, and the metric counts it"""
+    before = encoding_stats()["fallback"]
+    body = ("<p>" + "café " * 20000 + "</p>").encode("utf-8")
+    assert len(body) > FALLBACK_DETECT_BYTES
+    assert detect_encoding(body, {"Content-Type": "text/html"}) in ("utf-8", "utf_8")
+    assert encoding_stats()["fallback"] == before + 1
+    assert METRICS.snapshot()["counters"]["encoding_fallback"] == before + 1
+    assert f"encoding_fallback: {before + 1}" in format_report(METRICS.snapshot())
+
+
+def test_scraper_decodes_with_meta_charset():
+    """Non-UTF-8 pages that declare their charset in <meta> are decoded correctly"""
+    page = '<html><head><meta charset="iso-8859-1"><title>Café</title></head></html>'.encode("iso-8859-1")
+
+    def handler(_):
+        return 200, {"Content-Type": "text/html"}, page
+
+    with FixtureServer({"/": handler}) as server:
+        assert '"Page Title": "Caf\\u00e9"' in WebscrapingMCP()._scrape_website(server.url("/"))
+
+
+if __name__ == "__main__":
+    test_declared_sources_win_over_detection()
+    test_bom_overrides_header_and_only_meta_utf16_means_utf8()
+    test_fallback_is_counted()
+    test_scraper_decodes_with_meta_charset()
+    print("Page encoding tests passed")
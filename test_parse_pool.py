@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for parsing and extraction in worker processes
+"""
+
+import asyncio
+import os
+import time
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from html_corpus import retail_page
+from parse_pool import ParsePool, parse_and_extract
+
+ELEMENTS = ("prices", "product titles")
+
+
+def test_pool_matches_in_process_extraction():
+    """Workers return the same dict as parsing in this process, from warm worker processes"""
+    page = retail_page(20).encode("utf-8")
+    pool = ParsePool(workers=2)
+    try:
+        assert pool.extract(page, "utf-8", ELEMENTS) == parse_and_extract(page, "utf-8", ELEMENTS, backend=pool.backend)
+        pids = {future.result() for future in [pool.executor.submit(os.getpid) for _ in range(8)]}
+        assert os.getpid() not in pids
+
+        async def extract_many():
+            return await asyncio.gather(*(pool.extract_async(page, "utf-8", ELEMENTS) for _ in range(4)))
+
+        results = asyncio.run(extract_many())
+        assert all(result == results[0] for result in results)
+        assert len(results[0]["prices"]) == 5
+    finally:
+        pool.close()
+
+
+def test_mcp_scrapes_through_the_pool():
+    """With a parse pool, the MCP fetches on its own threads and extracts in the workers"""
+    pool = ParsePool(workers=1)
+    try:
+        with FixtureServer({"/": retail_page(5)}) as server:
+            mcp = WebscrapingMCP(parse_pool=pool)
+            context = mcp.new_context()
+            context["elements_to_extract"] = list(ELEMENTS)
+            data = mcp._scrape_data(server.url("/"), context)
+    finally:
+        pool.close()
+    assert data["product titles"][0] == "All products"
+    assert len(data["prices"]) == 5
+
+
+class CountingPool(ParsePool):
+    """ParsePool that counts the pages submitted to it"""
+
+    submitted = 0
+
+    def submit(self, content, encoding, elements):
+        self.submitted += 1
+        return super().submit(content, encoding, elements)
+
+
+def test_prefetched_pages_go_through_the_pool():
+    """In the question-then-answer flow the prefetched bytes are parsed in the workers too"""
+    pool = CountingPool(workers=1)
+    try:
+        with FixtureServer({"/": retail_page(5)}) as server:
+            mcp = WebscrapingMCP(parse_pool=pool)
+            request = f"scrape {server.url('/')}"
+            mcp.generate_question(request)
+            time.sleep(0.3)  # the user is thinking
+            response = mcp.generate_response(request, "prices in json")
+    finally:
+        pool.close()
+    assert mcp.prefetcher.stats()["used"] == 1
+    assert pool.submitted == 1
+    assert '"Page Title": "Shop - Products"' in response
+
+
+if __name__ == "__main__":
+    test_pool_matches_in_process_extraction()
+    test_mcp_scrapes_through_the_pool()
+    test_prefetched_pages_go_through_the_pool()
+    print("Parse pool tests passed")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming downloads with targeted partial parsing
+"""
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from extraction import compile_plan
+from fixture_server import FixtureServer
+from html_corpus import retail_page, news_page, nested_page, sized_page
+from html_parsers import available_backends, parse_html
+
+ELEMENT_SETS = [
+    (),
+    ("prices", "product titles", "images", "description"),
+    ("ai", "rating"),
+    ("nothing-here",)
+]
+
+
+def received_prefix(plan, html: bytes, chunk_size: int = 4096) -> bytes:
+    """Feed the page to the plan's scanner chunk by chunk and return what would have been downloaded"""
+    scanner = plan.scanner()
+    for offset in range(0, len(html), chunk_size):
+        if scanner.feed_bytes(html[offset:offset + chunk_size]):
+            return html[:offset + chunk_size]
+    return html
+
+
+def test_partial_parse_matches_full_parse():
+    """Stopping early and straining the parse never changes the extracted data"""
+    for html in (retail_page(40), news_page(30), nested_page(50)):
+        for elements in ELEMENT_SETS:
+            plan = compile_plan(elements)
+            prefix = received_prefix(plan, html.encode("utf-8"))
+            for backend in available_backends():
+                full = plan.run(parse_html(html, backend))
+                partial = plan.run(parse_html(prefix.decode("utf-8", "replace"), backend, parse_only=plan.strainer()))
+                assert partial == full, (elements, backend)
+
+
+def test_streaming_stops_once_fields_are_found():
+    """A multi-MB page is only downloaded until the plan is satisfied, or up to the byte budget"""
+    big = sized_page(4 * 1024 * 1024).encode("utf-8")
+    with FixtureServer({"/big": big}) as server:
+        mcp = WebscrapingMCP()
+        mcp.context["elements_to_extract"] = []
+        page = mcp.http.fetch(server.url("/big"), until=compile_plan(()).scanner().feed_bytes)
+        assert page.truncated and len(page.content) < 512 * 1024
+        assert '"Page Title": "Large page"' in mcp._scrape_website(server.url("/big"))
+
+        budget = mcp.http.fetch(server.url("/big"), max_bytes=100000)
+        assert budget.truncated and len(budget.content) == 100000
+
+
+if __name__ == "__main__":
+    test_partial_parse_matches_full_parse()
+    test_streaming_stops_once_fields_are_found()
+    print("Partial parsing tests passed")
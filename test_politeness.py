@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script for per-host rate limits, robots.txt and Retry-After handling
+"""
+
+import os
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+
+from concurrency import bounded_map
+from deadline import Deadline, DeadlineExceeded
+from fixture_server import FixtureServer
+from http_client import HTTPClient
+from politeness import PolitenessScheduler, RobotsDisallowed, TokenBucket, parse_retry_after
+from response_cache import ResponseCache
+
+ROBOTS = "User-agent: *\nDisallow: /private\nCrawl-delay: 2\n"
+
+
+def test_token_bucket_reservations():
+    """A burst goes through at once, then callers queue one interval apart"""
+    bucket = TokenBucket(rate=2.0, burst=2, now=0.0)
+    assert [bucket.reserve(0.0) for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    assert bucket.reserve(10.0) == 0.0
+
+
+def test_parse_retry_after():
+    """Both delay-seconds and HTTP-date forms are understood"""
+    assert parse_retry_after("7") == 7.0
+    assert abs(parse_retry_after(formatdate(1000.0 + 30, usegmt=True), now=1000.0) - 30) < 1
+    assert parse_retry_after(formatdate(1000.0 - 30, usegmt=True), now=1000.0) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_robots_fetched_once_and_crawl_delay_honored():
+    """Concurrent fetches share one robots.txt download, skip disallowed paths and keep the Crawl-delay"""
+    waits = []
+    with FixtureServer({"/robots.txt": ROBOTS, "/a": "<title>A</title>", "/private": "secret"}) as server:
+        politeness = PolitenessScheduler(HTTPClient(dns_ttl=None), sleep=waits.append)
+        threads = [threading.Thread(target=politeness.fetch, args=(server.url("/a"),)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        try:
+            politeness.fetch(server.url("/private"))
+            assert False, "disallowed URL was fetched"
+        except RobotsDisallowed:
+            pass
+        assert server.request_count == 4  # robots.txt plus the three pages
+
+    # Crawl-delay: 2 allows one request every two seconds, queued in reservation order
+    assert [round(wait) for wait in sorted(waits)] == [2, 4]
+    stats = politeness.stats()
+    assert stats["robots_fetches"] == 1
+    assert stats["disallowed"] == 1
+
+
+def test_retry_after_respected():
+    """A 429 with Retry-After pauses the host, then the fetch is retried once"""
+    calls = {"n": 0}
+
+    def throttled(_):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return 429, {"Retry-After": "3", "Content-Type": "text/plain"}, b"slow down"
+        return 200, {"Content-Type": "text/html"}, b"<title>OK</title>"
+
+    waits = []
+    with FixtureServer({"/busy": throttled}) as server:
+        politeness = PolitenessScheduler(HTTPClient(dns_ttl=None), sleep=waits.append)
+        page = politeness.fetch(server.url("/busy"))
+
+    assert page.status_code == 200
+    assert calls["n"] == 2
+    assert len(waits) == 1 and 2.9 < waits[0] <= 3.0
+    assert politeness.stats()["retry_after"] == 1
+
+
+def test_slow_host_does_not_hold_up_others():
+    """A host limited by robots.txt waits its turn while another host's pages are fetched at full speed"""
+    finished = {}
+
+    def page(handler):
+        finished[handler.headers["Host"] + handler.path] = time.perf_counter()
+        return 200, {"Content-Type": "text/html"}, b"<title>ok</title>"
+
+    slow_routes = {"/robots.txt": "User-agent: *\nRequest-rate: 5/1\n"}
+    slow_routes.update({f"/s{i}": page for i in range(4)})
+    fast_routes = {f"/f{i}": page for i in range(4)}
+    with FixtureServer(slow_routes) as slow, FixtureServer(fast_routes) as fast:
+        politeness = PolitenessScheduler(HTTPClient(dns_ttl=None))
+        urls = [slow.url(f"/s{i}") for i in range(4)] + [fast.url(f"/f{i}") for i in range(4)]
+        start = time.perf_counter()
+        results = bounded_map(lambda url: politeness.fetch(url).status_code, urls, max_workers=4)
+
+    assert [status for _, status, _ in results] == [200] * 8
+    slow_times = [t - start for key, t in finished.items() if "/s" in key]
+    fast_times = [t - start for key, t in finished.items() if "/f" in key]
+    # Request-rate 5/1 spaces the slow host's pages 0.2s apart
+    assert max(slow_times) >= 0.55
+    assert max(fast_times) < max(slow_times)
+
+
+def test_deadline_refusal_keeps_the_schedule_and_robots_cache():
+    """A wait refused for lack of time takes no token, and a robots.txt cut short is not cached"""
+    now = {"t": 0.0}
+    waits = []
+    politeness = PolitenessScheduler(HTTPClient(cache=None), rate=0.1, burst=1, respect_robots=False,
+                                     clock=lambda: now["t"], sleep=waits.append)
+    url = "http://rate-limited.example/page"
+    assert politeness.wait(url) == 0.0
+    for _ in range(3):
+        try:
+            politeness.wait(url, deadline=Deadline(1.0, clock=lambda: now["t"]))
+            assert False, "expected DeadlineExceeded"
+        except DeadlineExceeded:
+            pass
+    assert politeness.wait(url) == 10.0  # the refused waits did not push the next slot back
+
+    def slow_robots(_):
+        time.sleep(0.5)
+        return 200, {"Content-Type": "text/plain"}, b"User-agent: *\nDisallow:\n"
+
+    with FixtureServer({"/robots.txt": slow_robots, "/a": "<title>A</title>"}) as server:
+        politeness = PolitenessScheduler(HTTPClient(cache=None, dns_ttl=None))
+        start = time.perf_counter()
+        try:
+            politeness.fetch(server.url("/a"), deadline=Deadline(0.2))
+            assert False, "expected DeadlineExceeded"
+        except DeadlineExceeded:
+            pass
+        assert time.perf_counter() - start < 0.45
+        assert politeness.fetch(server.url("/a")).status_code == 200
+        assert politeness.stats()["robots_fetches"] == 2
+
+
+def test_zero_second_request_rate_is_ignored():
+    """A robots.txt "Request-rate: 1/0" leaves the host at our own rate instead of failing every fetch"""
+    waits = []
+    routes = {"/robots.txt": "User-agent: *\nRequest-rate: 1/0\n", "/a": "<title>A</title>", "/b": "<title>B</title>"}
+    with FixtureServer(routes) as server:
+        politeness = PolitenessScheduler(HTTPClient(cache=None, dns_ttl=None), sleep=waits.append)
+        assert [politeness.fetch(server.url(path)).status_code for path in ("/a", "/b")] == [200, 200]
+    assert waits == []
+
+
+def test_cache_hits_take_no_token():
+    """A page served from the response cache goes straight back, without waiting on the host's rate limit"""
+    def cacheable(_):
+        return 200, {"Content-Type": "text/html", "Cache-Control": "max-age=60"}, b"<title>Cached</title>"
+
+    waits = []
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer({"/page": cacheable}) as server:
+        http = HTTPClient(dns_ttl=None, cache=ResponseCache(os.path.join(tmp, "cache.sqlite")))
+        politeness = PolitenessScheduler(http, rate=0.1, burst=1, respect_robots=False, sleep=waits.append)
+        pages = [politeness.fetch(server.url("/page")) for _ in range(3)]
+        assert server.request_count == 1
+        http.cache.close()
+    assert [page.from_cache for page in pages] == [False, True, True]
+    assert waits == [] and politeness.stats()["requests"] == 1
+
+
+if __name__ == "__main__":
+    test_token_bucket_reservations()
+    test_parse_retry_after()
+    test_robots_fetched_once_and_crawl_delay_honored()
+    test_retry_after_respected()
+    test_slow_host_does_not_hold_up_others()
+    test_deadline_refusal_keeps_the_schedule_and_robots_cache()
+    test_zero_second_request_rate_is_ignored()
+    test_cache_hits_take_no_token()
+    print("Politeness tests passed")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for speculative prefetching while the user answers
+"""
+
+import json
+import threading
+import time
+
+from deadline import Deadline
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from mcp_research import ResearchMCP
+from prefetch import Prefetcher
+
+
+def test_webscraping_reuses_prefetched_page():
+    """The page is fetched during think-time and generate_response does not fetch it again"""
+    def slow_page(_):
+        time.sleep(0.3)
+        return 200, {"Content-Type": "text/html"}, b"<html><title>Prefetched</title><h1>Hi</h1></html>"
+
+    with FixtureServer({"/slow": slow_page}) as server:
+        mcp = WebscrapingMCP()
+        request = f"scrape {server.url('/slow')}"
+        mcp.generate_question(request)
+        time.sleep(0.5)  # the user is thinking
+
+        start = time.perf_counter()
+        response = mcp.generate_response(request, "titles in json")
+        assert time.perf_counter() - start < 0.25
+        assert server.request_count == 2  # robots.txt, then the page once
+    assert "Prefetched" in response
+    assert mcp.prefetcher.stats()["used"] == 1
+
+
+def test_research_prefetch_used_or_cancelled():
+    """A depth-only answer reuses the prefetched search; a topical answer cancels it"""
+    def search(_):
+        body = {"query": {"search": [{"title": "Quantum computing", "snippet": "qubits"}]}}
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    with FixtureServer({"/w/api.php": search}) as server:
+        mcp = ResearchMCP(api_url=server.url("/w/api.php"))
+        mcp.generate_question("quantum computing for beginners")
+        response = mcp.generate_response("quantum computing for beginners", "basic please")
+        assert server.request_count == 1
+        assert "**Quantum computing**" in response
+
+        mcp.generate_question("history of cryptography")
+        mcp.generate_response("history of cryptography", "enigma machine")
+        assert mcp.prefetcher.stats()["cancelled"] == 1
+
+
+def test_prefetch_belongs_to_its_conversation():
+    """Two conversations prefetching one page keep their own downloads; one's cancel leaves the other's alone"""
+    def page(_):
+        time.sleep(0.1)
+        return 200, {"Content-Type": "text/html"}, b"<html><title>Shared</title></html>"
+
+    with FixtureServer({"/shared": page, "/other": "<title>Other</title>"}) as server:
+        mcp = WebscrapingMCP()
+        first, second = mcp.new_context(), mcp.new_context()
+        request = f"scrape {server.url('/shared')}"
+        mcp.generate_question(request, first)
+        mcp.generate_question(request, second)
+        mcp.generate_response(f"scrape {server.url('/other')}", "titles in json", second)
+        response = mcp.generate_response(request, "titles in json", first)
+    assert '"Shared"' in response
+    stats = mcp.prefetcher.stats()
+    assert stats["used"] == 1 and stats["cancelled"] == 1
+
+
+def test_take_cancels_a_prefetch_that_overruns():
+    """A prefetch not done within take()'s timeout is told to stop instead of running on"""
+    prefetcher = Prefetcher()
+    stopped = threading.Event()
+
+    def work(cancelled):
+        while not cancelled.wait(0.01):
+            pass
+        stopped.set()
+        return "late"
+
+    prefetcher.submit(("page", "c1", "http://example.com/"), work)
+    assert prefetcher.take(("page", "c1", "http://example.com/"), timeout=0.05) is None
+    assert stopped.wait(1.0)
+    assert prefetcher.stats()["cancelled"] == 1
+    prefetcher.shutdown()
+
+
+def test_take_does_not_wait_for_a_queued_prefetch():
+    """A prefetch still queued behind others is cancelled at once, leaving the turn its whole budget"""
+    prefetcher = Prefetcher(max_workers=1)
+    release = threading.Event()
+    prefetcher.submit(("page", "c1", "http://example.com/busy"), lambda cancelled: release.wait(5.0))
+    prefetcher.submit(("page", "c2", "http://example.com/queued"), lambda cancelled: "page")
+    start = time.perf_counter()
+    assert prefetcher.take(("page", "c2", "http://example.com/queued"), deadline=Deadline(5.0)) is None
+    assert time.perf_counter() - start < 0.1
+    assert prefetcher.stats()["cancelled"] == 1
+    release.set()
+    prefetcher.shutdown()
+
+
+if __name__ == "__main__":
+    test_webscraping_reuses_prefetched_page()
+    test_research_prefetch_used_or_cancelled()
+    test_prefetch_belongs_to_its_conversation()
+    test_take_cancels_a_prefetch_that_overruns()
+    test_take_does_not_wait_for_a_queued_prefetch()
+    print("Prefetch tests passed")
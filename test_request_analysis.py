@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-turn request analysis
+"""
+
+from mcp_research import ResearchMCP
+from request_analysis import analyze, analyze_turn
+from routing import determine_mcp_type
+
+
+def test_turn_analysis_matches_combined_text():
+    """URLs, elements and keywords of a turn are those of the joined request and answer"""
+    request = "Scrape https://shop.example.com/deals?page=2, then tell me about the NEXT"
+    answer = "page of it. Extract prices, titles and get daily CSV"
+    turn = analyze_turn(request, answer)
+
+    assert turn.urls == ("https://shop.example.com/deals?page=2",)
+    assert turn.elements == ("prices", "titles and get daily csv")
+    assert turn.hits.contains("next page") and not turn.request.hits.contains("next page")
+    assert turn.hits.first("frequency") == "daily" and turn.hits.first("format") == "csv"
+    assert turn.request is analyze(request) and turn.answer.token_count == 10
+
+
+def test_analysis_is_shared_and_immutable():
+    """Routing and the MCP read the same analysis object, which cannot be modified"""
+    request = "history of cryptography through the ages"
+    assert determine_mcp_type(request) == "research"
+    analysis = analyze(request)
+    assert analyze(request) is analysis
+    assert analysis.token_count == 6 and analysis.urls == ()
+    try:
+        analysis.urls = ("https://example.com",)
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("analysis should be read-only")
+
+    mcp = ResearchMCP()
+    context = mcp.new_context()
+    mcp._update_context(request, "advanced, no sources, casual", context)
+    assert (context["depth"], context["sources_required"], context["academic_focus"]) == ("advanced", False, False)
+
+
+if __name__ == "__main__":
+    test_turn_analysis_matches_combined_text()
+    test_analysis_is_shared_and_immutable()
+    print("Request analysis tests passed")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for search result memoization in the research MCP
+"""
+
+import json
+import os
+import tempfile
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from fixture_server import FixtureServer
+from mcp_research import ResearchMCP
+from query_cache import SQLiteStore, TTLCache, normalize_query
+
+SEARCH_RESULTS = {
+    "query": {
+        "search": [
+            {"title": "Quantum computing", "snippet": 'A <span class="searchmatch">quantum</span> computer'},
+            {"title": "Qubit", "snippet": "Unit of quantum information"},
+            {"title": "Quantum algorithm", "snippet": "An algorithm for quantum computers"}
+        ]
+    }
+}
+
+
+def test_normalize_query():
+    """Case, whitespace and hand-built %20 encoding all normalize away"""
+    assert normalize_query("Quantum%20Computing ") == "quantum computing"
+    assert normalize_query("  quantum \t COMPUTING") == "quantum computing"
+    assert normalize_query("C++ Programming") == "c++ programming"
+    assert normalize_query("C%2B%2B programming") == "c++ programming"
+
+
+def test_search_sends_the_query_as_written():
+    """Wikipedia gets the user's query (plus signs and case intact), not the cache key"""
+    seen = []
+
+    def search(handler):
+        seen.append(parse_qs(urlsplit(handler.path).query)["srsearch"][0])
+        return 200, {"Content-Type": "application/json"}, json.dumps(SEARCH_RESULTS).encode()
+
+    with FixtureServer({"/w/api.php": search}) as server:
+        mcp = ResearchMCP(api_url=server.url("/w/api.php"))
+        mcp._get_research_information("C++  Programming")
+        mcp._get_research_information("c++ programming")
+    assert seen == ["C++ Programming"]
+
+
+def test_one_search_serves_every_depth():
+    """Equivalent queries hit the cache and depth formatting happens after the lookup"""
+    def search(handler):
+        return 200, {"Content-Type": "application/json"}, json.dumps(SEARCH_RESULTS).encode()
+
+    with FixtureServer({"/w/api.php": search}) as server:
+        mcp = ResearchMCP(api_url=server.url("/w/api.php"))
+        responses = {}
+        for depth, query in [("basic", "Quantum computing"), ("intermediate", "quantum%20computing"),
+                             ("advanced", "QUANTUM   computing")]:
+            mcp.context["depth"] = depth
+            responses[depth] = mcp._get_research_information(query)
+
+        assert server.request_count == 1
+
+    assert responses["basic"].startswith("**Quantum computing**")
+    assert "2. **Qubit**" in responses["intermediate"]
+    assert "3. **Quantum algorithm**" in responses["advanced"]
+    assert mcp.search_cache.stats()["hits"] == 2
+
+
+def test_ttl_lru_and_sqlite_backing():
+    """Entries expire, the LRU bound holds and the SQLite store survives a new cache"""
+    cache = TTLCache(ttl=0.05, max_entries=2)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    cache.set("c", [3])
+    assert cache.get("a") is None
+    time.sleep(0.06)
+    assert cache.get("b") is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "research.sqlite")
+        TTLCache(store=SQLiteStore(path)).set("quantum", [{"title": "Qubit"}])
+        restarted = TTLCache(store=SQLiteStore(path))
+        assert restarted.get("quantum") == [{"title": "Qubit"}]
+        assert restarted.stats()["store_hits"] == 1
+
+        # Pruning drops expired rows, then the soonest to expire beyond max_entries
+        store = SQLiteStore(os.path.join(tmp, "bounded.sqlite"), max_entries=3, prune_every=2)
+        now = time.time()
+        store.set("expired", [0], now - 1)
+        for i in range(5):
+            store.set(f"q{i}", [i], now + 60 + i)
+        assert store.get("q4") == ([4], now + 64)
+        assert store.purge_expired() == 0
+        assert [store.get(f"q{i}") is not None for i in range(5)] == [False, False, True, True, True]
+
+        # A fresh cache directory is created by the store itself
+        nested = os.path.join(tmp, "fresh-home", ".cache", "research.sqlite")
+        TTLCache(store=SQLiteStore(nested)).set("qubit", [1])
+        assert os.path.exists(nested)
+
+
+def test_empty_and_error_results_are_not_kept():
+    """An API error is not cached at all and an empty result only briefly, so a hiccup does not blank a query"""
+    replies = [{"error": {"code": "maxlag", "info": "Waiting for a lagged replica"}},
+               {"query": {"search": []}}, SEARCH_RESULTS]
+
+    def search(handler):
+        return 200, {"Content-Type": "application/json"}, json.dumps(replies.pop(0)).encode()
+
+    with FixtureServer({"/w/api.php": search}) as server:
+        mcp = ResearchMCP(api_url=server.url("/w/api.php"))
+        assert "lagged replica" in mcp._get_research_information("quantum computing")
+        assert "No specific research information" in mcp._get_research_information("quantum computing")
+        assert "No specific research information" in mcp._get_research_information("quantum computing")
+        assert server.request_count == 2
+        key = normalize_query("quantum computing")
+        with mcp.search_cache._lock:
+            _, expires_at, _ = mcp.search_cache._entries[key]
+        assert expires_at - time.time() <= 60
+        mcp.search_cache.set(key, [], ttl=0)
+        assert "Quantum computing" in mcp._get_research_information("quantum computing")
+        assert server.request_count == 3
+
+
+if __name__ == "__main__":
+    test_normalize_query()
+    test_search_sends_the_query_as_written()
+    test_one_search_serves_every_depth()
+    test_ttl_lru_and_sqlite_backing()
+    test_empty_and_error_results_are_not_kept()
+    print("Research cache tests passed")
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Test script for retries, hedged requests and per-host circuit breakers
+"""
+
+import json
+import random
+import socket
+import threading
+import time
+
+import requests
+
+from deadline import Deadline
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from http_client import HTTPClient
+from mcp_research import ResearchMCP
+from politeness import PolitenessScheduler
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitOpen, Resilience, ResiliencePolicy, backoff_delay
+
+
+def dead_url(path="/"):
+    """A URL on a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}{path}"
+
+
+def dropping_server():
+    """A local server that promises a 1000-byte body, sends part of it and hangs up; returns (url, request count)"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(8)
+    requests_seen = [0]
+
+    def serve():
+        while True:
+            conn, _ = sock.accept()
+            with conn:
+                conn.recv(65536)
+                requests_seen[0] += 1
+                conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+                             b"Content-Length: 1000\r\n\r\n<html><title>cut")
+
+    threading.Thread(target=serve, daemon=True).start()
+    return f"http://127.0.0.1:{sock.getsockname()[1]}/", requests_seen
+
+
+def flaky(failures, status=503):
+    """Route that answers `status` for the first `failures` requests, then 200"""
+    calls = {"n": 0}
+
+    def route(handler):
+        calls["n"] += 1
+        if calls["n"] <= failures:
+            return status, {"Content-Type": "text/plain"}, b"unavailable"
+        return 200, {"Content-Type": "text/html"}, b"<html><title>ok</title></html>"
+
+    return route
+
+
+def test_backoff_is_jittered_and_capped():
+    """Delays are drawn below a cap that doubles per retry up to backoff_max"""
+    policy = ResiliencePolicy(backoff_base=0.1, backoff_max=0.5)
+    rng = random.Random(1)
+    delays = [[backoff_delay(retry, policy, rng) for _ in range(200)] for retry in range(5)]
+    for retry, samples in enumerate(delays):
+        assert max(samples) <= min(0.5, 0.1 * 2 ** retry)
+        assert len(set(samples)) > 100
+
+
+def test_retries_recover_from_server_errors():
+    """5xx answers are retried after a backoff; the successful response is returned"""
+    sleeps = []
+    resilience = Resilience(ResiliencePolicy(max_attempts=3), sleep=sleeps.append)
+    http = HTTPClient(cache=None)
+    with FixtureServer({"/": flaky(2)}) as server:
+        response = resilience.call(server.url("/"), lambda: http.get(server.url("/")))
+        assert response.status_code == 200
+        assert server.request_count == 3
+    assert len(sleeps) == 2
+    assert resilience.counters["retries"] == 2 and resilience.breaker(server.url("/")).state == CLOSED
+
+    # When every attempt fails, the last response is handed back for raise_for_status()
+    with FixtureServer({"/": flaky(10)}) as server:
+        response = resilience.call(server.url("/"), lambda: http.get(server.url("/")))
+        assert response.status_code == 503 and server.request_count == 3
+    http.close()
+
+
+def test_circuit_breaker_fails_fast_and_probes():
+    """Consecutive failures open the circuit; after the reset timeout one probe decides"""
+    now = [0.0]
+    resilience = Resilience(ResiliencePolicy(max_attempts=1, failure_threshold=2, reset_timeout=30.0),
+                            clock=lambda: now[0], sleep=lambda s: None)
+    url = dead_url()
+    http = HTTPClient(cache=None)
+    for _ in range(2):
+        try:
+            resilience.call(url, lambda: http.get(url))
+            assert False, "dead host answered"
+        except requests.exceptions.ConnectionError:
+            pass
+    assert resilience.breaker(url).state == OPEN
+
+    sent = []
+    try:
+        resilience.call(url, lambda: sent.append(url))
+        assert False, "open circuit let a request through"
+    except CircuitOpen:
+        pass
+    assert sent == [] and resilience.stats()["open_circuits"] == [url.split("/")[2]]
+
+    # Half-open: the probe is let through (and only the probe); its success closes the circuit
+    now[0] = 31.0
+    breaker = resilience.breaker(url)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.release()
+    assert resilience.call(url, lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+    # A failed probe opens it again
+    for _ in range(2):
+        breaker.record_failure()
+    now[0] = 62.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    http.close()
+
+
+def test_hedged_request_beats_slow_primary():
+    """A second request is sent after the hedge delay and the faster answer wins"""
+    calls = {"n": 0}
+
+    def slow_first(handler):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            time.sleep(1.0)
+        return 200, {"Content-Type": "text/plain"}, str(calls["n"]).encode()
+
+    resilience = Resilience(ResiliencePolicy(hedge_after=0.95, hedge_initial_delay=0.05))
+    http = HTTPClient(cache=None)
+    with FixtureServer({"/": slow_first}) as server:
+        start = time.perf_counter()
+        response = resilience.call(server.url("/"), lambda: http.get(server.url("/")))
+        elapsed = time.perf_counter() - start
+    assert response.text == "2"
+    assert elapsed < 0.8
+    assert resilience.counters["hedges"] == 1 and resilience.counters["hedge_wins"] == 1
+    resilience.close()
+    http.close()
+
+
+def test_hedge_prefers_a_success_over_a_fast_error_status():
+    """A 503 that arrives first does not win the race while the other request can still succeed"""
+    calls = {"n": 0}
+
+    def slow_then_busy(handler):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            time.sleep(0.3)
+            return 200, {"Content-Type": "text/plain"}, b"ok"
+        return 503, {"Content-Type": "text/plain"}, b"busy"
+
+    resilience = Resilience(ResiliencePolicy(max_attempts=1, hedge_after=0.95, hedge_initial_delay=0.05))
+    http = HTTPClient(cache=None)
+    with FixtureServer({"/": slow_then_busy}) as server:
+        response = resilience.call(server.url("/"), lambda: http.get(server.url("/")))
+    assert response.status_code == 200 and response.text == "ok"
+    assert resilience.counters["hedges"] == 1 and resilience.counters["hedge_wins"] == 0
+    resilience.close()
+    http.close()
+
+
+def test_body_dropped_mid_read_is_retried_under_a_deadline():
+    """A connection lost mid-body while reading against a deadline is a retryable host failure"""
+    url, requests_seen = dropping_server()
+    resilience = Resilience(ResiliencePolicy(max_attempts=2, failure_threshold=2), sleep=lambda s: None)
+    http = HTTPClient(cache=None)
+    try:
+        resilience.call(url, lambda: http.fetch(url, deadline=Deadline(5.0)), Deadline(5.0))
+        assert False, "truncated body was accepted"
+    except requests.exceptions.ChunkedEncodingError:
+        pass
+    assert requests_seen[0] == 2
+    assert resilience.counters["retries"] == 1
+    assert resilience.breaker(url).state == OPEN
+    http.close()
+
+
+def test_mcps_use_their_own_policies():
+    """A dead host costs one failure, then the scraper fails fast; research retries a flaky API"""
+    http = HTTPClient(cache=None)
+    mcp = WebscrapingMCP(http_client=http, politeness=PolitenessScheduler(http, respect_robots=False),
+                         resilience=Resilience(ResiliencePolicy(max_attempts=2, failure_threshold=2),
+                                               sleep=lambda s: None))
+    url = dead_url("/products")
+    assert "Connection refused" in mcp._scrape_website(url, mcp.new_context())
+    start = time.perf_counter()
+    response = mcp._scrape_website(url, mcp.new_context())
+    assert "Circuit open" in response
+    assert time.perf_counter() - start < 0.1
+
+    body = {"query": {"search": [{"title": "Quantum computing", "snippet": "qubits"}]}}
+    calls = {"n": 0}
+
+    def search(handler):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return 502, {"Content-Type": "text/plain"}, b"bad gateway"
+        return 200, {"Content-Type": "application/json"}, json.dumps(body).encode()
+
+    with FixtureServer({"/w/api.php": search}) as server:
+        research = ResearchMCP(http_client=http, api_url=server.url("/w/api.php"),
+                               resilience=Resilience(ResiliencePolicy(max_attempts=2), sleep=lambda s: None))
+        assert "Quantum computing" in research._get_research_information("quantum computing")
+    assert calls["n"] == 2
+    http.close()
+
+
+if __name__ == "__main__":
+    test_backoff_is_jittered_and_capped()
+    test_retries_recover_from_server_errors()
+    test_circuit_breaker_fails_fast_and_probes()
+    test_hedged_request_beats_slow_primary()
+    test_hedge_prefers_a_success_over_a_fast_error_status()
+    test_body_dropped_mid_read_is_retried_under_a_deadline()
+    test_mcps_use_their_own_policies()
+    print("Resilience tests passed")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the persistent HTTP response cache
+"""
+
+import os
+import tempfile
+
+from fixture_server import FixtureServer
+from http_client import HTTPClient
+from response_cache import ResponseCache
+
+
+def test_fresh_hits_and_etag_revalidation():
+    """max-age responses are served from disk; ETag responses revalidate with a 304"""
+    body = b"<html><title>cached</title>" + b"x" * 2000 + b"</html>"
+    conditional = []
+
+    def fresh(handler):
+        return 200, {"Cache-Control": "max-age=60"}, body
+
+    def tagged(handler):
+        conditional.append(handler.headers.get("If-None-Match"))
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"', "Cache-Control": "no-cache"}, body
+
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer({"/fresh": fresh, "/tagged": tagged}) as server:
+        cache = ResponseCache(os.path.join(tmp, "cache.sqlite"))
+        client = HTTPClient(cache=cache)
+
+        for _ in range(3):
+            assert client.get(server.url("/fresh")).content == body
+        for _ in range(3):
+            assert client.get(server.url("/tagged")).content == body
+
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["revalidations"] == 2
+        assert stats["misses"] == 2
+        assert stats["bytes_saved"] == 4 * len(body)
+        assert conditional == [None, '"v1"', '"v1"']
+
+
+def test_lru_eviction_respects_size_bound():
+    """Least recently used entries are dropped once the size limit is exceeded"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "cache.sqlite"), max_bytes=250)
+        headers = {"Cache-Control": "max-age=60"}
+        cache.store("a", "http://a", 200, headers, b"a" * 100)
+        cache.store("b", "http://b", 200, headers, b"b" * 100)
+        cache.lookup("a")  # a is now the most recently used
+        cache.store("c", "http://c", 200, headers, b"c" * 100)
+
+        assert cache.lookup("b") is None
+        assert cache.lookup("a") is not None
+        assert cache.stats()["evictions"] == 1
+        assert not cache.store("d", "http://d", 200, {"Cache-Control": "no-store"}, b"d")
+
+
+if __name__ == "__main__":
+    test_fresh_hits_and_etag_revalidation()
+    test_lru_eviction_respects_size_bound()
+    print("Response cache tests passed")
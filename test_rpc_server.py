@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for the asyncio JSON-RPC server
+"""
+
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from rpc_server import RPCServer, INVALID_PARAMS, INVALID_REQUEST, METHOD_NOT_FOUND, UNKNOWN_TURN
+
+
+def slow_page(handler):
+    time.sleep(0.3)
+    return 200, {"Content-Type": "text/html"}, f"<html><title>{handler.path}</title></html>".encode()
+
+
+async def rpc(reader, writer, msg_id, method, params=None):
+    writer.write(json.dumps({"jsonrpc": "2.0", "id": msg_id, "method": method, "params": params or {}}).encode() + b"\n")
+    await writer.drain()
+
+
+def test_concurrent_sessions_over_tcp():
+    """Several conversations run at once on one connection; slow scrapes overlap"""
+    async def scenario(base_url):
+        server = RPCServer(mcps={"webscraping": WebscrapingMCP()})
+        listener = await server.serve_tcp("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+        for i in range(5):
+            await rpc(reader, writer, i, "session/request", {"request": f"scrape {base_url}/p{i}"})
+        questions = {}
+        for _ in range(5):
+            message = json.loads(await reader.readline())
+            questions[message["id"]] = message["result"]
+
+        start = time.perf_counter()
+        for i in range(5):
+            await rpc(reader, writer, 10 + i, "session/answer", {"turn_id": questions[i]["turn_id"],
+                                                                 "session_id": questions[i]["session_id"], "answer": "json"})
+        responses = {}
+        for _ in range(5):
+            message = json.loads(await reader.readline())
+            responses[message["id"]] = message["result"]["response"]
+        elapsed = time.perf_counter() - start
+
+        await rpc(reader, writer, 99, "session/answer", {"turn_id": questions[0]["turn_id"],
+                                                         "session_id": questions[0]["session_id"], "answer": "again"})
+        stale = json.loads(await reader.readline())
+        await rpc(reader, writer, 100, "no/such/method")
+        missing = json.loads(await reader.readline())
+
+        writer.close()
+        listener.close()
+        return questions, responses, elapsed, stale, missing
+
+    routes = {f"/p{i}": slow_page for i in range(5)}
+    with FixtureServer(routes) as fixture:
+        questions, responses, elapsed, stale, missing = asyncio.run(scenario(fixture.base_url))
+
+    assert all(q["mcp"] == "webscraping" for q in questions.values())
+    assert all(f"/p{i}" in responses[10 + i] for i in range(5))
+    assert elapsed < 1.0  # five 0.3 s pages in parallel, not 1.5 s in series
+    assert stale["error"]["code"] == UNKNOWN_TURN
+    assert missing["error"]["code"] == METHOD_NOT_FOUND
+
+
+def test_stdio_transport():
+    """The stdio transport answers on stdout and keeps logs off it"""
+    messages = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize"},
+        {"jsonrpc": "2.0", "id": 2, "method": "mcps/list"}
+    ]
+    # Longer than asyncio's default 64 KiB line limit
+    messages.append({"jsonrpc": "2.0", "id": 3, "method": "mcps/list", "params": {"padding": "x" * 100000}})
+    stdin = "".join(json.dumps(m) + "\n" for m in messages) + "not json\n"
+    result = subprocess.run([sys.executable, "rpc_server.py", "--stdio"], input=stdin,
+                            capture_output=True, text=True, timeout=30)
+    replies = [json.loads(line) for line in result.stdout.splitlines()]
+    by_id = {reply["id"]: reply for reply in replies}
+    assert by_id[1]["result"]["capabilities"]["mcps"] == ["research", "webscraping"]
+    assert by_id[2]["result"]["mcps"] == ["research", "webscraping"]
+    assert by_id[3]["result"]["mcps"] == ["research", "webscraping"]
+    assert by_id[None]["error"]["code"] == -32700
+
+
+def test_malformed_answer_keeps_the_turn():
+    """An answer that is not a string is refused without using up the pending turn"""
+    async def scenario(url):
+        server = RPCServer(mcps={"webscraping": WebscrapingMCP()})
+        asked = await server.handle_message({"jsonrpc": "2.0", "id": 1, "method": "session/request",
+                                             "params": {"request": f"scrape {url}"}})
+        turn = {"turn_id": asked["result"]["turn_id"], "session_id": asked["result"]["session_id"]}
+        bad = await server.handle_message({"jsonrpc": "2.0", "id": 2, "method": "session/answer",
+                                           "params": dict(turn, answer=42)})
+        good = await server.handle_message({"jsonrpc": "2.0", "id": 3, "method": "session/answer",
+                                            "params": dict(turn, answer="json")})
+        return bad, good
+
+    with FixtureServer({"/page": "<title>Kept</title>"}) as fixture:
+        bad, good = asyncio.run(scenario(fixture.url("/page")))
+    assert bad["error"]["code"] == INVALID_PARAMS
+    assert "Kept" in good["result"]["response"]
+
+
+def test_oversized_message_is_refused_and_the_connection_kept():
+    """A line over the message limit gets an error reply; the messages after it are still served"""
+    async def scenario():
+        server = RPCServer(mcps={"webscraping": WebscrapingMCP()}, max_message_bytes=1024)
+        listener = await server.serve_tcp("127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", listener.sockets[0].getsockname()[1])
+        await rpc(reader, writer, 1, "session/request", {"request": "scrape " + "x" * 5000})
+        await rpc(reader, writer, 2, "mcps/list")
+        replies = [json.loads(await reader.readline()) for _ in range(2)]
+        writer.close()
+        listener.close()
+        return replies
+
+    too_large, listed = asyncio.run(scenario())
+    assert too_large["id"] is None and too_large["error"]["code"] == INVALID_REQUEST
+    assert listed["id"] == 2 and listed["result"]["mcps"] == ["webscraping"]
+
+
+def test_turn_is_answered_only_by_its_session():
+    """Turn ids are unguessable, and an answer naming another session neither answers nor uses up the turn"""
+    async def scenario(url):
+        server = RPCServer(mcps={"webscraping": WebscrapingMCP()})
+        asked = await server.handle_message({"jsonrpc": "2.0", "id": 1, "method": "session/request",
+                                             "params": {"request": f"scrape {url}"}})
+        turn_id = asked["result"]["turn_id"]
+        hijack = await server.handle_message({"jsonrpc": "2.0", "id": 2, "method": "session/answer",
+                                              "params": {"turn_id": turn_id, "session_id": "intruder",
+                                                         "answer": "json"}})
+        anonymous = await server.handle_message({"jsonrpc": "2.0", "id": 3, "method": "session/answer",
+                                                 "params": {"turn_id": turn_id, "answer": "json"}})
+        owner = await server.handle_message({"jsonrpc": "2.0", "id": 4, "method": "session/answer",
+                                             "params": {"turn_id": turn_id, "answer": "json",
+                                                        "session_id": asked["result"]["session_id"]}})
+        return turn_id, hijack, anonymous, owner
+
+    with FixtureServer({"/page": "<title>Mine</title>"}) as fixture:
+        turn_id, hijack, anonymous, owner = asyncio.run(scenario(fixture.url("/page")))
+    assert len(turn_id) == 32
+    assert hijack["error"]["code"] == UNKNOWN_TURN and anonymous["error"]["code"] == UNKNOWN_TURN
+    assert "Mine" in owner["result"]["response"]
+
+
+if __name__ == "__main__":
+    test_concurrent_sessions_over_tcp()
+    test_stdio_transport()
+    test_malformed_answer_keeps_the_turn()
+    test_oversized_message_is_refused_and_the_connection_kept()
+    test_turn_is_answered_only_by_its_session()
+    print("RPC server tests passed")
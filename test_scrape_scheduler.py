@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script for the recurring scrape scheduler
+"""
+
+import os
+import random
+import tempfile
+import threading
+import time
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from scrape_scheduler import INTERVALS, JobStore, ScrapeJob, ScrapeScheduler, next_run_time
+
+
+class FakePage:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class Site:
+    """Pages by URL plus a count of extractions"""
+
+    def __init__(self):
+        self.pages = {}
+        self.extractions = 0
+
+    def fetch(self, url):
+        return FakePage(self.pages[url])
+
+    def extract(self, page, elements):
+        self.extractions += 1
+        # The extracted field ignores everything but the first line
+        return {"title": page.content.split(b"\n")[0].decode()}
+
+
+def test_jitter_spreads_runs():
+    """Jobs scheduled in the same second run at different times within the jitter window"""
+    rng = random.Random(7)
+    runs = [next_run_time("daily", 1000.0, jitter=0.1, rng=rng) for _ in range(1000)]
+    assert len(set(runs)) == 1000
+    assert all(1000.0 + 0.9 * INTERVALS["daily"] <= run <= 1000.0 + 1.1 * INTERVALS["daily"] for run in runs)
+    assert max(runs) - min(runs) > 3600
+
+
+def test_runs_due_jobs_and_skips_unchanged_pages():
+    """Identical pages skip extraction; changed pages only emit when the extracted fields change"""
+    now = {"t": 0.0}
+    site = Site()
+    site.pages = {"http://a.test/": b"A1\n", "http://b.test/": b"B1\n"}
+    store = JobStore(":memory:")
+    store.add(ScrapeJob("a", "http://a.test/", (), "hourly", next_run=10.0))
+    store.add(ScrapeJob("b", "http://b.test/", (), "daily", next_run=20.0))
+    emitted = []
+    scheduler = ScrapeScheduler(site.fetch, site.extract, store, on_change=lambda job, data: emitted.append(data),
+                                clock=lambda: now["t"], rng=random.Random(1))
+    assert scheduler.sync() == 2
+    assert scheduler.next_due() == 10.0
+
+    now["t"] = 15.0
+    assert scheduler.run_pending() == 1
+    assert emitted == [{"title": "A1"}]
+
+    now["t"] = 25.0
+    assert scheduler.run_pending() == 1
+    assert emitted[-1] == {"title": "B1"}
+
+    # An hour later: page A is byte-identical, so it is not even extracted
+    now["t"] = 15.0 + 1.2 * 3600
+    assert scheduler.run_pending() == 1
+    assert site.extractions == 2 and len(emitted) == 2
+
+    # The page changes but not its first line: extracted again, not emitted
+    site.pages["http://a.test/"] = b"A1\nfooter changed\n"
+    now["t"] += 1.2 * 3600
+    scheduler.run_pending()
+    assert site.extractions == 3 and len(emitted) == 2
+
+    site.pages["http://a.test/"] = b"A2\n"
+    now["t"] += 1.2 * 3600
+    scheduler.run_pending()
+    assert emitted[-1] == {"title": "A2"}
+    stats = scheduler.stats()
+    assert stats["changed"] == 3 and stats["extractions_skipped"] == 1 and stats["unchanged"] == 1
+
+
+def test_state_survives_restart():
+    """Fingerprints persist, and jobs that fell due while stopped are spread out rather than run at once"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.sqlite")
+        site = Site()
+        site.pages = {f"http://h{i}.test/": b"same\n" for i in range(50)}
+        store = JobStore(path)
+        for i in range(50):
+            store.add(ScrapeJob(f"j{i}", f"http://h{i}.test/", (), "daily", next_run=1.0))
+        first = ScrapeScheduler(site.fetch, site.extract, store, clock=lambda: 1.0)
+        first.sync()
+        assert first.run_pending() == 50
+
+        # Restart two days later
+        later = 1.0 + 2 * INTERVALS["daily"]
+        second = ScrapeScheduler(site.fetch, site.extract, JobStore(path), clock=lambda: later)
+        second.sync()
+        due_times = sorted(job.next_run for job in second.jobs.values())
+        assert due_times[0] >= later and due_times[-1] - due_times[0] > 600
+        assert all(job.page_hash for job in second.jobs.values())
+
+
+class CountingStore(JobStore):
+    """JobStore that counts full reloads of the job table"""
+
+    loads = 0
+
+    def load(self):
+        self.loads += 1
+        return super().load()
+
+
+def test_run_forever_reloads_only_on_change_and_does_not_wait_for_slow_jobs():
+    """Wakes for due jobs do not reload the table, and a slow scrape does not delay the jobs after it"""
+    site = Site()
+    site.pages = {f"http://h{i}.test/": b"page\n" for i in range(10)}
+    ran_at = {}
+
+    def fetch(url):
+        if url == "http://h0.test/":
+            time.sleep(0.5)
+        ran_at[url] = time.time()
+        return site.fetch(url)
+
+    start = time.time()
+    store = CountingStore(":memory:")
+    for i in range(9):
+        store.add(ScrapeJob(f"j{i}", f"http://h{i}.test/", (), "hourly", next_run=start + 0.1 + 0.02 * i))
+    scheduler = ScrapeScheduler(fetch, site.extract, store, workers=4)
+    stop = threading.Event()
+    loop = threading.Thread(target=scheduler.run_forever, args=(stop, 60.0, 0.05))
+    loop.start()
+    time.sleep(0.3)
+    store.add(ScrapeJob("j9", "http://h9.test/", (), "hourly", next_run=time.time() + 0.2))
+    time.sleep(0.3)
+    store.add(ScrapeJob("late", "http://h9.test/late", (), "hourly", next_run=time.time() + 3600))
+    time.sleep(0.5)
+    stop.set()
+    loop.join()
+
+    assert ran_at["http://h1.test/"] - start < 0.4  # not stuck behind the 0.5 s scrape of h0
+    assert "http://h9.test/" in ran_at
+    assert scheduler.stats()["runs"] == 10
+    assert store.loads == 3  # at start and after each addition, not once per wake
+
+
+def test_mcp_records_recurring_scrapes():
+    """Asking for a daily scrape records one job per URL, once"""
+    store = JobStore(":memory:")
+    with FixtureServer({"/": "<title>Daily</title>"}) as server:
+        mcp = WebscrapingMCP(job_store=store)
+        request = f"scrape {server.url('/')}"
+        first = mcp.generate_response(request, "titles, daily", mcp.new_context())
+        mcp.generate_response(request, "titles, daily", mcp.new_context())
+
+    jobs = store.load()
+    assert len(jobs) == 1
+    assert jobs[0].url == server.url("/") and jobs[0].frequency == "daily"
+    assert f"Scheduled 1 recurring scrape(s) ({jobs[0].job_id})" in first
+
+
+if __name__ == "__main__":
+    test_jitter_spreads_runs()
+    test_runs_due_jobs_and_skips_unchanged_pages()
+    test_state_survives_restart()
+    test_run_forever_reloads_only_on_change_and_does_not_wait_for_slow_jobs()
+    test_mcp_records_recurring_scrapes()
+    print("Scrape scheduler tests passed")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-session context store
+"""
+
+import time
+
+from enhanced_webscraping_mcp import WebscrapingMCP
+from fixture_server import FixtureServer
+from session_store import SessionStore
+
+
+def test_sessions_do_not_share_context():
+    """One session's format and elements never show up in another session's response"""
+    page = "<html><head><title>Shop</title></head><body><h1>Deals</h1><span class='price'>$5</span></body></html>"
+    with FixtureServer({"/": page}) as server:
+        mcp = WebscrapingMCP()
+        store = SessionStore()
+        alice = store.context("alice", "webscraping", mcp.new_context)
+        bob = store.context("bob", "webscraping", mcp.new_context)
+
+        alice_request = f"{server.url('/')} - extract prices"
+        bob_request = f"look at {server.url('/')}"
+        mcp.generate_question(alice_request, alice)
+        mcp.generate_question(bob_request, bob)
+        csv_response = mcp.generate_response(alice_request, "csv", alice)
+        json_response = mcp.generate_response(bob_request, "json", bob)
+
+    assert alice["data_format"] == "csv" and bob["data_format"] == "json"
+    assert alice["elements_to_extract"] and "Targeted elements" in csv_response
+    assert bob["elements_to_extract"] == [] and "Targeted elements" not in json_response
+    assert "Data format: CSV" in csv_response and "Data format: JSON" in json_response
+    assert store.context("alice", "webscraping", mcp.new_context) is alice
+
+
+def test_lru_ttl_and_memory_cap():
+    """Idle sessions expire, the least recently used go first, and the byte budget is enforced"""
+    store = SessionStore(max_sessions=3, ttl=0.2)
+    for name in ("a", "b", "c"):
+        store.context(name, "research", dict)
+    store.context("a", "research", dict)
+    store.context("d", "research", dict)
+    assert "b" not in store and {"a", "c", "d"} == {s for s in "acd" if s in store}
+
+    time.sleep(0.25)
+    store.context("e", "research", dict)
+    assert len(store) == 1 and store.stats()["expired"] == 3
+
+    capped = SessionStore(max_bytes=4096)
+    for i in range(200):
+        capped.context(f"s{i}", "webscraping", lambda: {"target_urls": ["http://example.com/" + "x" * 100]})
+    stats = capped.stats()
+    assert stats["bytes"] <= 4096 and stats["evictions"] > 0 and "s199" in capped
+
+
+if __name__ == "__main__":
+    test_sessions_do_not_share_context()
+    test_lru_ttl_and_memory_cap()
+    print("All session store tests passed")